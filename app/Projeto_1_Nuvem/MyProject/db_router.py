@@ -0,0 +1,158 @@
+# MyProject/db_router.py
+"""
+Leituras nas réplicas, escritas no primário, com read-your-writes.
+
+As réplicas (settings.DATABASE_REPLICAS, configuradas por DB_REPLICAS) só
+recebem leituras feitas dentro de uma requisição, e só quando nada obriga a
+usar o primário:
+
+- requisições que escrevem (POST etc.) leem do primário do começo ao fim;
+- depois de qualquer escrita, o resto da requisição também lê do primário;
+- a resposta de uma requisição que escreveu leva um cookie que prende as
+  leituras daquele navegador ao primário por DB_REPLICA_STICKY_SECONDS,
+  tempo para as réplicas alcançarem o primário; assim o usuário nunca vê
+  um saldo anterior ao lançamento que acabou de gravar;
+- a mesma janela também fica no cache compartilhado, por usuário
+  (`pin_users()`): vale para os outros aparelhos do usuário e para escritas
+  feitas fora de uma requisição (agendador, importação), que chamam
+  pin_users() pela troca de versão do ledger. Como a versão só troca depois
+  do pin, os caches com a versão na chave (dashboard, insights) são
+  preenchidos com leituras do primário.
+
+Sessões e o estado do login social ficam sempre no primário, assim como
+comandos de management e threads de fundo (fora de uma requisição não há
+como saber se a leitura pode estar atrasada).
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.core.cache import cache
+
+PRIMARY = 'default'
+COOKIE_NAME = 'primary_until'
+
+# Apps cujas leituras nunca vão para as réplicas
+PRIMARY_APPS = {'sessions', 'social_django'}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+
+    def __init__(self, use_primary, request=None):
+        self.use_primary = use_primary
+        self.wrote = False
+        self.request = request
+        self._user_pinned = None
+
+    def user_id(self):
+        session = getattr(self.request, 'session', None)
+        return None if session is None else session.get(SESSION_KEY)
+
+    def user_pinned(self):
+        """True se o usuário logado escreveu, de qualquer lugar, dentro da janela (consultado uma vez)."""
+        if self._user_pinned is None:
+            # Marca antes: ler a sessão passa de novo pelo roteador
+            self._user_pinned = False
+            user_id = self.user_id()
+            self._user_pinned = user_id is not None and bool(cache.get(_pin_key(user_id)))
+        return self._user_pinned
+
+
+# Estado da requisição atual; None fora de uma requisição
+current = ContextVar('db_routing', default=None)
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = current.get()
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas or state is None or state.use_primary or state.wrote
+            or model._meta.app_label in PRIMARY_APPS or state.user_pinned()
+        ):
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplicas têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # As réplicas recebem o schema pela replicação do próprio banco
+        return db not in settings.DATABASE_REPLICAS
+
+
+def _pin_key(user_id):
+    return f'db:primary:{user_id}'
+
+
+def pin_users(*user_ids):
+    """Prende as leituras dos usuários ao primário por DB_REPLICA_STICKY_SECONDS, em qualquer navegador."""
+    if not settings.DATABASE_REPLICAS or not user_ids:
+        return
+    cache.set_many({_pin_key(user_id): 1 for user_id in user_ids}, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def pinned(request):
+    """True se o cookie ainda prende as leituras deste navegador ao primário."""
+    try:
+        return float(request.COOKIES.get(COOKIE_NAME, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRoutingMiddleware:
+    """Define o estado de roteamento da requisição e grava o cookie depois de escritas."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        return self.finish(state, response)
+
+    def start(self, request):
+        state = RoutingState(request.method not in SAFE_METHODS or pinned(request), request)
+        return state, current.set(state)
+
+    def finish(self, state, response):
+        if state.wrote and settings.DATABASE_REPLICAS:
+            user_id = state.user_id()
+            if user_id is not None:
+                pin_users(user_id)
+            window = settings.DB_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                COOKIE_NAME, str(int(time.time() + window)), max_age=window, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,58 @@
+# MyProject/proxy.py
+"""
+Integração com o nginx na frente do Django.
+
+micro_cache(): o nginx só guarda uma resposta no micro-cache quando ela traz
+X-Accel-Expires, que este decorator põe nas respostas 200 a GET/HEAD sem
+cookie de sessão. O nginx nunca guarda respostas com Set-Cookie, então
+páginas com {% csrf_token %} não entram no cache mesmo decoradas: o token é
+de cada visitante e o Django reenvia o cookie do CSRF a cada uso. A página
+de login (users.views.LoginAndRegisterView) sai sem o token no GET e o
+busca depois na view users.views.csrf, que nunca é cacheada.
+
+accel_redirect(): depois de a view autorizar o acesso, devolve uma resposta
+vazia com X-Accel-Redirect e o nginx envia o arquivo do disco, sem ocupar o
+worker do Django. Sem MEDIA_ACCEL_PREFIX (desenvolvimento, testes sem nginx)
+o próprio Django serve o arquivo.
+"""
+import mimetypes
+from functools import wraps
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+
+
+def micro_cache(view_func):
+    """Marca as respostas anônimas da view para o micro-cache do nginx (MICRO_CACHE_SECONDS)."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if (
+            request.method in ('GET', 'HEAD')
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and response.status_code == 200
+        ):
+            response['X-Accel-Expires'] = str(settings.MICRO_CACHE_SECONDS)
+        return response
+    return wrapper
+
+
+def accel_redirect(name, cache_control='private, max-age=86400'):
+    """Resposta que entrega o arquivo `name` do MEDIA_ROOT (pelo nginx, se configurado)."""
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except ValueError:
+        raise Http404
+    prefix = settings.MEDIA_ACCEL_PREFIX
+    if prefix:
+        response = HttpResponse(content_type=mimetypes.guess_type(name)[0] or 'application/octet-stream')
+        response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+    else:
+        try:
+            response = FileResponse(open(path, 'rb'))
+        except (FileNotFoundError, IsADirectoryError):
+            raise Http404
+    response['Cache-Control'] = cache_control
+    return response
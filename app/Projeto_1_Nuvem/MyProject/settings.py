@@ -3,6 +3,7 @@ Django settings for MyProject project.
 """
 from dotenv import load_dotenv
 import os
+import sys
 from pathlib import Path
 
 # Carrega .env se existir (útil para rodar localmente fora do Docker)
@@ -46,15 +47,23 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'users.apps.UserConfig',
     'social_django',
-    'transactions.apps.TransactionsConfig'
+    'transactions.apps.TransactionsConfig',
+    'monitoring.apps.MonitoringConfig',
+    'quotes.apps.QuotesConfig',
 ]
 
 MIDDLEWARE = [
+    # No topo para medir todo o resto; o profiling fica desligado sem PROFILING_ENABLED
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.ProfilingMiddleware',
+    # Antes de qualquer acesso ao banco: decide entre réplica e primário
+    'MyProject.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # AuthenticationMiddleware que carrega usuário + perfil numa consulta (ou do cache)
+    'users.middleware.CachedUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,6 +90,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'MyProject.wsgi.application'
+ASGI_APPLICATION = 'MyProject.asgi.application'
+
+# 'wsgi' (gunicorn) ou 'asgi' (uvicorn). No modo ASGI a home e a lista de
+# lançamentos usam as views assíncronas (users.views.ahome e
+# transactions.views.transaction_list_async); as demais continuam síncronas.
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+ASYNC_VIEWS = SERVER_MODE == 'asgi'
 
 
 # Database
@@ -99,6 +115,147 @@ DATABASES = {
     }
 }
 
+# DB_ENGINE=sqlite roda sem nenhum serviço (benchmarks e desenvolvimento local)
+if os.getenv('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+    }
+
+# Conexões persistentes: cada worker do gunicorn (uma thread) mantém uma conexão
+# aberta e a reaproveita entre requisições por até DB_CONN_MAX_AGE segundos
+# ('none' = sem limite, 0 = uma conexão nova por requisição). Assim o pool é
+# de uma conexão por worker: o MySQL precisa de max_connections acima de
+# workers x containers (+ a thread dos avatares). Com health checks, uma
+# conexão derrubada pelo servidor (wait_timeout, restart) é trocada no início
+# da requisição em vez de falhar na primeira consulta. No modo ASGI cada
+# requisição roda o código síncrono numa thread própria, e conexões
+# persistentes se acumulariam por thread; por isso o padrão lá é 0.
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', '0' if ASYNC_VIEWS else '60')
+DATABASES['default'].update({
+    'CONN_MAX_AGE': None if DB_CONN_MAX_AGE.lower() == 'none' else int(DB_CONN_MAX_AGE),
+    'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+})
+if DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+    DATABASES['default']['OPTIONS'] = {
+        'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+    }
+
+# Réplicas de leitura (MyProject.db_router): DB_REPLICAS lista os hosts do
+# MySQL (mesma base, usuário e senha do primário) ou, com DB_ENGINE=sqlite,
+# caminhos de arquivos. Nos testes as réplicas espelham o banco 'default'.
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    replica['NAME' if replica['ENGINE'] == 'django.db.backends.sqlite3' else 'HOST'] = location.strip()
+    DATABASES[alias] = replica
+    DATABASE_REPLICAS.append(alias)
+
+# Nos testes (manage.py test ou pytest), um SQLite à parte faz o papel de
+# réplica atrasada em MyProject.test_db_router, com dados próprios em vez de
+# espelhar o primário. Fica fora de DATABASE_REPLICAS: o teste o liga com
+# override_settings, e o runner cria a base e aplica as migrações nele.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+if TESTING:
+    DATABASES['replica_test'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': BASE_DIR / 'replica_test.sqlite3'}
+
+DATABASE_ROUTERS = ['MyProject.db_router.PrimaryReplicaRouter']
+
+# Depois de uma escrita, por quantos segundos as leituras do usuário ficam no
+# primário; deve cobrir o atraso típico da replicação.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+
+# Cache
+# locmem: um cache por processo, bom para desenvolvimento e testes.
+# file: diretório em disco compartilhado por todos os workers do gunicorn no container.
+# memcached/redis: servidor via socket, compartilhado entre containers (requer
+# pymemcache ou redis instalados).
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv('CACHE_LOCATION', '/tmp/coinflip_cache' if CACHE_BACKEND == 'file' else ''),
+    }
+}
+
+# Sessões: db (padrão), cached_db (lê do cache, grava no cache e no banco) ou
+# cache. Com cached_db/cache e vários containers use um cache compartilhado.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.getenv('SESSION_BACKEND', 'db')
+
+# Tempo (s) que o usuário logado (com o perfil) fica no cache; 0 desliga.
+# Só vale com um cache compartilhado entre containers (memcached/redis): com
+# locmem/file a invalidação (troca de senha, desativação, exclusão da conta)
+# só limpa a cópia local, e os outros containers seguiriam aceitando a sessão.
+SHARED_CACHE = CACHE_BACKEND in ('memcached', 'redis')
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', '0')) if SHARED_CACHE else 0
+
+# Tempo (s) que um resumo do dashboard fica no cache. A invalidação é feita pela
+# versão do ledger do usuário, então isto só limita o espaço ocupado.
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', 60 * 60))
+
+# Versões reduzidas dos avatares (users.avatars): 'thread' processa numa thread
+# de fundo de cada worker; 'sync' processa na hora (testes e scripts).
+AVATAR_PROCESSING = os.getenv('AVATAR_PROCESSING', 'thread')
+
+# Exclusão de contas (users.purge): 'thread' apaga os dados em lotes numa thread
+# de fundo depois da requisição; 'sync' apaga na hora (testes e scripts).
+ACCOUNT_PURGE = os.getenv('ACCOUNT_PURGE', 'thread')
+
+# Cotações do dashboard (quotes.store): servidas do cache e atualizadas em
+# segundo plano. 'static' usa valores fixos, sem rede; 'brapi' usa a API da
+# brapi.dev (BRAPI_URL pode apontar para o servidor falso, python -m quotes.stub).
+QUOTE_PROVIDERS = {
+    'static': 'quotes.providers.StaticProvider',
+    'brapi': 'quotes.providers.BrapiProvider',
+}
+QUOTES_PROVIDER = QUOTE_PROVIDERS[os.getenv('QUOTES_PROVIDER', 'static')]
+QUOTES_SYMBOLS = os.getenv('QUOTES_SYMBOLS', 'PETR4,MGLU3,VALE3').split(',')
+# Até QUOTES_TTL (s) a cotação é servida como está; até QUOTES_MAX_STALE é
+# servida enquanto a atualização roda; depois disso o dashboard fica sem ela.
+QUOTES_TTL = int(os.getenv('QUOTES_TTL', 60))
+QUOTES_MAX_STALE = int(os.getenv('QUOTES_MAX_STALE', 6 * 60 * 60))
+QUOTES_TIMEOUT = float(os.getenv('QUOTES_TIMEOUT', 3))
+# Falhas seguidas que abrem o disjuntor e por quantos segundos ele fica aberto
+QUOTES_BREAKER_THRESHOLD = int(os.getenv('QUOTES_BREAKER_THRESHOLD', 3))
+QUOTES_BREAKER_COOLDOWN = int(os.getenv('QUOTES_BREAKER_COOLDOWN', 60))
+# 'thread' atualiza numa thread de fundo; 'sync' atualiza na hora (testes)
+QUOTES_REFRESH = os.getenv('QUOTES_REFRESH', 'thread')
+BRAPI_URL = os.getenv('BRAPI_URL', 'https://brapi.dev')
+BRAPI_TOKEN = os.getenv('BRAPI_TOKEN', '')
+
+# Profiling por requisição (monitoring.middleware.ProfilingMiddleware)
+# Server-Timing + log JSON em toda resposta; cProfile numa fração das requisições,
+# gravado em disco só quando a requisição passa de PROFILING_SLOW_MS.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_SLOW_MS = float(os.getenv('PROFILING_SLOW_MS', '500'))
+PROFILING_DUMP_DIR = os.getenv('PROFILING_DUMP_DIR', '/tmp/coinflip_profiles')
+
+# Métricas Prometheus em /metrics (monitoring.metrics). Com vários workers do
+# gunicorn, METRICS_DIR precisa ser um diretório compartilhado por eles.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.getenv('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'monitoring': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -133,7 +290,7 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
-STATIC_ROOT = '/app/staticfiles'
+STATIC_ROOT = os.getenv('STATIC_ROOT', '/app/staticfiles')
 
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
@@ -141,7 +298,32 @@ STATICFILES_DIRS = [
 
 MEDIA_URL = '/media/'
 
-MEDIA_ROOT = '/app/mediafiles'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', '/app/mediafiles')
+
+# Com MEDIA_ACCEL_PREFIX (o location interno do nginx), a view de mídia só
+# autoriza e o nginx entrega o arquivo (X-Accel-Redirect); vazio, o Django
+# serve o arquivo (desenvolvimento).
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '')
+
+# Segundos que o nginx guarda as páginas anônimas marcadas com micro_cache
+MICRO_CACHE_SECONDS = int(os.getenv('MICRO_CACHE_SECONDS', 5))
+
+# collectstatic grava os estáticos com hash de conteúdo no nome (cache
+# imutável no nginx) e as versões .gz/.br pré-comprimidas (MyProject.storage)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'MyProject.storage.CompressedManifestStaticFilesStorage'},
+    # Arquivo frio dos lançamentos antigos (transactions.archive); fora do MEDIA_ROOT,
+    # que o nginx serve
+    'archive': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': os.getenv('ARCHIVE_ROOT', '/app/archive')},
+    },
+}
+
+# Anos inteiros mais antigos que este horizonte saem da tabela de lançamentos
+# para o arquivo frio (manage.py archive_transactions)
+ARCHIVE_HORIZON_DAYS = int(os.getenv('ARCHIVE_HORIZON_DAYS', 2 * 365))
 
 
 LOGIN_REDIRECT_URL = '/'
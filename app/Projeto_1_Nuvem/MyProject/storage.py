@@ -0,0 +1,67 @@
+# MyProject/storage.py
+"""
+Storage dos arquivos estáticos: nomes com hash de conteúdo e cópias pré-comprimidas.
+
+O collectstatic grava cada arquivo também com o hash do conteúdo no nome
+(css/home_user.1a2b3c4d5e6f.css) e o {% static %} passa a apontar para essa
+versão, que o nginx serve com Cache-Control immutable. Para os tipos de
+texto, grava ao lado um .gz (gzip_static do nginx) e, se o pacote Brotli
+estiver instalado, um .br para CSS, JS e SVG (BROTLI_TYPES, os tipos que o
+nginx sabe servir em .br), sempre que a versão comprimida for menor.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.map', '.xml', '.html')
+
+# Só esses têm location .br no nginx/default.conf; um .br a mais nunca seria servido
+BROTLI_TYPES = ('.css', '.js', '.svg')
+
+# Abaixo disso o cabeçalho da compressão come o ganho
+MIN_SIZE = 256
+
+
+def compressed_variants(name, data):
+    """Retorna [(extensão, bytes)] das versões comprimidas de `name` que valem a pena."""
+    if len(data) < MIN_SIZE:
+        return []
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None and name.endswith(BROTLI_TYPES):
+        variants.append(('.br', brotli.compress(data, quality=11, mode=brotli.MODE_TEXT)))
+    return [(extension, compressed) for extension, compressed in variants if len(compressed) < len(data)]
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                processed_names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(processed_names):
+            if name.endswith(COMPRESSIBLE):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as handle:
+            data = handle.read()
+        for extension, compressed in compressed_variants(name, data):
+            with open(self.path(name + extension), 'wb') as handle:
+                handle.write(compressed)
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Sem manifest ou fora dele (testes, collectstatic ainda não rodado):
+            # URL sem hash, que o nginx serve com cache curto em vez de quebrar a página
+            return name
@@ -0,0 +1,101 @@
+# MyProject/test_db_router.py
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import router
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from MyProject.db_router import COOKIE_NAME, PRIMARY
+from transactions.models import Transaction
+from users.models import Profile
+from decimal import Decimal
+
+# Segundo banco SQLite fazendo o papel da réplica (declarado no settings só
+# nos testes), com dados próprios: pelo conteúdo das páginas dá para saber de
+# qual banco veio cada leitura
+REPLICA = 'replica_test'
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], DB_REPLICA_STICKY_SECONDS=10)
+class PrimaryReplicaRouterTestCase(TestCase):
+    """Tests para o roteamento de leituras entre primário e réplica"""
+
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='replicauser', password='testpass123')
+        # A réplica "atrasada": o mesmo usuário, mas só um lançamento antigo
+        User.objects.using(REPLICA).bulk_create([
+            User(pk=self.user.pk, username=self.user.username, password=self.user.password),
+        ])
+        Profile.objects.using(REPLICA).bulk_create([Profile(user_id=self.user.pk)])
+        Transaction.objects.using(REPLICA).bulk_create([
+            Transaction(user_id=self.user.pk, name='Replica', value=Decimal('1.00')),
+        ])
+        Transaction.objects.create(user=self.user, name='Primary', value=Decimal('2.00'))
+        self.client.force_login(self.user)
+
+    def names(self, response):
+        return [transaction.name for transaction in response.context['transactions']]
+
+    def test_reads_go_to_replica(self):
+        """Testa se as leituras de um GET vão para a réplica (e a sessão para o primário)"""
+        response = self.client.get(reverse('transactions:list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), ['Replica'])
+        self.assertNotIn(COOKIE_NAME, response.cookies)
+
+    def test_write_pins_reads_to_primary(self):
+        """Testa se, depois de gravar, o usuário lê do primário e vê o próprio lançamento"""
+        response = self.client.post(reverse('transactions:create'), {
+            'name': 'New', 'value': '3.00', 'description': '',
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(COOKIE_NAME, response.cookies)
+
+        response = self.client.get(reverse('transactions:list'))
+
+        self.assertEqual(sorted(self.names(response)), ['New', 'Primary'])
+
+    def test_write_pins_other_devices(self):
+        """Testa se a escrita num navegador prende ao primário também os outros aparelhos do usuário"""
+        other_device = Client()
+        other_device.force_login(self.user)
+
+        self.client.post(reverse('transactions:create'), {'name': 'New', 'value': '3.00', 'description': ''})
+        response = other_device.get(reverse('transactions:list'))
+
+        self.assertNotIn(COOKIE_NAME, other_device.cookies)
+        self.assertEqual(sorted(self.names(response)), ['New', 'Primary'])
+
+    def test_write_outside_request_pins_user(self):
+        """Testa se uma escrita do agendador (troca da versão do ledger) prende o usuário ao primário"""
+        with self.captureOnCommitCallbacks(execute=True):
+            Transaction.objects.create(user=self.user, name='Recorrente', value=Decimal('4.00'))
+
+        response = self.client.get(reverse('transactions:list'))
+
+        self.assertEqual(sorted(self.names(response)), ['Primary', 'Recorrente'])
+
+    def test_expired_pin_reads_from_replica(self):
+        """Testa se o cookie vencido volta as leituras para a réplica"""
+        self.client.cookies[COOKIE_NAME] = str(int(time.time()) - 1)
+
+        response = self.client.get(reverse('transactions:list'))
+
+        self.assertEqual(self.names(response), ['Replica'])
+
+    def test_reads_outside_requests_use_primary(self):
+        """Testa se leituras fora de uma requisição (comandos, threads) usam o primário"""
+        self.assertEqual(router.db_for_read(Transaction), PRIMARY)
+        self.assertEqual(list(Transaction.objects.values_list('name', flat=True)), ['Primary'])
+
+    def test_replicas_are_not_migrated(self):
+        """Testa se o migrate ignora as réplicas"""
+        self.assertFalse(router.allow_migrate(REPLICA, 'transactions'))
+        self.assertTrue(router.allow_migrate(PRIMARY, 'transactions'))
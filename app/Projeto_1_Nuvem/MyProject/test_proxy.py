@@ -0,0 +1,115 @@
+# MyProject/test_proxy.py
+
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from users.models import Profile
+
+
+@override_settings(MICRO_CACHE_SECONDS=5)
+class MicroCacheTestCase(TestCase):
+    """Tests para o X-Accel-Expires que libera o micro-cache do nginx"""
+
+    def test_anonymous_response_is_cacheable(self):
+        """Testa se a página anônima sai marcada para o micro-cache"""
+        response = self.client.get(reverse('users:password_reset_complete'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Expires'], '5')
+        self.assertNotIn('Set-Cookie', response.headers)
+
+    def test_session_cookie_skips_cache(self):
+        """Testa se a resposta para quem tem sessão não é marcada"""
+        User.objects.create_user(username='cacheuser', password='testpass123')
+        self.client.login(username='cacheuser', password='testpass123')
+
+        response = self.client.get(reverse('users:password_reset_complete'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Accel-Expires', response.headers)
+
+    def test_login_page_is_cacheable(self):
+        """Testa se o GET anônimo do login sai sem token nem cookie do CSRF, marcado para o micro-cache"""
+        response = self.client.get(reverse('users:login'))
+
+        self.assertEqual(response['X-Accel-Expires'], '5')
+        self.assertNotIn('Set-Cookie', response.headers)
+        self.assertContains(response, '<input type="hidden" name="csrfmiddlewaretoken" value="">', count=2)
+
+    def test_login_with_deferred_csrf_token(self):
+        """Testa se o login funciona com o token buscado à parte, e só com ele"""
+        User.objects.create_user(username='cacheuser', password='testpass123')
+        client = Client(enforce_csrf_checks=True)
+        client.get(reverse('users:login'))
+        data = {'username': 'cacheuser', 'password': 'testpass123', 'submit_login': '1'}
+
+        self.assertEqual(client.post(reverse('users:login'), data).status_code, 403)
+
+        response = client.get(reverse('users:csrf'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = client.post(reverse('users:login'), {**data, 'csrfmiddlewaretoken': response.json()['token']})
+        self.assertRedirects(response, reverse('users:home'), fetch_redirect_response=False)
+
+
+class MediaViewTestCase(TestCase):
+    """Tests para a mídia autorizada pelo Django e entregue pelo nginx (X-Accel-Redirect)"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name, MEDIA_ACCEL_PREFIX='/protected-media/')
+        override.enable()
+        self.addCleanup(override.disable)
+        (Path(self.media.name) / 'profile_images').mkdir()
+        for name in ('default.jpg', 'profile_images/dono.jpg', 'profile_images/outro.jpg'):
+            (Path(self.media.name) / name).write_bytes(b'jpeg')
+
+        # update() direto: sem o processamento de imagem do Profile.save()
+        for username in ('dono', 'outro'):
+            user = User.objects.create_user(username=username, password='testpass123')
+            Profile.objects.filter(user=user).update(
+                avatar=f'profile_images/{username}.jpg',
+                avatar_variants={'64.webp': f'profile_images/{username}-64.webp'},
+            )
+
+    def test_default_avatar_is_public(self):
+        """Testa se o avatar padrão é entregue sem login e com cache público"""
+        response = self.client.get('/media/default.jpg')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/default.jpg')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=86400')
+        self.assertEqual(response.content, b'')
+
+    def test_own_avatar_and_variants(self):
+        """Testa se o dono recebe o próprio avatar e suas versões pelo nginx"""
+        self.client.login(username='dono', password='testpass123')
+
+        for name in ('profile_images/dono.jpg', 'profile_images/dono-64.webp'):
+            response = self.client.get(f'/media/{name}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{name}')
+            self.assertEqual(response['Cache-Control'], 'private, max-age=86400')
+
+    def test_other_files_are_hidden(self):
+        """Testa se avatar de outro usuário, caminho fora do MEDIA_ROOT e acesso anônimo dão 404"""
+        self.assertEqual(self.client.get('/media/profile_images/dono.jpg').status_code, 404)
+
+        self.client.login(username='dono', password='testpass123')
+        for path in ('/media/profile_images/outro.jpg', '/media/../settings.py'):
+            self.assertEqual(self.client.get(path).status_code, 404)
+
+    def test_served_by_django_without_prefix(self):
+        """Testa se, sem MEDIA_ACCEL_PREFIX, o próprio Django entrega o arquivo"""
+        self.client.login(username='dono', password='testpass123')
+
+        with override_settings(MEDIA_ACCEL_PREFIX=''):
+            response = self.client.get('/media/profile_images/dono.jpg')
+            missing = self.client.get('/media/profile_images/dono-64.webp')
+
+        self.assertNotIn('X-Accel-Redirect', response.headers)
+        self.assertEqual(b''.join(response.streaming_content), b'jpeg')
+        self.assertEqual(missing.status_code, 404)
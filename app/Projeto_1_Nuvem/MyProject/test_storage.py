@@ -0,0 +1,56 @@
+# MyProject/test_storage.py
+
+import gzip
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from MyProject import storage
+
+
+class CompressedManifestStorageTestCase(SimpleTestCase):
+    """Tests para o collectstatic com hash de conteúdo e versões pré-comprimidas"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = Path(tempfile.mkdtemp())
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        # Só os estáticos do projeto; os do admin deixariam o teste lento
+        with override_settings(STATIC_ROOT=cls.static_root):
+            call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin'])
+            cls.url = staticfiles_storage.url('css/login.css')
+
+    def test_hashed_url_and_precompressed_files(self):
+        """Testa se o {% static %} aponta para o nome com hash e se o .gz/.br são gravados"""
+        url = self.url
+
+        self.assertRegex(url, r'^/static/css/login\.[0-9a-f]{12}\.css$')
+        hashed = self.static_root / url.removeprefix('/static/')
+        original = hashed.read_bytes()
+        self.assertEqual(gzip.decompress(Path(f'{hashed}.gz').read_bytes()), original)
+        if storage.brotli is not None:
+            self.assertEqual(storage.brotli.decompress(Path(f'{hashed}.br').read_bytes()), original)
+
+    def test_binary_files_are_not_compressed(self):
+        """Testa se imagens não ganham versões comprimidas"""
+        self.assertTrue(list(self.static_root.glob('img/logo.*.png')))
+        self.assertFalse(list(self.static_root.glob('img/*.gz')))
+
+    def test_brotli_only_for_types_nginx_serves(self):
+        """Testa se só CSS, JS e SVG ganham .br, enquanto os outros textos ficam só com .gz"""
+        data = b'{"valor": 1}' * 100
+        fake = type('FakeBrotli', (), {'MODE_TEXT': 1, 'compress': staticmethod(lambda data, **kw: b'br')})
+
+        with patch.object(storage, 'brotli', fake):
+            self.assertEqual([ext for ext, _ in storage.compressed_variants('data.json', data)], ['.gz'])
+            self.assertEqual([ext for ext, _ in storage.compressed_variants('app.js', data)], ['.gz', '.br'])
+
+    def test_missing_manifest_falls_back_to_plain_name(self):
+        """Testa se, sem collectstatic, a URL sai sem hash em vez de levantar erro"""
+        with tempfile.TemporaryDirectory() as empty, override_settings(STATIC_ROOT=empty):
+            self.assertEqual(staticfiles_storage.url('css/login.css'), '/static/css/login.css')
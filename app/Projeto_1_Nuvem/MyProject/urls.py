@@ -16,11 +16,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import include, path
-from django.conf import settings
-from django.conf.urls.static import static
+from monitoring.views import metrics_view
+from users.views import media
 
 urlpatterns = [
     path('', include("users.urls", namespace='users')),
     path('transactions/', include('transactions.urls', namespace='transactions')),
     path('admin/', admin.site.urls),
-]+ static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('metrics', metrics_view, name='metrics'),
+    # Mídia autorizada pelo Django e entregue pelo nginx (X-Accel-Redirect)
+    path('media/<path:path>', media, name='media'),
+]
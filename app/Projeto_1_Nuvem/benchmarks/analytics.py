@@ -0,0 +1,100 @@
+# benchmarks/analytics.py
+"""
+Benchmark dos insights vetorizados (transactions.analytics).
+
+Mede separadamente as duas fases para cada tamanho de histórico:
+
+- analytics_load: a projeção values_list em blocos até os arrays NumPy;
+- analytics_compute: todos os indicadores sobre os arrays já carregados.
+
+Por padrão usa os usuários da base dos benchmarks (benchmarks.run, populada
+na 1ª vez). Com --synthetic os arrays são gerados em memória, com a mesma
+distribuição de valores e datas, e só o cálculo é medido, sem precisar
+popular a base. O JSON tem o formato do benchmarks.run e pode ser comparado
+com benchmarks.compare.
+
+Uso (a partir de app/Projeto_1_Nuvem):
+
+    python -m benchmarks.analytics --sizes 1000 1000000 --output insights.json
+    python -m benchmarks.analytics --synthetic --sizes 1000000 10000000
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.run import DEFAULT_DB, DEFAULT_SIZES, metadata, setup, summarize
+
+
+def synthetic_series(size, seed=0):
+    """Histórico aleatório de `size` lançamentos nos ~3 anos antes de ANCHOR, como o das factories."""
+    import numpy as np
+
+    from benchmarks.factories import ANCHOR, HISTORY
+    from transactions.analytics import Series
+
+    rng = np.random.default_rng(seed)
+    end = int(ANCHOR.timestamp())
+    timestamps = np.sort(rng.integers(end - int(HISTORY.total_seconds()), end, size, dtype=np.int64))
+    cents = rng.integers(-50000, 50000, size, dtype=np.int64)
+    return Series(np.arange(1, size + 1, dtype=np.int64), timestamps, cents)
+
+
+def timed(function, iterations, warmup):
+    timings = []
+    for i in range(warmup + iterations):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+    return result, summarize(timings)
+
+
+def record(results, size, scenario, result):
+    results.append({'dataset': size, 'scenario': scenario, **result, 'queries': 0, 'queries_min': 0})
+    print(f"  {scenario:<18} p50 {result['p50_ms']:>9.2f}ms  p99 {result['p99_ms']:>9.2f}ms", file=sys.stderr)
+
+
+def run(sizes, iterations, warmup, db_path, synthetic=False):
+    from benchmarks.run import ensure_dataset
+    from transactions import analytics
+
+    results = []
+    for size in sizes:
+        print(f'Dataset {size}:', file=sys.stderr)
+        if synthetic:
+            series = synthetic_series(size)
+        else:
+            user = ensure_dataset(size)
+            series, result = timed(lambda: analytics.load(user), iterations, warmup)
+            record(results, size, 'analytics_load', result)
+        _, result = timed(lambda: analytics.compute(series), iterations, warmup)
+        record(results, size, 'analytics_compute', result)
+    return {'meta': metadata(db_path), 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Números de lançamentos por usuário (padrão: 1000 100000 1000000).')
+    parser.add_argument('--iterations', type=int, default=10, help='Execuções medidas por fase.')
+    parser.add_argument('--warmup', type=int, default=1, help='Execuções descartadas antes da medição.')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='Gera os arrays em memória e mede só o cálculo, sem popular a base.')
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB, help='Arquivo SQLite dos benchmarks.')
+    parser.add_argument('--output', type=Path, help='Grava o JSON aqui em vez de imprimir na saída padrão.')
+    args = parser.parse_args(argv)
+
+    setup(args.db)
+    report = run(args.sizes, args.iterations, args.warmup, args.db, args.synthetic)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload + '\n')
+    else:
+        print(payload)
+
+
+if __name__ == '__main__':
+    main()
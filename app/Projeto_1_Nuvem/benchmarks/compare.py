@@ -0,0 +1,55 @@
+# benchmarks/compare.py
+"""
+Compara dois resultados de benchmarks.run e falha em caso de regressão.
+
+Uma regressão é um cenário que passou a fazer mais consultas SQL, ou cujo
+percentil escolhido piorou mais que --threshold (fração) e mais que
+--min-delta milissegundos, para ruído em cenários rápidos não contar.
+
+    python -m benchmarks.compare base.json atual.json --threshold 0.25
+"""
+import argparse
+import json
+import sys
+
+
+def _index(report):
+    return {(row['dataset'], row['scenario']): row for row in report['results']}
+
+
+def compare(baseline, current, metric='p95_ms', threshold=0.25, min_delta=1.0):
+    """Retorna a lista de (dataset, cenário, motivo) das regressões."""
+    before = _index(baseline)
+    regressions = []
+    for key, row in sorted(_index(current).items()):
+        base = before.get(key)
+        if base is None:
+            continue
+        if row['queries'] > base['queries']:
+            regressions.append((*key, f"consultas {base['queries']} -> {row['queries']}"))
+        delta = row[metric] - base[metric]
+        if delta > min_delta and row[metric] > base[metric] * (1 + threshold):
+            regressions.append((*key, f'{metric} {base[metric]:.2f} -> {row[metric]:.2f}'))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline', type=argparse.FileType())
+    parser.add_argument('current', type=argparse.FileType())
+    parser.add_argument('--metric', default='p95_ms')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--min-delta', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    regressions = compare(json.load(args.baseline), json.load(args.current),
+                          args.metric, args.threshold, args.min_delta)
+    for dataset, scenario, reason in regressions:
+        print(f'REGRESSÃO {dataset} {scenario}: {reason}')
+    if regressions:
+        sys.exit(1)
+    print('Nenhuma regressão.')
+
+
+if __name__ == '__main__':
+    main()
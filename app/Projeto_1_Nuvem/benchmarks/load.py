@@ -0,0 +1,343 @@
+# benchmarks/load.py
+"""
+Carga HTTP contra o servidor de verdade: gunicorn (WSGI) x uvicorn (ASGI).
+
+Sobe cada servidor com o mesmo número de workers sobre a base SQLite dos
+benchmarks, faz login com o usuário do dataset e dispara `--concurrency`
+conexões simultâneas contra as páginas de --pages (home e lista) durante
+`--duration` segundos. Para cada modo/página registra requisições por
+segundo, p50/p99 e a memória (RSS somada do master e dos workers, amostrada
+durante a carga), para comparar os dois modos com o mesmo orçamento de memória.
+Os dois modos sobem com o mesmo DB_CONN_MAX_AGE (--conn-max-age, padrão 60),
+registrado em cada resultado: o padrão do settings muda com o modo (0 no
+ASGI), e a comparação mediria também a reutilização de conexões. Com mais de
+um valor, cada modo roda uma vez com cada um: é a comparação de conexão nova
+por requisição x persistente, que só aparece com o servidor de verdade.
+
+Uso (a partir de app/Projeto_1_Nuvem, com gunicorn e uvicorn instalados):
+
+    python -m benchmarks.load --size 1000 --workers 2 --output carga.json
+    python -m benchmarks.load --modes asgi --concurrency 64 --duration 30
+
+    # Conexão nova por requisição x persistente, contra o MySQL do .env numa
+    # base só dos benchmarks (CREATE DATABASE coinflip_bench)
+    python -m benchmarks.load --mysql coinflip_bench --modes wsgi --conn-max-age 0 60 --output conexoes.json
+
+Com --url a carga vai para um servidor já rodando, por exemplo o nginx do
+docker-compose, para medir o micro-cache, a compressão e o pool de conexões
+com o app. Cada página anônima (candidata ao micro-cache) é medida duas
+vezes: como o navegador a pede e, como `<página>_uncached`, com uma query
+string diferente a cada requisição, que nunca acerta o cache e sempre chega
+ao Django; a diferença entre as duas é o ganho do micro-cache. Cada
+resultado traz a fração de respostas com X-Cache-Status HIT. Só as páginas
+com login precisam de --username/--password, de uma conta que exista no
+banco do servidor:
+
+    python -m benchmarks.load --url http://localhost:8080 --pages login reset_complete --output nginx.json
+    python -m benchmarks.load --url http://localhost:8080 --pages home --username ana --password ...
+
+Os servidores iniciados aqui usam os mesmos workers do docker-compose
+(gunicorn gthread e uvicorn, ambos com keep-alive).
+"""
+import argparse
+import asyncio
+import http.cookiejar
+import itertools
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+from benchmarks.run import DEFAULT_DB, PERCENTILES, metadata, percentile, setup
+
+HOST = '127.0.0.1'
+PATHS = {
+    'home': '/home/',
+    'list': '/transactions/',
+    'avatar': '/media/default.jpg',
+    'reset_complete': '/password-reset-complete/',
+    'login': '/',
+}
+# Páginas medidas sem login (candidatas ao micro-cache do nginx)
+ANONYMOUS = {'reset_complete', 'login'}
+COMMANDS = {
+    'wsgi': ['gunicorn', '--workers', '{workers}', '--worker-class', 'gthread', '--threads', '1',
+             '--keep-alive', '75', '--bind', '{host}:{port}', 'MyProject.wsgi:application'],
+    'asgi': ['uvicorn', 'MyProject.asgi:application', '--workers', '{workers}', '--host', '{host}', '--port', '{port}',
+             '--timeout-keep-alive', '75', '--no-access-log'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, workers, port, conn_max_age):
+    command = [part.format(workers=workers, host=HOST, port=port) for part in COMMANDS[mode]]
+    env = dict(os.environ, SERVER_MODE=mode, DB_CONN_MAX_AGE=conn_max_age,
+               METRICS_ENABLED='False', PROFILING_ENABLED='False')
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'{mode}: o servidor saiu\n{server.stderr.read().decode()}')
+        try:
+            urllib.request.urlopen(f'http://{HOST}:{port}/', timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'{mode}: o servidor não respondeu em 30s')
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def login(base, username, password):
+    """Faz login pelo formulário e retorna o header Cookie da sessão."""
+    jar = http.cookiejar.CookieJar()
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+    # A página de login sai sem token (micro-cache); ele vem da view csrf, como no navegador
+    token = json.load(opener.open(urllib.parse.urljoin(base, 'csrf/')))['token']
+    opener.open(base, urllib.parse.urlencode({
+        'csrfmiddlewaretoken': token, 'username': username, 'password': password, 'submit_login': '1',
+    }).encode()).close()
+    cookies = {cookie.name: cookie.value for cookie in jar}
+    if 'sessionid' not in cookies:
+        raise RuntimeError('login falhou: sem cookie de sessão')
+    return '; '.join(f'{name}={value}' for name, value in cookies.items())
+
+
+def process_tree_rss(pid):
+    """RSS (bytes) do processo e de todos os descendentes, lida de /proc."""
+    children = {}
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        parent = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(parent, []).append(int(entry.name))
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, ()))
+        try:
+            status = Path(f'/proc/{current}/status').read_text()
+        except OSError:
+            continue
+        match = re.search(r'^VmRSS:\s+(\d+) kB', status, re.MULTILINE)
+        total += int(match.group(1)) * 1024 if match else 0
+    return total
+
+
+async def fetch(target, path, cookie, connection):
+    """Um GET HTTP/1.1; reaproveita a conexão enquanto o servidor mantiver keep-alive."""
+    host, port = target
+    if connection is None:
+        connection = await asyncio.open_connection(host, port)
+    reader, writer = connection
+    headers = f'Host: {host}\r\nAccept-Encoding: gzip, br\r\n'
+    if cookie:
+        headers += f'Cookie: {cookie}\r\n'
+    writer.write(f'GET {path} HTTP/1.1\r\n{headers}\r\n'.encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status_line, *header_lines = head.decode('latin-1').split('\r\n')
+    headers = dict(line.split(': ', 1) for line in header_lines if ': ' in line)
+    headers = {name.lower(): value for name, value in headers.items()}
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    if headers.get('connection', '').lower() == 'close':
+        writer.close()
+        connection = None
+    return int(status_line.split()[1]), headers.get('x-cache-status'), connection
+
+
+async def load(target, path, cookie, concurrency, duration, uncached=False):
+    timings, cache_statuses, errors = [], [], 0
+    deadline = time.perf_counter() + duration
+    counter = itertools.count()
+
+    async def client():
+        nonlocal errors
+        connection = None
+        while time.perf_counter() < deadline:
+            # Uma chave de cache nova por requisição: o micro-cache nunca responde
+            url = f'{path}?nocache={next(counter)}' if uncached else path
+            started = time.perf_counter()
+            try:
+                status, cache_status, connection = await fetch(target, url, cookie, connection)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                errors += 1
+                connection = None
+                continue
+            if status != 200:
+                errors += 1
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+            cache_statuses.append(cache_status)
+        if connection:
+            connection[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return timings, cache_statuses, errors, time.perf_counter() - started
+
+
+async def measure(server, target, path, cookie, concurrency, duration, warmup, uncached=False):
+    await load(target, path, cookie, concurrency, warmup, uncached)
+    samples = []
+
+    async def sample_memory():
+        while server:
+            samples.append(process_tree_rss(server.pid))
+            await asyncio.sleep(0.5)
+
+    sampler = asyncio.create_task(sample_memory())
+    try:
+        timings, cache_statuses, errors, elapsed = await load(target, path, cookie, concurrency, duration, uncached)
+    finally:
+        sampler.cancel()
+    if not timings:
+        raise RuntimeError(f'{path}: nenhuma requisição com sucesso ({errors} erros)')
+    result = {f'p{p}_ms': round(percentile(sorted(timings), p), 3) for p in PERCENTILES}
+    result.update({
+        'requests_per_second': round(len(timings) / elapsed, 1),
+        'requests': len(timings),
+        'errors': errors,
+    })
+    if any(cache_statuses):
+        result['cache_hit_ratio'] = round(cache_statuses.count('HIT') / len(cache_statuses), 3)
+    if samples:
+        result['rss_max_mb'] = round(max(samples) / 2 ** 20, 1)
+        result['rss_mean_mb'] = round(sum(samples) / len(samples) / 2 ** 20, 1)
+    return result
+
+
+def run_against(mode, target, server, credentials, pages, size, workers, concurrency, duration, warmup,
+                conn_max_age=None, uncached=False):
+    """
+    Mede cada página de `pages` no servidor `target`. O login (com `credentials`)
+    só é feito se alguma página precisar dele. Com `uncached`, as páginas anônimas
+    também são medidas sem o micro-cache, como `<página>_uncached`.
+    """
+    cookie = None
+    if set(pages) - ANONYMOUS:
+        cookie = login(f'http://{target[0]}:{target[1]}/', *credentials)
+    runs = []
+    for page in pages:
+        runs.append((page, page, False))
+        if uncached and page in ANONYMOUS:
+            runs.append((f'{page}_uncached', page, True))
+    results = []
+    for scenario, page, bypass in runs:
+        page_cookie = None if page in ANONYMOUS else cookie
+        result = asyncio.run(
+            measure(server, target, PATHS[page], page_cookie, concurrency, duration, warmup, bypass),
+        )
+        results.append({'mode': mode, 'scenario': scenario, 'dataset': size, 'workers': workers,
+                        'concurrency': concurrency, 'conn_max_age': conn_max_age, **result})
+        memory = f"  RSS {result['rss_max_mb']:>6.1f}MB" if 'rss_max_mb' in result else ''
+        label = mode if conn_max_age is None else f'{mode} (conn_max_age {conn_max_age})'
+        print(
+            f"  {label} {scenario:<23} {result['requests_per_second']:>8.1f} req/s  p50 {result['p50_ms']:>8.2f}ms  "
+            f"p99 {result['p99_ms']:>8.2f}ms{memory}  {result['errors']} erros",
+            file=sys.stderr,
+        )
+    return results
+
+
+def run(modes, pages, size, workers, concurrency, duration, warmup, db_path, url=None, conn_max_ages=('60',),
+        credentials=None):
+    from django.db import connections
+
+    from benchmarks.factories import PASSWORD
+    from benchmarks.run import ensure_dataset
+
+    if url:
+        # O dataset local não existe no servidor: as páginas com login usam `credentials`
+        parts = urllib.parse.urlsplit(url)
+        target = (parts.hostname, parts.port or 80)
+        results = run_against(
+            'external', target, None, credentials, pages, None, None, concurrency, duration, warmup, uncached=True,
+        )
+        return {'meta': metadata(db_path), 'results': results}
+
+    user = ensure_dataset(size)
+    connections.close_all()
+    credentials = (user.username, PASSWORD)
+    results = []
+    for conn_max_age in conn_max_ages:
+        for mode in modes:
+            port = free_port()
+            server = start_server(mode, workers, port, conn_max_age)
+            try:
+                results += run_against(
+                    mode, (HOST, port), server, credentials, pages, size, workers, concurrency, duration, warmup,
+                    conn_max_age,
+                )
+            finally:
+                stop_server(server)
+    return {'meta': metadata(db_path), 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=sorted(COMMANDS), default=['wsgi', 'asgi'])
+    parser.add_argument('--pages', nargs='+', choices=sorted(PATHS), default=['home', 'list'])
+    parser.add_argument('--size', type=int, default=1000, help='Lançamentos do usuário do teste.')
+    parser.add_argument('--workers', type=int, default=2, help='Workers de cada servidor (o mesmo nos dois modos).')
+    parser.add_argument('--concurrency', type=int, default=32, help='Conexões simultâneas.')
+    parser.add_argument('--duration', type=float, default=15, help='Segundos de carga medida por página.')
+    parser.add_argument('--warmup', type=float, default=2, help='Segundos de carga descartada antes da medição.')
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB, help='Arquivo SQLite dos benchmarks.')
+    parser.add_argument('--conn-max-age', nargs='+', default=['60'],
+                        help='DB_CONN_MAX_AGE dos servidores, o mesmo nos dois modos; com vários valores, '
+                             'uma rodada por valor (padrão: 60).')
+    parser.add_argument('--mysql', metavar='BASE',
+                        help='Usa o MySQL do .env (DB_HOST, DB_USER...) com esta base, que não pode ser o DB_NAME.')
+    parser.add_argument('--url', help='Mede um servidor já rodando (ex.: o nginx em http://localhost:8080).')
+    parser.add_argument('--username', help='Com --url: conta do servidor para as páginas com login.')
+    parser.add_argument('--password', help='Com --url: senha de --username.')
+    parser.add_argument('--output', type=Path, help='Grava o JSON aqui em vez de imprimir na saída padrão.')
+    args = parser.parse_args(argv)
+    if args.url and set(args.pages) - ANONYMOUS and not (args.username and args.password):
+        parser.error('com --url, as páginas com login precisam de --username e --password')
+
+    setup(args.db, args.mysql)
+    report = run(
+        args.modes, args.pages, args.size, args.workers, args.concurrency, args.duration, args.warmup, args.db,
+        args.url, args.conn_max_age, (args.username, args.password),
+    )
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload + '\n')
+    else:
+        print(payload)
+
+
+if __name__ == '__main__':
+    main()
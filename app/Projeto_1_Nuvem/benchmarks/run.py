@@ -0,0 +1,310 @@
+# benchmarks/run.py
+"""
+Benchmarks de latência e número de consultas SQL das páginas principais.
+
+Roda contra um arquivo SQLite próprio, sem MySQL nem outros serviços. Para
+cada tamanho de histórico é criado um usuário com esse número de
+lançamentos, e cada cenário (login, home, insights, lista, criar/editar/excluir) é
+medido pelo Client de teste do Django: percentis de latência e consultas SQL
+por requisição. O cenário `connect` mede só a abertura de uma conexão nova
+com o banco, o custo que DB_CONN_MAX_AGE tira de cada requisição. O
+resultado é um JSON para comparar versões com benchmarks.compare.
+
+O Client de teste não dispara o close_old_connections do fim da requisição,
+então o DB_CONN_MAX_AGE não faz diferença aqui: a comparação de conexão nova
+x persistente roda contra o servidor de verdade, em benchmarks.load.
+
+Uso (a partir de app/Projeto_1_Nuvem):
+
+    python -m benchmarks.run                              # 1k, 100k e 1M lançamentos
+    python -m benchmarks.run --sizes 1000 --iterations 20 --output atual.json
+    python -m benchmarks.compare base.json atual.json
+
+    # Contra o MySQL do .env (DB_HOST, DB_USER...), numa base própria já
+    # criada (CREATE DATABASE coinflip_bench), nunca a base da aplicação
+    python -m benchmarks.run --mysql coinflip_bench --sizes 1000 --output mysql.json
+
+A base populada é reaproveitada entre execuções (--reseed recria); popular
+1M de lançamentos leva alguns minutos.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DEFAULT_DB = BASE_DIR / 'benchmark.sqlite3'
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def setup(db_path, mysql=None):
+    """
+    Configura o Django para a base dos benchmarks e aplica as migrações. Com
+    `mysql` (nome da base), usa o MySQL do .env com essa base no lugar de DB_NAME.
+    """
+    if mysql:
+        from dotenv import load_dotenv
+
+        # O mesmo .env que o settings lê; o DB_NAME definido aqui tem precedência
+        load_dotenv()
+        if mysql == os.getenv('DB_NAME'):
+            raise SystemExit(f'--mysql {mysql} é a base da aplicação (DB_NAME); use uma base só dos benchmarks.')
+        os.environ['DB_NAME'] = mysql
+        # As réplicas não têm a base dos benchmarks
+        os.environ['DB_REPLICAS'] = ''
+    else:
+        os.environ['DB_ENGINE'] = 'sqlite'
+        os.environ['SQLITE_PATH'] = str(db_path)
+    # Profile.save() abre o avatar padrão, que precisa existir no MEDIA_ROOT
+    media_root = Path(db_path).parent / 'media'
+    media_root.mkdir(parents=True, exist_ok=True)
+    if not (media_root / 'default.jpg').exists():
+        shutil.copy(BASE_DIR.parent / 'default.jpg', media_root / 'default.jpg')
+    os.environ['MEDIA_ROOT'] = str(media_root)
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'MyProject.settings')
+
+    import django
+    from django.core.management import call_command
+    from django.test.utils import setup_test_environment
+
+    django.setup()
+    # Libera o host 'testserver' do Client e troca o backend de e-mail
+    setup_test_environment()
+    call_command('migrate', verbosity=0)
+
+
+class Scenario:
+    """Uma requisição medida; `prepare` roda antes de cada iteração, fora do tempo."""
+
+    def __init__(self, name, request, expect=200, prepare=None, teardown=None):
+        self.name = name
+        self.request = request
+        self.expect = expect
+        self.prepare = prepare
+        self.teardown = teardown
+
+
+def build_scenarios(user):
+    from django.test import Client
+    from django.urls import reverse
+
+    from benchmarks.factories import PASSWORD
+    from transactions import bulk, ledger
+    from transactions.models import Transaction
+    from transactions.pagination import NEXT, ORDERING, encode_cursor
+
+    home = reverse('users:home')
+    list_url = reverse('transactions:list')
+    insights = reverse('transactions:insights')
+
+    # Cursor para o meio do histórico: a página "funda" custa o mesmo que a primeira?
+    rows = Transaction.objects.filter(user=user).order_by(*ORDERING).values_list('created_at', 'pk')
+    count = rows.count()
+    deep_cursor = encode_cursor(NEXT, *rows[count // 2]) if count else ''
+
+    target = Transaction.objects.filter(user=user).order_by('pk').first()
+    values = iter(range(10 ** 9))
+    pending = []
+
+    def login(_client):
+        return Client().post(reverse('users:login'), {
+            'username': user.username, 'password': PASSWORD, 'submit_login': '1',
+        })
+
+    def create_for_delete():
+        pending.append(Transaction.objects.create(user=user, name='benchmark-delete', value=-1).pk)
+
+    def delete(client):
+        return client.post(reverse('transactions:delete', args=[pending.pop()]))
+
+    def cleanup_created():
+        bulk.delete(bulk.select(user, name='benchmark-create'))
+
+    return [
+        Scenario('login', login, expect=302),
+        Scenario('home_cold', lambda c: c.get(home), prepare=lambda: ledger.bump_version(user.pk)),
+        Scenario('home_warm', lambda c: c.get(home)),
+        Scenario('insights_cold', lambda c: c.get(insights), prepare=lambda: ledger.bump_version(user.pk)),
+        Scenario('insights_warm', lambda c: c.get(insights)),
+        Scenario('list_first_page', lambda c: c.get(list_url)),
+        Scenario('list_deep_page', lambda c: c.get(list_url, {'cursor': deep_cursor})),
+        Scenario(
+            'create',
+            lambda c: c.post(reverse('transactions:create'), {
+                'name': 'benchmark-create', 'value': '-10.00', 'description': '',
+            }),
+            expect=302, teardown=cleanup_created,
+        ),
+        Scenario(
+            'update',
+            lambda c: c.post(reverse('transactions:update', args=[target.pk]), {
+                'name': target.name, 'value': f'{next(values) % 100 + 1}.00', 'description': target.description,
+            }),
+            expect=302,
+        ),
+        Scenario('delete', delete, expect=302, prepare=create_for_delete),
+    ]
+
+
+def percentile(samples, p):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[p - 1]
+
+
+def summarize(timings):
+    result = {f'p{p}_ms': round(percentile(timings, p), 3) for p in PERCENTILES}
+    result.update({
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'iterations': len(timings),
+    })
+    return result
+
+
+def measure_connect(iterations, warmup):
+    """Tempo de abrir uma conexão nova (TCP + autenticação + setup da sessão no banco)."""
+    from django.db import connection
+
+    timings = []
+    for i in range(warmup + iterations):
+        connection.close()
+        started = time.perf_counter()
+        connection.ensure_connection()
+        elapsed = time.perf_counter() - started
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+    return {**summarize(timings), 'queries': 0, 'queries_min': 0}
+
+
+def measure(scenario, client, iterations, warmup):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings, queries = [], []
+    for i in range(warmup + iterations):
+        if scenario.prepare:
+            scenario.prepare()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = scenario.request(client)
+            elapsed = time.perf_counter() - started
+        if response.status_code != scenario.expect:
+            raise RuntimeError(f'{scenario.name}: status {response.status_code}, esperado {scenario.expect}')
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(len(captured))
+    if scenario.teardown:
+        scenario.teardown()
+
+    return {**summarize(timings), 'queries': max(queries), 'queries_min': min(queries)}
+
+
+def ensure_dataset(size, reseed=False):
+    from django.contrib.auth.models import User
+
+    from benchmarks.factories import seed_user
+    from transactions.models import Transaction
+
+    username = f'bench-{size}'
+    user = User.objects.filter(username=username).first()
+    if user and not reseed and Transaction.objects.filter(user=user).count() == size:
+        return user
+
+    started = time.perf_counter()
+
+    def progress(name, done, total):
+        print(f'\r  {name}: {done}/{total} lançamentos', end='', file=sys.stderr, flush=True)
+
+    user = seed_user(username, size, progress=progress)
+    print(f' ({time.perf_counter() - started:.0f}s)', file=sys.stderr)
+    return user
+
+
+def metadata(db_path):
+    import django
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=BASE_DIR, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': f"{connection.vendor} {'.'.join(map(str, connection.get_database_version()))}",
+        'database_path': str(db_path) if connection.vendor == 'sqlite' else connection.settings_dict['HOST'],
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'platform': platform.platform(),
+    }
+
+
+def run(sizes, iterations, warmup, db_path, reseed=False, only=None):
+    from django.core.cache import cache
+    from django.test import Client
+
+    from benchmarks.factories import PASSWORD
+
+    results = []
+    if not only or 'connect' in only:
+        result = measure_connect(iterations, warmup)
+        results.append({'dataset': 0, 'scenario': 'connect', **result})
+        print(f"  {'connect':<16} p50 {result['p50_ms']:>8.2f}ms  p99 {result['p99_ms']:>8.2f}ms", file=sys.stderr)
+    for size in sizes:
+        print(f'Dataset {size}:', file=sys.stderr)
+        user = ensure_dataset(size, reseed)
+        cache.clear()
+        client = Client()
+        client.login(username=user.username, password=PASSWORD)
+        for scenario in build_scenarios(user):
+            if only and scenario.name not in only:
+                continue
+            result = measure(scenario, client, iterations, warmup)
+            results.append({'dataset': size, 'scenario': scenario.name, **result})
+            print(
+                f"  {scenario.name:<16} p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+                f"p99 {result['p99_ms']:>8.2f}ms  {result['queries']:>3} queries",
+                file=sys.stderr,
+            )
+    return {'meta': metadata(db_path), 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Números de lançamentos por usuário (padrão: 1000 100000 1000000).')
+    parser.add_argument('--iterations', type=int, default=50, help='Requisições medidas por cenário.')
+    parser.add_argument('--warmup', type=int, default=5, help='Requisições descartadas antes da medição.')
+    parser.add_argument('--scenario', action='append', dest='only', help='Roda só os cenários informados.')
+    parser.add_argument('--db', type=Path, default=DEFAULT_DB, help='Arquivo SQLite dos benchmarks.')
+    parser.add_argument('--mysql', metavar='BASE',
+                        help='Usa o MySQL do .env (DB_HOST, DB_USER...) com esta base, que não pode ser o DB_NAME.')
+    parser.add_argument('--reseed', action='store_true', help='Recria os lançamentos mesmo se a base já existir.')
+    parser.add_argument('--output', type=Path, help='Grava o JSON aqui em vez de imprimir na saída padrão.')
+    args = parser.parse_args(argv)
+
+    setup(args.db, args.mysql)
+    report = run(args.sizes, args.iterations, args.warmup, args.db, args.reseed, args.only)
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(payload + '\n')
+    else:
+        print(payload)
+
+
+if __name__ == '__main__':
+    main()
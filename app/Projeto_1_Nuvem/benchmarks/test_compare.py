@@ -0,0 +1,35 @@
+"""
+Unit tests para benchmarks.compare
+"""
+from django.test import SimpleTestCase
+
+from benchmarks.compare import compare
+
+
+def report(**rows):
+    return {'results': [
+        {'dataset': 1000, 'scenario': name, 'p95_ms': p95, 'queries': queries}
+        for name, (p95, queries) in rows.items()
+    ]}
+
+
+class CompareTestCase(SimpleTestCase):
+    """Tests para a detecção de regressões"""
+
+    def test_no_regression_within_threshold(self):
+        """Testa se variações pequenas não contam como regressão"""
+        self.assertEqual(compare(report(home=(10.0, 3)), report(home=(12.0, 3))), [])
+
+    def test_slower_scenario_is_regression(self):
+        """Testa se piora acima do limite é reportada"""
+        regressions = compare(report(home=(10.0, 3)), report(home=(20.0, 3)))
+
+        self.assertEqual([(dataset, scenario) for dataset, scenario, _ in regressions], [(1000, 'home')])
+
+    def test_extra_queries_is_regression(self):
+        """Testa se consultas SQL a mais são reportadas mesmo sem piora de tempo"""
+        self.assertEqual(len(compare(report(home=(10.0, 3)), report(home=(10.0, 4)))), 1)
+
+    def test_noise_on_fast_scenarios_is_ignored(self):
+        """Testa se diferenças menores que min_delta são ignoradas"""
+        self.assertEqual(compare(report(home=(0.5, 3)), report(home=(1.2, 3))), [])
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        from . import profiling
+        profiling.instrument_templates()
+        connection_created.connect(profiling.install_query_wrapper)
+        for connection in connections.all(initialized_only=True):
+            profiling.install_query_wrapper(None, connection)
@@ -0,0 +1,249 @@
+# monitoring/metrics.py
+"""
+Contadores e histogramas de requisições, exportados no formato texto do Prometheus.
+
+Cada processo acumula as métricas em memória. Com METRICS_DIR definido, o
+processo grava periodicamente (METRICS_FLUSH_INTERVAL) um snapshot JSON no
+seu próprio arquivo dentro do diretório, e o endpoint soma os arquivos de
+todos os workers do gunicorn. Quando um worker começa, os arquivos de workers
+que já morreram são somados a DEAD_FILE e apagados (como o mark_process_dead
+do prometheus_client): os contadores não voltam atrás quando um worker é
+reciclado e o número de arquivos lidos por coleta não cresce sem limite.
+Sem METRICS_DIR as métricas são só do processo atual (desenvolvimento/testes).
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+REQUESTS = 'coinflip_http_requests_total'
+DURATION = 'coinflip_http_request_duration_seconds'
+QUERIES = 'coinflip_http_request_queries'
+
+# Soma das métricas de todos os workers mortos, dentro de METRICS_DIR
+DEAD_FILE = 'dead.json'
+
+# nome: (tipo, ajuda, buckets)
+METRICS = {
+    REQUESTS: ('counter', 'Requisições HTTP por view, método e status.', None),
+    DURATION: ('histogram', 'Latência das requisições por view, em segundos.', DURATION_BUCKETS),
+    QUERIES: ('histogram', 'Consultas SQL por requisição, por view.', QUERY_BUCKETS),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, extra=()):
+    pairs = tuple(labels) + tuple(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _add(counters, histograms, snapshot):
+    """Soma um snapshot aos dicionários {(nome, labels): ...} de contadores e histogramas."""
+    for name, labels, value in snapshot['counters']:
+        key = (name, tuple(tuple(pair) for pair in labels))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, counts, total in snapshot['histograms']:
+        key = (name, tuple(tuple(pair) for pair in labels))
+        merged, merged_total = histograms.get(key) or ([0] * len(counts), 0)
+        histograms[key] = ([a + b for a, b in zip(merged, counts)], merged_total + total)
+
+
+def _alive(path):
+    """True se o processo dono do arquivo ({pid}-{início}.json) ainda existe."""
+    try:
+        os.kill(int(path.name.split('-', 1)[0]), 0)
+    except ValueError:
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    """Métricas de um processo, com persistência opcional para agregação entre workers."""
+
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.last_flush = 0.0
+        self.pid = None
+        self.path = None
+        self.clear()
+
+    def _own_path(self):
+        # Definido no próprio worker (depois do fork, mesmo com --preload); pid +
+        # instante de início para um pid reaproveitado não sobrescrever o arquivo antigo
+        if self.directory and self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.path = self.directory / f'{self.pid}-{time.time_ns()}.json'
+            self.compact()
+        return self.path
+
+    def _read(self, path):
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            # Arquivo sendo trocado ou corrompido: fica para a próxima coleta
+            return None
+
+    def compact(self):
+        """Soma os arquivos de processos mortos a DEAD_FILE e os apaga."""
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / '.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            dead_path = self.directory / DEAD_FILE
+            dead = self._read(dead_path) or {'counters': [], 'histograms': [], 'merged': []}
+            # Sobras de uma compactação interrompida: já estão somadas em DEAD_FILE
+            for name in dead['merged']:
+                (self.directory / name).unlink(missing_ok=True)
+            counters, histograms = {}, {}
+            _add(counters, histograms, dead)
+            merged = []
+            for path in self.directory.glob('*.json'):
+                if path.name == DEAD_FILE or _alive(path):
+                    continue
+                snapshot = self._read(path)
+                if snapshot is not None:
+                    _add(counters, histograms, snapshot)
+                    merged.append(path)
+            if not merged:
+                return
+            temporary = dead_path.with_suffix('.tmp')
+            temporary.write_text(json.dumps({
+                'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+                'histograms': [[name, labels, counts, total] for (name, labels), (counts, total) in histograms.items()],
+                'merged': [path.name for path in merged],
+            }))
+            os.replace(temporary, dead_path)
+            for path in merged:
+                path.unlink(missing_ok=True)
+
+    def clear(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        key = (name, tuple(labels))
+        with self.lock:
+            counts, total = self.histograms.get(key) or ([0] * (len(buckets) + 1), 0)
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            counts[index] += 1
+            self.histograms[key] = (counts, total + value)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'histograms': [
+                    [name, labels, list(counts), total] for (name, labels), (counts, total) in self.histograms.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        """Grava o snapshot do processo, no máximo uma vez por flush_interval."""
+        if self._own_path() is None:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_flush < self.flush_interval:
+            return
+        if not self.flush_lock.acquire(blocking=False):
+            return
+        try:
+            self.last_flush = now
+            self.directory.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix('.tmp')
+            temporary.write_text(json.dumps(self.snapshot()))
+            os.replace(temporary, self.path)
+        finally:
+            self.flush_lock.release()
+
+    def _snapshots(self):
+        self._own_path()
+        yield self.snapshot()
+        if self.directory is None or not self.directory.exists():
+            return
+        dead = self._read(self.directory / DEAD_FILE)
+        # Arquivos já somados em DEAD_FILE, mas ainda não apagados, não contam de novo
+        skip = {self.path, self.directory / DEAD_FILE}
+        if dead is not None:
+            skip.update(self.directory / name for name in dead['merged'])
+            yield dead
+        for path in self.directory.glob('*.json'):
+            if path in skip:
+                continue
+            snapshot = self._read(path)
+            if snapshot is not None:
+                yield snapshot
+
+    def collect(self):
+        """Soma as métricas de todos os processos: (contadores, histogramas)."""
+        counters, histograms = {}, {}
+        for snapshot in self._snapshots():
+            _add(counters, histograms, snapshot)
+        return counters, histograms
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            for (metric, labels), (counts, total) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), counts):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _number(bound)
+                    lines.append(f'{name}_bucket{_labels(labels, [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(labels)} {_number(total)}')
+                lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry(getattr(settings, 'METRICS_DIR', None), getattr(settings, 'METRICS_FLUSH_INTERVAL', 5.0))
+atexit.register(registry.flush, force=True)
+
+
+def record(view, method, status, duration, queries):
+    labels = (('view', view),)
+    registry.inc(REQUESTS, labels + (('method', method), ('status', str(status))))
+    registry.observe(DURATION, labels, duration)
+    registry.observe(QUERIES, labels, queries)
+    registry.flush()
@@ -0,0 +1,179 @@
+# monitoring/middleware.py
+"""
+Middlewares de observabilidade: métricas (MetricsMiddleware) e profiling.
+
+O ProfilingMiddleware é opcional (PROFILING_ENABLED=True).
+
+Cada resposta recebe um cabeçalho Server-Timing (db, tpl, view, total) e uma
+linha de log JSON no logger "monitoring.profiling". Uma fração das
+requisições (PROFILING_SAMPLE_RATE) roda sob cProfile e, se passar de
+PROFILING_SLOW_MS, o .prof é gravado em PROFILING_DUMP_DIR para abrir com
+pstats/snakeviz.
+
+Sem amostragem, o custo é um execute_wrapper por consulta e alguns
+perf_counter() por requisição, baixo o bastante para produção. Os dois
+middlewares funcionam tanto no WSGI quanto no ASGI (views assíncronas).
+"""
+import cProfile
+import json
+import logging
+import random
+import re
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, profiling
+
+logger = logging.getLogger('monitoring.profiling')
+
+# cProfile não aceita dois profilers ativos ao mesmo tempo no processo
+_profiler_lock = threading.Lock()
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def query(self, elapsed):
+        self.count += 1
+
+
+class ObservabilityMiddleware:
+    """Base síncrona e assíncrona: `before()` e `after()` envolvem a requisição no mesmo contexto."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.before(request, asynchronous=False)
+        try:
+            response = self.get_response(request)
+        finally:
+            self.finish(state)
+        return self.after(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.before(request, asynchronous=True)
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.finish(state)
+        return self.after(request, response, state)
+
+    def before(self, request, asynchronous):
+        raise NotImplementedError
+
+    def finish(self, state):
+        pass
+
+    def after(self, request, response, state):
+        return response
+
+
+class MetricsMiddleware(ObservabilityMiddleware):
+    """Conta requisições e observa latência e consultas SQL por nome de URL (monitoring.metrics)."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def before(self, request, asynchronous):
+        counter = QueryCounter()
+        return counter, profiling.observe_queries(counter), time.perf_counter()
+
+    def finish(self, state):
+        profiling.query_observers.reset(state[1])
+
+    def after(self, request, response, state):
+        counter, _, started = state
+        match = request.resolver_match
+        metrics.record(
+            match.view_name if match else '<unresolved>',
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            counter.count,
+        )
+        return response
+
+
+class ProfilingMiddleware(ObservabilityMiddleware):
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.slow = settings.PROFILING_SLOW_MS / 1000
+        self.dump_dir = Path(settings.PROFILING_DUMP_DIR)
+
+    def before(self, request, asynchronous):
+        profile = profiling.RequestProfile()
+        tokens = profiling.current.set(profile), profiling.observe_queries(profile)
+        # No modo assíncrono o cProfile veria as outras requisições do event loop
+        profiler = None if asynchronous else self._start_profiler()
+        return profile, tokens, profiler
+
+    def finish(self, state):
+        profile, (current_token, observers_token), profiler = state
+        if profile.view_started is not None:
+            # Inclui a renderização de TemplateResponse, feita depois da view
+            profile.view_time = time.perf_counter() - profile.view_started
+        profile.finish()
+        profiling.query_observers.reset(observers_token)
+        profiling.current.reset(current_token)
+        if profiler:
+            profiler.disable()
+            _profiler_lock.release()
+
+    def after(self, request, response, state):
+        profile, _, profiler = state
+        response['Server-Timing'] = profile.server_timing()
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **profile.as_dict(),
+        }))
+        if profiler and profile.total_time >= self.slow:
+            self._dump(profiler, request)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = profiling.current.get()
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+
+    def _start_profiler(self):
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return None
+        if not _profiler_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _dump(self, profiler, request):
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+        path = self.dump_dir / f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-{slug[:80]}.prof'
+        try:
+            self.dump_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(path)
+        except OSError:
+            logger.exception('Não foi possível gravar o profile em %s', path)
+        else:
+            logger.warning('Requisição lenta, profile gravado em %s', path)
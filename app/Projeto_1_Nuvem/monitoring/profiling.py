@@ -0,0 +1,107 @@
+# monitoring/profiling.py
+"""
+Medições de uma requisição: consultas SQL, tempo de banco, de templates e da view.
+
+O RequestProfile da requisição atual fica num ContextVar. As consultas são
+medidas por um execute_wrapper fixo em toda conexão (instalado no
+connection_created), que avisa os observadores registrados no ContextVar
+`query_observers`. Como o contexto acompanha o sync_to_async, as consultas
+do ORM assíncrono, feitas em outra thread, também contam para a requisição.
+
+Os templates são medidos por um wrapper em Template.render que só mede a
+renderização de nível mais alto ({% include %} fica dentro dela). Consultas
+feitas durante a renderização contam tanto em "db" quanto em "tpl".
+"""
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+current = ContextVar('request_profile', default=None)
+query_observers = ContextVar('query_observers', default=())
+
+
+def observe_queries(observer):
+    """Registra `observer.query(duração)` para as consultas do contexto atual; retorna o token."""
+    return query_observers.set(query_observers.get() + (observer,))
+
+
+def record_query(execute, sql, params, many, context):
+    observers = query_observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        for observer in observers:
+            observer.query(elapsed)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    # No início da lista: execute_wrapper() temporários fazem pop() do último
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class RequestProfile:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.view_started = None
+        self.view_time = 0.0
+        self.total_time = 0.0
+
+    def query(self, elapsed):
+        self.db_time += elapsed
+        self.queries += 1
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Valor do cabeçalho Server-Timing (durações em ms)."""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'view;dur={self.view_time * 1000:.1f}',
+            f'total;dur={self.total_time * 1000:.1f}',
+        ])
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'view_ms': round(self.view_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+        }
+
+
+def instrument_templates():
+    """Passa a medir Template.render; sem profile ativo o custo é um ContextVar.get()."""
+    from django.template.base import Template
+
+    if getattr(Template.render, 'profiled', False):
+        return
+    render = Template.render
+
+    @wraps(render)
+    def profiled_render(self, context):
+        profile = current.get()
+        if profile is None or profile.template_depth:
+            return render(self, context)
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.template_time += time.perf_counter() - started
+            profile.template_depth -= 1
+
+    profiled_render.profiled = True
+    Template.render = profiled_render
@@ -0,0 +1,102 @@
+"""
+Unit tests para as métricas Prometheus
+"""
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from monitoring import metrics
+
+
+class MetricsEndpointTestCase(TestCase):
+    """Tests para o endpoint /metrics"""
+
+    def setUp(self):
+        metrics.registry.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+
+    def test_requests_counted_per_view_and_status(self):
+        """Testa se requisições são contadas por nome de URL e status"""
+        self.client.login(username='testuser', password='testpass123')
+        self.client.get(reverse('transactions:list'))
+        self.client.get(reverse('transactions:list'))
+        self.client.get('/nao-existe/')
+
+        body = self.client.get(reverse('metrics')).content.decode()
+
+        self.assertIn(
+            'coinflip_http_requests_total{view="transactions:list",method="GET",status="200"} 2', body
+        )
+        self.assertIn('coinflip_http_requests_total{view="<unresolved>",method="GET",status="404"} 1', body)
+        self.assertIn('coinflip_http_request_duration_seconds_count{view="transactions:list"} 2', body)
+        self.assertIn('coinflip_http_request_queries_bucket{view="transactions:list",le="+Inf"} 2', body)
+
+    def test_content_type(self):
+        """Testa o content type do formato texto do Prometheus"""
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+
+class RegistryTestCase(SimpleTestCase):
+    """Tests para monitoring.metrics.Registry"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Testa se os buckets do histograma são cumulativos"""
+        registry = metrics.Registry()
+        for value in (0, 3, 3, 500):
+            registry.observe(metrics.QUERIES, (('view', 'x'),), value)
+
+        body = registry.render()
+
+        self.assertIn('coinflip_http_request_queries_bucket{view="x",le="0"} 1', body)
+        self.assertIn('coinflip_http_request_queries_bucket{view="x",le="5"} 3', body)
+        self.assertIn('coinflip_http_request_queries_bucket{view="x",le="100"} 3', body)
+        self.assertIn('coinflip_http_request_queries_bucket{view="x",le="+Inf"} 4', body)
+        self.assertIn('coinflip_http_request_queries_sum{view="x"} 506', body)
+
+    def test_workers_are_aggregated_through_directory(self):
+        """Testa se as métricas de vários processos são somadas pelo diretório compartilhado"""
+        labels = (('view', 'users:home'), ('method', 'GET'), ('status', '200'))
+        with tempfile.TemporaryDirectory() as directory:
+            workers = [metrics.Registry(directory), metrics.Registry(directory)]
+            for worker in workers:
+                worker.inc(metrics.REQUESTS, labels, 2)
+                worker.flush(force=True)
+
+            body = metrics.Registry(directory).render()
+
+        self.assertIn('coinflip_http_requests_total{view="users:home",method="GET",status="200"} 4', body)
+
+    def test_dead_workers_are_merged_once(self):
+        """Testa se os arquivos de workers mortos viram um só DEAD_FILE, sem contar duas vezes"""
+        labels = (('view', 'users:home'), ('method', 'GET'), ('status', '200'))
+        dead_pid = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                                  capture_output=True, text=True).stdout.strip()
+        with tempfile.TemporaryDirectory() as directory:
+            for i in range(3):
+                Path(directory, f'{dead_pid}-{i}.json').write_text(json.dumps({
+                    'counters': [[metrics.REQUESTS, labels, 2]], 'histograms': [],
+                }))
+            worker = metrics.Registry(directory)
+            worker.inc(metrics.REQUESTS, labels, 1)
+            worker.flush(force=True)
+
+            self.assertEqual(list(Path(directory).glob(f'{dead_pid}-*')), [])
+            # Um worker novo não soma os mortos de novo
+            body = metrics.Registry(directory).render()
+            self.assertIn('coinflip_http_requests_total{view="users:home",method="GET",status="200"} 7', body)
+
+            # Compactação interrompida antes de apagar: o arquivo listado em DEAD_FILE não conta
+            Path(directory, f'{dead_pid}-0.json').write_text(json.dumps({
+                'counters': [[metrics.REQUESTS, labels, 2]], 'histograms': [],
+            }))
+            self.assertIn('status="200"} 7', metrics.Registry(directory).render())
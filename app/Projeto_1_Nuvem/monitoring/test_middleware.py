@@ -0,0 +1,57 @@
+"""
+Unit tests para o middleware de profiling
+"""
+import json
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0)
+class ProfilingMiddlewareTestCase(TestCase):
+    """Tests para monitoring.middleware.ProfilingMiddleware"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = Client()
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_server_timing_header(self):
+        """Testa se a resposta traz db, tpl, view e total no Server-Timing"""
+        response = self.client.get(reverse('transactions:list'))
+
+        metrics = {part.split(';')[0] for part in response['Server-Timing'].split(', ')}
+        self.assertEqual(metrics, {'db', 'tpl', 'view', 'total'})
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+
+    def test_structured_log_line(self):
+        """Testa se cada requisição gera uma linha de log JSON"""
+        with self.assertLogs('monitoring.profiling', level='INFO') as logs:
+            self.client.get(reverse('transactions:list'))
+
+        entry = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(entry['path'], reverse('transactions:list'))
+        self.assertEqual(entry['status'], 200)
+        self.assertGreater(entry['queries'], 0)
+        self.assertGreater(entry['template_ms'], 0)
+
+    def test_slow_sampled_request_is_dumped(self):
+        """Testa se uma requisição amostrada acima do limite gera um .prof"""
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(PROFILING_SAMPLE_RATE=1, PROFILING_SLOW_MS=0, PROFILING_DUMP_DIR=directory):
+                client = Client()
+                client.login(username='testuser', password='testpass123')
+                with self.assertLogs('monitoring.profiling', level='WARNING'):
+                    client.get(reverse('transactions:list'))
+
+            self.assertEqual(len(list(Path(directory).glob('*.prof'))), 1)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled_by_default(self):
+        """Testa se o middleware fica fora da cadeia quando desligado"""
+        response = Client().get(reverse('users:login'))
+
+        self.assertNotIn('Server-Timing', response)
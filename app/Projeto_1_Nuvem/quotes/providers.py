@@ -0,0 +1,75 @@
+# quotes/providers.py
+"""
+Fontes de cotações. Cada provider recebe a lista de símbolos e devolve
+{símbolo: {'symbol', 'price', 'changesPercentage'}} numa única chamada,
+levantando ProviderError em qualquer falha (timeout, HTTP, resposta inválida).
+
+O provider em uso vem de settings.QUOTES_PROVIDER (caminho da classe).
+"""
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ProviderError(Exception):
+    pass
+
+
+class QuoteProvider:
+
+    # Providers sem rede respondem na hora: o store busca neles dentro da requisição
+    remote = True
+
+    def fetch(self, symbols):
+        raise NotImplementedError
+
+
+class StaticProvider(QuoteProvider):
+    """Valores fixos, sem rede: desenvolvimento e ambientes sem token da API."""
+
+    remote = False
+
+    QUOTES = {
+        'PETR4': (38.50, 1.5),
+        'MGLU3': (12.70, -0.8),
+        'VALE3': (65.20, 2.1),
+    }
+
+    def fetch(self, symbols):
+        return {
+            symbol: {'symbol': symbol, 'price': price, 'changesPercentage': change}
+            for symbol, (price, change) in self.QUOTES.items() if symbol in symbols
+        }
+
+
+class BrapiProvider(QuoteProvider):
+    """API da brapi.dev: todos os símbolos numa requisição (/api/quote/PETR4,VALE3)."""
+
+    def __init__(self, base_url=None, token=None, timeout=None):
+        self.base_url = (base_url or settings.BRAPI_URL).rstrip('/')
+        self.token = settings.BRAPI_TOKEN if token is None else token
+        self.timeout = settings.QUOTES_TIMEOUT if timeout is None else timeout
+        self.session = requests.Session()
+
+    def fetch(self, symbols):
+        params = {'token': self.token} if self.token else {}
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/quote/{','.join(symbols)}", params=params, timeout=self.timeout,
+            )
+            response.raise_for_status()
+            results = response.json()['results']
+            return {
+                row['symbol']: {
+                    'symbol': row['symbol'],
+                    'price': float(row['regularMarketPrice']),
+                    'changesPercentage': float(row['regularMarketChangePercent']),
+                }
+                for row in results
+            }
+        except (requests.RequestException, ValueError, KeyError, TypeError) as error:
+            raise ProviderError(str(error)) from error
+
+
+def get_provider():
+    return import_string(settings.QUOTES_PROVIDER)()
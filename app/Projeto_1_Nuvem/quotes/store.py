@@ -0,0 +1,118 @@
+# quotes/store.py
+"""
+Cotações do dashboard servidas do cache, sem esperar pela rede.
+
+get_quotes() só lê o cache. Cada conjunto de símbolos tem uma entrada
+{'fetched_at', 'quotes'}, compartilhada por todos os workers:
+
+- até QUOTES_TTL segundos ela é servida como está;
+- depois disso continua sendo servida (stale-while-revalidate) enquanto uma
+  thread de fundo busca valores novos numa única requisição ao provider;
+- passados QUOTES_MAX_STALE segundos, ou antes da primeira busca, o
+  dashboard mostra a lista vazia até a atualização terminar. Com um
+  provider sem rede (remote = False, o StaticProvider padrão) a busca
+  nesse caso é feita na hora, e a lista nunca sai vazia.
+
+Uma trava no cache garante uma só atualização por vez entre os workers. O
+disjuntor (circuit breaker) conta falhas seguidas: a partir de
+QUOTES_BREAKER_THRESHOLD o provider não é chamado por
+QUOTES_BREAKER_COOLDOWN segundos, e depois disso uma única tentativa decide
+se ele volta a fechar ou abre de novo.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .providers import ProviderError, get_provider
+
+logger = logging.getLogger(__name__)
+
+BREAKER_KEY = 'quotes:breaker'
+
+
+def _key(symbols):
+    return 'quotes:' + ','.join(symbols)
+
+
+def _lock_key(symbols):
+    return 'quotes:refreshing:' + ','.join(symbols)
+
+
+def normalize(symbols=None):
+    symbols = settings.QUOTES_SYMBOLS if symbols is None else symbols
+    return tuple(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol.strip()))
+
+
+def get_quotes(symbols=None):
+    """Cotações em cache para `symbols` (padrão QUOTES_SYMBOLS), na ordem pedida."""
+    symbols = normalize(symbols)
+    if not symbols:
+        return []
+    entry = cache.get(_key(symbols))
+    age = time.time() - entry['fetched_at'] if entry else None
+    if entry is None or age >= settings.QUOTES_MAX_STALE:
+        provider = get_provider()
+        if not provider.remote:
+            return _store(symbols, provider.fetch(symbols))['quotes']
+    if entry is None or age >= settings.QUOTES_TTL:
+        schedule_refresh(symbols)
+    if entry is None or age >= settings.QUOTES_MAX_STALE:
+        return []
+    return entry['quotes']
+
+
+def schedule_refresh(symbols):
+    # A trava expira sozinha caso o worker morra no meio da atualização
+    if not cache.add(_lock_key(symbols), 1, int(settings.QUOTES_TIMEOUT * 2) + 5):
+        return
+    if settings.QUOTES_REFRESH == 'sync':
+        refresh(symbols)
+        return
+    threading.Thread(target=refresh, args=(symbols,), name='quotes-refresh', daemon=True).start()
+
+
+def refresh(symbols):
+    """Busca `symbols` no provider e grava no cache, respeitando o disjuntor."""
+    try:
+        if breaker_open():
+            return
+        try:
+            quotes = get_provider().fetch(symbols)
+        except ProviderError as error:
+            logger.warning('Falha ao buscar cotações de %s: %s', ','.join(symbols), error)
+            record_failure()
+            return
+        record_success()
+        _store(symbols, quotes)
+    finally:
+        cache.delete(_lock_key(symbols))
+
+
+def _store(symbols, quotes):
+    entry = {
+        'fetched_at': time.time(),
+        'quotes': [quotes[symbol] for symbol in symbols if symbol in quotes],
+    }
+    cache.set(_key(symbols), entry, settings.QUOTES_MAX_STALE)
+    return entry
+
+
+def breaker_open():
+    state = cache.get(BREAKER_KEY)
+    return bool(state) and state['open_until'] > time.time()
+
+
+def record_failure():
+    state = cache.get(BREAKER_KEY) or {'failures': 0, 'open_until': 0}
+    state['failures'] += 1
+    if state['failures'] >= settings.QUOTES_BREAKER_THRESHOLD:
+        state['open_until'] = time.time() + settings.QUOTES_BREAKER_COOLDOWN
+        logger.warning('Disjuntor das cotações aberto por %ss', settings.QUOTES_BREAKER_COOLDOWN)
+    cache.set(BREAKER_KEY, state, None)
+
+
+def record_success():
+    cache.delete(BREAKER_KEY)
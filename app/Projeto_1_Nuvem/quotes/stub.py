@@ -0,0 +1,113 @@
+# quotes/stub.py
+"""
+Servidor local que imita a API de cotações da brapi.dev, para testes e
+desenvolvimento sem rede:
+
+    python -m quotes.stub --port 8001
+    BRAPI_URL=http://127.0.0.1:8001 QUOTES_PROVIDER=brapi python manage.py runserver
+
+Nos testes, StubServer sobe numa porta livre e permite simular atraso
+(`delay`) e erro HTTP (`status`), além de registrar cada requisição recebida.
+"""
+import argparse
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+PREFIX = '/api/quote/'
+
+
+def fake_quote(symbol, tick=0):
+    """Cotação determinística por símbolo; `tick` muda o preço entre atualizações."""
+    seed = zlib.crc32(symbol.encode())
+    return {
+        'symbol': symbol,
+        'regularMarketPrice': round(10 + seed % 9000 / 100 + tick, 2),
+        'regularMarketChangePercent': round((seed % 800 - 400) / 100, 2),
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente desistiu no meio da resposta (timeout dos testes): nada a registrar
+            pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        path = urlsplit(self.path).path
+        stub.requests.append(path)
+        if stub.delay:
+            time.sleep(stub.delay)
+        if not path.startswith(PREFIX) or stub.status != 200:
+            self.send_response(404 if stub.status == 200 else stub.status)
+            self.end_headers()
+            return
+        symbols = [symbol for symbol in unquote(path[len(PREFIX):]).split(',') if symbol]
+        body = json.dumps({'results': [fake_quote(symbol, stub.tick) for symbol in symbols]}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """Servidor da brapi falso numa thread; use como context manager."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.delay = 0
+        self.status = 200
+        self.tick = 0
+        self.requests = []
+        self.server = ThreadingHTTPServer((host, port), StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='quotes-stub', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0, help='Atraso (s) de cada resposta.')
+    args = parser.parse_args(argv)
+
+    stub = StubServer(args.host, args.port)
+    stub.delay = args.delay
+    print(f'Cotações falsas em {stub.url}{PREFIX}PETR4,VALE3')
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# quotes/test_store.py
+
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from quotes import store
+from quotes.stub import StubServer
+
+SYMBOLS = ['PETR4', 'VALE3']
+
+
+@override_settings(
+    QUOTES_PROVIDER='quotes.providers.BrapiProvider', QUOTES_REFRESH='sync', QUOTES_SYMBOLS=SYMBOLS,
+    QUOTES_TTL=60, QUOTES_MAX_STALE=3600, QUOTES_TIMEOUT=0.5,
+    QUOTES_BREAKER_THRESHOLD=2, QUOTES_BREAKER_COOLDOWN=60,
+)
+class QuoteStoreTestCase(SimpleTestCase):
+    """Tests para o cache de cotações com o servidor falso da brapi"""
+
+    def setUp(self):
+        self.stub = StubServer().start()
+        self.addCleanup(self.stub.stop)
+        settings_override = override_settings(BRAPI_URL=self.stub.url, BRAPI_TOKEN='')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def age_entry(self, seconds):
+        self.age_entry_for(None, seconds)
+
+    def age_entry_for(self, symbols, seconds):
+        key = store._key(store.normalize(symbols))
+        entry = cache.get(key)
+        entry['fetched_at'] -= seconds
+        cache.set(key, entry)
+
+    def test_first_request_does_not_wait(self):
+        """Testa se o cache vazio retorna lista vazia e busca todos os símbolos numa requisição"""
+        self.assertEqual(store.get_quotes(), [])
+        self.assertEqual(self.stub.requests, ['/api/quote/PETR4,VALE3'])
+
+        quotes = store.get_quotes()
+
+        self.assertEqual([quote['symbol'] for quote in quotes], SYMBOLS)
+        self.assertEqual(set(quotes[0]), {'symbol', 'price', 'changesPercentage'})
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_stale_while_revalidate(self):
+        """Testa se a cotação vencida é servida enquanto a atualização busca a nova"""
+        store.get_quotes()
+        old = store.get_quotes()
+        self.age_entry(120)
+        self.stub.tick = 1
+
+        self.assertEqual(store.get_quotes(), old)
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertEqual(store.get_quotes()[0]['price'], old[0]['price'] + 1)
+
+    def test_too_stale_is_dropped(self):
+        """Testa se cotações além de QUOTES_MAX_STALE não são exibidas"""
+        store.get_quotes()
+        self.age_entry(4000)
+        self.stub.status = 500
+
+        self.assertEqual(store.get_quotes(), [])
+
+    def test_timeout_keeps_stale_quotes(self):
+        """Testa se o timeout do provider mantém a cotação antiga"""
+        store.get_quotes()
+        old = store.get_quotes()
+        self.age_entry(120)
+        self.stub.delay = 1
+
+        self.assertEqual(store.get_quotes(), old)
+        self.assertEqual(store.get_quotes(), old)
+
+    def test_circuit_breaker(self):
+        """Testa se o disjuntor abre após falhas seguidas e fecha após o cooldown"""
+        self.stub.status = 503
+        store.get_quotes()
+        store.get_quotes()
+        self.assertTrue(store.breaker_open())
+
+        store.get_quotes()
+        self.assertEqual(len(self.stub.requests), 2)
+
+        # Cooldown vencido: uma tentativa, e o sucesso fecha o disjuntor
+        state = cache.get(store.BREAKER_KEY)
+        state['open_until'] = time.time() - 1
+        cache.set(store.BREAKER_KEY, state, None)
+        self.stub.status = 200
+
+        store.get_quotes()
+
+        self.assertFalse(store.breaker_open())
+        self.assertEqual([quote['symbol'] for quote in store.get_quotes()], SYMBOLS)
+
+    def test_static_provider(self):
+        """Testa se o provider sem rede usado por padrão já preenche a primeira leitura"""
+        with override_settings(QUOTES_PROVIDER='quotes.providers.StaticProvider', QUOTES_REFRESH='thread'):
+            quotes = store.get_quotes(['VALE3', 'XXXX3'])
+            self.age_entry_for(['VALE3', 'XXXX3'], 4000)
+            too_stale = store.get_quotes(['VALE3', 'XXXX3'])
+
+        self.assertEqual([quote['symbol'] for quote in quotes], ['VALE3'])
+        self.assertEqual(too_stale, quotes)
+        self.assertEqual(self.stub.requests, [])
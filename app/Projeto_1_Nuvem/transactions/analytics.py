@@ -0,0 +1,215 @@
+# transactions/analytics.py
+"""
+Indicadores da página de insights, calculados com NumPy.
+
+O histórico do usuário é carregado uma vez como arrays compactos, com uma
+projeção values_list em blocos, em ordem cronológica, coberta pelo índice
+(user, created_at, id, value): timestamps em segundos (int64), valores em
+centavos (int64) e ids. Os anos do arquivo frio (transactions.archive)
+entram nos mesmos arrays. Todos os
+indicadores saem de operações vetorizadas sobre esses arrays, sem instanciar
+Transaction nem iterar linha a linha em Python:
+
+- gasto dos últimos 30 e 90 dias (somas acumuladas + searchsorted);
+- gasto por mês no TIME_ZONE do projeto, a posição (percentil) do mês atual
+  no histórico e a tendência dos últimos meses completos (regressão linear);
+- maiores gastos fora do padrão (z-score robusto, mediana e MAD);
+- saldo projetado para o fim do mês, pelo fluxo médio diário dos últimos 90 dias.
+
+get_insights() guarda o resultado no cache com a versão do ledger na chave,
+como o resumo do dashboard: enquanto o usuário não escreve nada, a página
+não relê o histórico.
+"""
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BigIntegerField, CharField, F
+from django.db.models.functions import Cast, Round
+from django.utils import timezone
+
+from . import ledger
+from .archive import Archive
+from .models import Transaction
+from .pagination import PREVIOUS, seek
+
+DAY = 86400
+
+WINDOWS = (30, 90)
+
+# Meses completos usados na tendência e variação mensal considerada estável
+TREND_MONTHS = 12
+TREND_THRESHOLD = 0.05
+
+# z-score robusto acima do qual um gasto é considerado fora do padrão
+OUTLIER_Z = 3.5
+OUTLIER_LIMIT = 5
+
+LOAD_CHUNK_SIZE = 10_000
+
+# Ordem da carga; seek(PREVIOUS) continua nela a partir do último lançamento lido
+CHRONOLOGICAL = ('created_at', 'id')
+
+# Colunas de um histórico carregado, em ordem crescente de data
+Series = namedtuple('Series', ['ids', 'timestamps', 'cents'])
+
+
+def load(user, chunk_size=LOAD_CHUNK_SIZE):
+    """Carrega (id, created_at, valor) do usuário como arrays NumPy em ordem cronológica."""
+    # O banco já devolve centavos inteiros e a data ISO (UTC), ambos como texto:
+    # colunas de texto não passam pelos conversores do Django a cada linha
+    # (Decimal, datetime aware, int) e o NumPy converte cada bloco de uma vez.
+    # As colunas estão todas no índice (user, created_at, id, value): a carga
+    # lê só o índice, sem tocar nas linhas da tabela.
+    rows = Transaction.objects.filter(user=user)
+    columns = (
+        'pk',
+        Cast('created_at', CharField()),
+        Cast(Cast(Round(F('value') * 100), BigIntegerField()), CharField()),
+    )
+    ids, timestamps, cents = [], [], []
+    chunk = list(rows.order_by(*CHRONOLOGICAL).values_list(*columns)[:chunk_size])
+    while chunk:
+        pks, created, values = zip(*chunk)
+        ids.append(np.array(pks, dtype=np.int64))
+        timestamps.append(np.array(created, dtype='datetime64[s]').astype(np.int64))
+        cents.append(np.array(values).astype(np.int64))
+        if len(chunk) < chunk_size:
+            break
+        # Próximo bloco pela chave (created_at, id), como na paginação por cursor
+        last = datetime.fromisoformat(created[-1]).replace(tzinfo=dt_timezone.utc)
+        chunk = list(seek(rows, PREVIOUS, last, pks[-1]).values_list(*columns)[:chunk_size])
+    archived = Archive(user.pk)
+    if archived.newest is not None:
+        # Anos arquivados: as linhas cruas já trazem id, µs e centavos
+        for block in archived.iter_blocks():
+            block = np.array([row[:3] for row in block], dtype=np.int64)
+            ids.append(block[:, 0])
+            timestamps.append(block[:, 1] // 1_000_000)
+            cents.append(block[:, 2])
+    if not ids:
+        empty = np.empty(0, dtype=np.int64)
+        return Series(empty, empty, empty)
+    series = Series(*(np.concatenate(column) for column in (ids, timestamps, cents)))
+    if archived.newest is not None:
+        order = np.lexsort((series.ids, series.timestamps))
+        series = Series(*(column[order] for column in series))
+    return series
+
+
+def money(cents):
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def month_starts(first, last):
+    """Inícios (aware, TIME_ZONE) dos meses de `first` até o mês seguinte a `last`."""
+    year, month = first.year, first.month
+    starts = []
+    while (year, month) <= (last.year, last.month):
+        starts.append(timezone.make_aware(datetime(year, month, 1)))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    starts.append(timezone.make_aware(datetime(year, month, 1)))
+    return starts
+
+
+def compute(series, now=None):
+    """Calcula os indicadores de um histórico carregado por load()."""
+    now = now or timezone.now()
+    now_ts = int(now.timestamp())
+    ids, timestamps, cents = series
+    # Lançamentos com data futura não entram em nada
+    end = int(np.searchsorted(timestamps, now_ts, side='right'))
+    ids, timestamps, cents = ids[:end], timestamps[:end], cents[:end]
+    if not end:
+        return empty_insights()
+
+    expense = np.where(cents < 0, -cents, 0)
+    # Acumulados com zero na frente: soma de [i, j) = acumulado[j] - acumulado[i]
+    spent = np.concatenate(([0], np.cumsum(expense)))
+    flow = np.concatenate(([0], np.cumsum(cents)))
+
+    def since(seconds):
+        return int(np.searchsorted(timestamps, now_ts - seconds, side='left'))
+
+    windows = {days: money(spent[end] - spent[since(days * DAY)]) for days in WINDOWS}
+
+    # Gasto por mês local: fronteiras dos meses -> posições nos arrays ordenados
+    first = timezone.localtime(datetime.fromtimestamp(timestamps[0], dt_timezone.utc))
+    starts = month_starts(first, timezone.localtime(now))
+    bounds = np.searchsorted(timestamps, [int(start.timestamp()) for start in starts], side='left')
+    monthly = np.diff(spent[bounds])
+    current, history = monthly[-1], monthly[:-1]
+
+    month_end = starts[-1]
+    elapsed = min(90 * DAY, now_ts - int(timestamps[0])) or DAY
+    daily_flow = (flow[end] - flow[since(90 * DAY)]) / (elapsed / DAY)
+    remaining_days = (month_end - now).total_seconds() / DAY
+
+    return {
+        'count': end,
+        'balance': money(flow[end]),
+        'spent_30': windows[30],
+        'spent_90': windows[90],
+        'month_spent': money(current),
+        'month_percentile': int(round(np.mean(history <= current) * 100)) if len(history) else None,
+        'month_median': money(round(np.median(history))) if len(history) else None,
+        'trend': trend(history[-TREND_MONTHS:]),
+        'projected_balance': money(round(flow[end] + daily_flow * remaining_days)),
+        'outliers': outliers(ids, timestamps, cents),
+    }
+
+
+def empty_insights():
+    return {
+        'count': 0, 'balance': money(0), 'spent_30': money(0), 'spent_90': money(0), 'month_spent': money(0),
+        'month_percentile': None, 'month_median': None, 'trend': None, 'projected_balance': money(0),
+        'outliers': [],
+    }
+
+
+def trend(monthly):
+    """Inclinação do gasto mensal ('up', 'down' ou 'flat') e a variação por mês em relação à média."""
+    if len(monthly) < 3 or not monthly.any():
+        return None
+    slope = np.polyfit(np.arange(len(monthly)), monthly.astype(np.float64), 1)[0]
+    change = float(slope / monthly.mean())
+    direction = 'flat' if abs(change) < TREND_THRESHOLD else ('up' if change > 0 else 'down')
+    return {'direction': direction, 'monthly_change': round(change * 100, 1)}
+
+
+def outliers(ids, timestamps, cents, limit=OUTLIER_LIMIT):
+    """Maiores gastos com z-score robusto acima de OUTLIER_Z, do maior para o menor."""
+    positions = np.flatnonzero(cents < 0)
+    if len(positions) < 3:
+        return []
+    amounts = -cents[positions]
+    median = np.median(amounts)
+    mad = np.median(np.abs(amounts - median))
+    if not mad:
+        return []
+    scores = 0.6745 * (amounts - median) / mad
+    candidates = positions[scores > OUTLIER_Z]
+    top = candidates[np.argsort(cents[candidates], kind='stable')[:limit]]
+    return [
+        {'id': int(ids[i]), 'value': money(cents[i]), 'timestamp': int(timestamps[i])}
+        for i in top
+    ]
+
+
+def get_insights(user):
+    """Indicadores do usuário, do cache enquanto a versão do ledger e o dia não mudam."""
+    key = f'insights:{user.pk}:{ledger.get_version(user.pk)}:{timezone.localdate().isoformat()}'
+    insights = cache.get(key)
+    if insights is None:
+        insights = compute(load(user))
+        names = Transaction.objects.only('name').in_bulk([outlier['id'] for outlier in insights['outliers']])
+        archived = Archive(user.pk)
+        for outlier in insights['outliers']:
+            transaction = names.get(outlier['id']) or archived.find(outlier['id'], outlier['timestamp'])
+            outlier['name'] = transaction.name if transaction else ''
+            outlier['created_at'] = datetime.fromtimestamp(outlier['timestamp'], dt_timezone.utc)
+        cache.set(key, insights, settings.DASHBOARD_CACHE_TIMEOUT)
+    return insights
@@ -0,0 +1,205 @@
+# transactions/api.py
+"""
+API JSON de lançamentos (lista, detalhe, criação, edição e exclusão).
+
+Autenticação pela sessão do Django, sempre restrita aos lançamentos do
+usuário logado. Requisições que alteram dados precisam do cabeçalho
+X-CSRFToken, como qualquer POST do site.
+
+ETag e Last-Modified vêm da versão do ledger do usuário (transactions.ledger),
+que muda a cada escrita, inclusive as que só trocam nome ou descrição. Um GET condicional (If-None-Match/If-Modified-Since)
+de um cliente em dia é respondido com 304 antes de qualquer consulta aos
+lançamentos, e PUT/PATCH/DELETE com If-Match recebem 412 se o dado mudou.
+"""
+import hashlib
+import json
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.core.exceptions import ValidationError
+from django.http import Http404, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
+
+from . import bulk, ledger, search
+from .archive import Archive
+from .forms import TransactionForm
+from .models import Transaction
+from .pagination import paginate
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def api_login_required(view):
+    """Como login_required, mas responde 401 em JSON em vez de redirecionar."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Autenticação necessária.'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _etag(request, *args, **kwargs):
+    version = ledger.get_version(request.user.pk)
+    # A mesma versão serve várias URLs (páginas, detalhes); o caminho entra no hash
+    digest = hashlib.sha1(request.get_full_path().encode()).hexdigest()[:16]
+    return f'{request.user.pk}-{version}-{digest}'
+
+
+def _last_modified(request, *args, **kwargs):
+    # A versão do ledger é derivada de time.time_ns() da última escrita
+    version = ledger.get_version(request.user.pk)
+    return datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+
+
+def serialize(transaction):
+    return {
+        'id': transaction.pk,
+        'name': transaction.name,
+        'description': transaction.description,
+        'value': str(transaction.value),
+        'category': transaction.category_id,
+        'created_at': transaction.created_at.isoformat(),
+        # Lançamentos do arquivo frio aparecem na lista, mas não têm detalhe
+        'archived': transaction.archived,
+        'url': None if transaction.archived else reverse('transactions:api_detail', args=[transaction.pk]),
+    }
+
+
+def _parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _save(request, data, instance=None, status=200):
+    form = TransactionForm(data=data, instance=instance, user=request.user)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    form.instance.user = request.user
+    transaction = form.save()
+    response = JsonResponse(serialize(transaction), status=status)
+    if status == 201:
+        response['Location'] = reverse('transactions:api_detail', args=[transaction.pk])
+    return response
+
+
+@api_login_required
+@require_http_methods(['GET', 'HEAD', 'POST'])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def transaction_list(request):
+    if request.method == 'POST':
+        data = _parse_body(request)
+        if data is None:
+            return JsonResponse({'error': 'Corpo JSON inválido.'}, status=400)
+        return _save(request, data, status=201)
+
+    try:
+        page_size = min(int(request.GET.get('page_size', PAGE_SIZE)), MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = PAGE_SIZE
+    try:
+        page = paginate(
+            Transaction.objects.filter(user=request.user), request.GET.get('cursor'), max(page_size, 1),
+            archive=Archive(request.user.pk),
+        )
+    except Http404:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+    return JsonResponse({
+        'results': [serialize(transaction) for transaction in page],
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
+@api_login_required
+@require_http_methods(['GET', 'HEAD', 'PUT', 'PATCH', 'DELETE'])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def transaction_detail(request, pk):
+    transaction = Transaction.objects.filter(pk=pk, user=request.user).first()
+    if transaction is None:
+        return JsonResponse({'error': 'Lançamento não encontrado.'}, status=404)
+
+    if request.method == 'DELETE':
+        transaction.delete()
+        return HttpResponse(status=204)
+
+    if request.method in ('PUT', 'PATCH'):
+        data = _parse_body(request)
+        if data is None:
+            return JsonResponse({'error': 'Corpo JSON inválido.'}, status=400)
+        if request.method == 'PATCH':
+            data = {**{field: getattr(transaction, field) for field in TransactionForm.Meta.fields}, **data}
+        return _save(request, data, instance=transaction)
+
+    return JsonResponse(serialize(transaction))
+
+
+@api_login_required
+@require_http_methods(['GET', 'HEAD'])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def transaction_search(request):
+    """Busca para autocompletar: o último termo casa por prefixo."""
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return JsonResponse({'error': 'Parâmetros de paginação inválidos.'}, status=400)
+    results, has_next = search.search(request.user, request.GET.get('q', ''), page, page_size)
+    return JsonResponse({
+        'results': [serialize(transaction) for transaction in results],
+        'page': page,
+        'has_next': has_next,
+    })
+
+
+@api_login_required
+@require_http_methods(['POST'])
+def transaction_bulk(request):
+    """
+    Exclusão/edição em massa: {"action": "delete"|"update", "ids": [...],
+    "filter": {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD", "name": "..."},
+    "fields": {...}}. Ids e filtro se combinam; ids de outros usuários são ignorados.
+    """
+    data = _parse_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Corpo JSON inválido.'}, status=400)
+    action = data.get('action')
+    if action not in ('delete', 'update'):
+        return JsonResponse({'error': 'action deve ser delete ou update.'}, status=400)
+
+    selection = data.get('filter') or {}
+    if not isinstance(selection, dict) or not isinstance(data.get('ids', []), list):
+        return JsonResponse({'error': 'ids deve ser uma lista e filter um objeto.'}, status=400)
+    dates = {}
+    for key in ('start', 'end'):
+        if selection.get(key) is None:
+            continue
+        try:
+            dates[key] = parse_date(selection[key])
+        except (TypeError, ValueError):
+            dates[key] = None
+        if dates[key] is None:
+            return JsonResponse({'error': 'start/end devem ser datas YYYY-MM-DD.'}, status=400)
+
+    try:
+        queryset = bulk.select(request.user, data.get('ids'), name=selection.get('name'), **dates)
+        if action == 'delete':
+            count = bulk.delete(queryset)
+        else:
+            fields = data.get('fields')
+            count = bulk.update(queryset, bulk.clean_fields(fields if isinstance(fields, dict) else {}))
+    except ValidationError as error:
+        if hasattr(error, 'error_dict'):
+            return JsonResponse({'errors': error.message_dict}, status=400)
+        return JsonResponse({'error': ' '.join(error.messages)}, status=400)
+    return JsonResponse({'action': action, 'count': count})
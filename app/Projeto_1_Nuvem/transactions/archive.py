@@ -0,0 +1,362 @@
+# transactions/archive.py
+"""
+Arquivo frio dos lançamentos antigos, em arquivos comprimidos por usuário e ano.
+
+`archive()` move os anos inteiros anteriores ao horizonte (ARCHIVE_HORIZON_DAYS)
+da tabela de lançamentos para o storage 'archive', um arquivo por (usuário,
+ano) descrito por um ArchiveSegment. A tabela e os índices que as páginas
+usam ficam do tamanho da janela recente.
+
+Cada arquivo é uma sequência de membros gzip de BLOCK_ROWS linhas JSON
+([id, created_at em µs, valor em centavos, category_id, nome, descrição]),
+na ordem das listas (mais recentes primeiro). O segmento guarda o offset e a
+primeira chave (created_at, id) de cada bloco, então uma página do arquivo
+descomprime só os blocos em que cai, não o ano inteiro.
+
+Os totais não mudam ao arquivar: o Ledger, os buckets e os totais por
+categoria continuam valendo, e os recálculos (rebuild_ledger,
+rebuild_rollups) somam os segmentos aos lançamentos da tabela. Lançamentos
+arquivados são somente leitura; a lista, a exportação e os insights os leem
+pelo Archive quando passam da janela recente. A busca não: os termos do
+SearchTerm saem junto com a linha da tabela, então ela cobre só a janela
+recente. O arquivo também não guarda a regra recorrente nem a data da
+ocorrência (recurring_rule, occurrence_date) do lançamento.
+
+Categorias apagadas depois do arquivamento continuam nas linhas do arquivo
+até o ano ser arquivado de novo, quando viram "sem categoria" (como o
+SET_NULL da tabela); os totais por categoria já as tratam assim.
+"""
+import gzip
+import heapq
+import json
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from .models import ArchiveSegment, Category, Transaction
+from .pagination import NEXT, PREVIOUS, iter_chunks
+
+BLOCK_ROWS = 500
+
+DELETE_CHUNK = 1000
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Colunas gravadas no arquivo, na ordem de cada linha
+FIELDS = ('id', 'created_at', 'value', 'category_id', 'name', 'description')
+
+
+def get_storage():
+    return storages['archive']
+
+
+def to_micros(moment):
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+class ArchivedTransaction:
+    """Lançamento lido do arquivo, com os mesmos atributos de leitura de Transaction."""
+
+    __slots__ = ('pk', 'user_id', 'created_at', 'value', 'category_id', 'name', 'description')
+
+    archived = True
+
+    def __init__(self, user_id, row):
+        pk, micros, cents, self.category_id, self.name, self.description = row
+        self.pk, self.user_id = pk, user_id
+        self.created_at = from_micros(micros)
+        self.value = Decimal(cents).scaleb(-2)
+
+    @property
+    def id(self):
+        return self.pk
+
+    @property
+    def is_income(self):
+        return self.value > 0
+
+    @property
+    def is_expense(self):
+        return self.value < 0
+
+    def __str__(self):
+        return f'{self.name} - R$ {self.value}'
+
+
+def _key(row):
+    return row[1], row[0]
+
+
+def _block_key(block):
+    return block[2], block[3]
+
+
+class Archive:
+    """
+    Arquivo frio de um usuário. Os segmentos são lidos do banco uma vez, na
+    primeira vez que são necessários; sem segmentos, nenhum arquivo é aberto.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self._segments = None
+
+    @property
+    def segments(self):
+        """Segmentos do mais novo para o mais antigo (os anos não se sobrepõem)."""
+        if self._segments is None:
+            self._segments = list(
+                ArchiveSegment.objects.filter(user_id=self.user_id)
+                .only('path', 'newest_at', 'newest_id', 'oldest_at', 'oldest_id', 'blocks')
+                .order_by('-newest_at', '-newest_id')
+            )
+        return self._segments
+
+    @property
+    def newest(self):
+        """Chave (created_at, id) do lançamento arquivado mais novo, ou None."""
+        if not self.segments:
+            return None
+        return self.segments[0].newest_at, self.segments[0].newest_id
+
+    def _read(self, segment, blocks):
+        """Linhas cruas dos `blocks` do segmento, na ordem em que estão no arquivo."""
+        with get_storage().open(segment.path, 'rb') as fileobj:
+            for offset, length, _, _ in blocks:
+                fileobj.seek(offset)
+                yield [json.loads(line) for line in gzip.decompress(fileobj.read(length)).splitlines()]
+
+    def iter_blocks(self):
+        """Todas as linhas cruas, bloco a bloco, na ordem das listas."""
+        for segment in self.segments:
+            yield from self._read(segment, segment.blocks)
+
+    def iter_rows(self):
+        """Todos os lançamentos arquivados (ArchivedTransaction), na ordem das listas."""
+        for block in self.iter_blocks():
+            for row in block:
+                yield ArchivedTransaction(self.user_id, row)
+
+    def rows(self, direction, key, limit):
+        """
+        Até `limit` lançamentos depois (NEXT, mais antigos) ou antes (PREVIOUS,
+        mais novos) da chave (created_at, id), na ordem de pagination.seek().
+        Com key None, começa do mais novo.
+        """
+        if direction == PREVIOUS:
+            return self._newer(key, limit)
+        return self._older(key, limit)
+
+    def _older(self, key, limit):
+        micros_key = None if key is None else (to_micros(key[0]), key[1])
+        found = []
+        for segment in self.segments:
+            if key is not None and (segment.oldest_at, segment.oldest_id) >= key:
+                continue
+            # As linhas < key começam no último bloco cuja primeira linha ainda é >= key
+            start = 0
+            if key is not None:
+                start = max(sum(1 for block in segment.blocks if _block_key(block) >= micros_key) - 1, 0)
+            for block in self._read(segment, segment.blocks[start:]):
+                for row in block:
+                    if key is None or _key(row) < micros_key:
+                        found.append(ArchivedTransaction(self.user_id, row))
+                        if len(found) == limit:
+                            return found
+        return found
+
+    def _newer(self, key, limit):
+        micros_key = (to_micros(key[0]), key[1])
+        found = []
+        for segment in reversed(self.segments):
+            if (segment.newest_at, segment.newest_id) <= key:
+                continue
+            # As linhas > key estão nos blocos cuja primeira linha é > key, lidos de trás para frente
+            end = sum(1 for block in segment.blocks if _block_key(block) > micros_key)
+            for block in self._read(segment, reversed(segment.blocks[:end])):
+                for row in reversed(block):
+                    if _key(row) > micros_key:
+                        found.append(ArchivedTransaction(self.user_id, row))
+                        if len(found) == limit:
+                            return found
+        return found
+
+    def find(self, pk, timestamp):
+        """Lançamento arquivado `pk`, criado no segundo `timestamp` (como nos insights), ou None."""
+        second = datetime.fromtimestamp(timestamp, dt_timezone.utc)
+        after = second + timedelta(seconds=1)
+        key = (after, 0)
+        while True:
+            rows = self.rows(NEXT, key, BLOCK_ROWS)
+            for row in rows:
+                if row.created_at < second:
+                    return None
+                if row.pk == pk:
+                    return row
+            if len(rows) < BLOCK_ROWS:
+                return None
+            key = (rows[-1].created_at, rows[-1].pk)
+
+
+class _Writer:
+    """Grava linhas cruas em membros gzip de BLOCK_ROWS linhas e acumula os totais."""
+
+    def __init__(self, fileobj):
+        self.file = fileobj
+        self.blocks = []
+        self.pending = []
+        self.income = self.expense = self.count = 0
+        self.newest = self.oldest = None
+
+    def add(self, row):
+        self.pending.append(row)
+        cents = row[2]
+        if cents > 0:
+            self.income += cents
+        elif cents < 0:
+            self.expense += cents
+        self.count += 1
+        if self.newest is None:
+            self.newest = row
+        self.oldest = row
+        if len(self.pending) >= BLOCK_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        text = ''.join(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n' for row in self.pending)
+        data = gzip.compress(text.encode(), mtime=0)
+        first = self.pending[0]
+        self.blocks.append([self.file.tell(), len(data), first[1], first[0]])
+        self.file.write(data)
+        self.pending = []
+
+
+def _encode(row):
+    pk, created_at, value, category_id, name, description = row
+    return [pk, to_micros(created_at), int(value.scaleb(2)), category_id, name, description]
+
+
+def _without_deleted_categories(archive):
+    """Linhas cruas do `archive`, com as categorias que não existem mais trocadas por None."""
+    checked, category_ids = set(), set()
+    for block in archive.iter_blocks():
+        unchecked = {row[3] for row in block if row[3] is not None} - checked
+        if unchecked:
+            checked |= unchecked
+            category_ids.update(Category.objects.filter(pk__in=unchecked).values_list('pk', flat=True))
+        for row in block:
+            if row[3] not in category_ids:
+                row[3] = None
+            yield row
+
+
+def _merge(*streams):
+    """Junta fluxos de linhas cruas já ordenados (mais recentes primeiro)."""
+    return heapq.merge(*streams, key=_key, reverse=True)
+
+
+def year_bounds(year):
+    return timezone.make_aware(datetime(year, 1, 1)), timezone.make_aware(datetime(year + 1, 1, 1))
+
+
+def archive_year(user_id, year):
+    """
+    Move os lançamentos do usuário no `year` (local) para o arquivo do ano,
+    juntando com o que já estava arquivado. Retorna quantos saíram da tabela.
+    """
+    from . import ledger
+
+    start, end = year_bounds(year)
+    storage = get_storage()
+    with db_transaction.atomic():
+        segment = ArchiveSegment.objects.select_for_update().filter(user_id=user_id, year=year).first()
+        # Cada bloco é lido com SELECT ... FOR UPDATE: uma edição concorrente de
+        # um lançamento antigo espera o arquivo ou entra antes da leitura
+        hot = (
+            Transaction.objects.filter(user_id=user_id, created_at__gte=start, created_at__lt=end)
+            .select_for_update()
+        )
+        pks = []
+
+        def hot_rows():
+            for chunk in iter_chunks(hot, FIELDS):
+                for row in chunk:
+                    pks.append(row[0])
+                    yield _encode(row)
+
+        streams = [hot_rows()]
+        if segment is not None:
+            old = Archive(user_id)
+            old._segments = [segment]
+            streams.append(_without_deleted_categories(old))
+
+        with tempfile.TemporaryFile() as fileobj:
+            writer = _Writer(fileobj)
+            for row in _merge(*streams):
+                writer.add(row)
+            writer.flush()
+            if not pks:
+                return 0
+            fileobj.seek(0)
+            path = storage.save(f'{user_id}/{year}-{uuid.uuid4().hex[:8]}.jsonl.gz', File(fileobj))
+
+        try:
+            for offset in range(0, len(pks), DELETE_CHUNK):
+                Transaction.objects.filter(pk__in=pks[offset:offset + DELETE_CHUNK]).delete()
+            fields = {
+                'path': path, 'blocks': writer.blocks,
+                'income_total': Decimal(writer.income).scaleb(-2),
+                'expense_total': Decimal(writer.expense).scaleb(-2),
+                'transaction_count': writer.count,
+                'newest_at': from_micros(writer.newest[1]), 'newest_id': writer.newest[0],
+                'oldest_at': from_micros(writer.oldest[1]), 'oldest_id': writer.oldest[0],
+            }
+            if segment is None:
+                ArchiveSegment.objects.create(user_id=user_id, year=year, **fields)
+            else:
+                ArchiveSegment.objects.filter(pk=segment.pk).update(**fields)
+                # O arquivo antigo só some depois do commit; num rollback ele continua valendo
+                db_transaction.on_commit(partial(storage.delete, segment.path))
+        except BaseException:
+            storage.delete(path)
+            raise
+        # Os totais não mudam, mas a lista e a exportação passam a vir do arquivo
+        db_transaction.on_commit(partial(ledger.bump_version, user_id))
+    return len(pks)
+
+
+def horizon_year(today=None):
+    """Primeiro ano que fica na tabela: anos anteriores estão todos fora da janela recente."""
+    today = today or timezone.localdate()
+    return (today - timedelta(days=settings.ARCHIVE_HORIZON_DAYS)).year
+
+
+def archive(user_ids=None, before_year=None):
+    """
+    Arquiva os anos anteriores a `before_year` (padrão: horizon_year()) dos
+    usuários informados (ou de todos). Retorna quantos lançamentos foram movidos.
+    """
+    before_year = before_year or horizon_year()
+    old = Transaction.objects.filter(created_at__lt=year_bounds(before_year)[0])
+    if user_ids is not None:
+        old = old.filter(user_id__in=user_ids)
+    moved = 0
+    for user_id in old.order_by().values_list('user_id', flat=True).distinct().iterator():
+        years = old.filter(user_id=user_id).dates('created_at', 'year')
+        for year in years:
+            moved += archive_year(user_id, year.year)
+    return moved
@@ -0,0 +1,108 @@
+# transactions/bulk.py
+"""
+Exclusão e edição em massa de lançamentos.
+
+A seleção (ids e/ou filtro) vira um SELECT ... WHERE user_id = ? FOR UPDATE,
+então a checagem de dono acontece na própria consulta: ids de outros usuários
+simplesmente não casam. Ela traz só (id, user_id, value, created_at,
+category_id) das linhas afetadas, e o DELETE/UPDATE vale só para esses ids, em
+blocos de CHUNK_SIZE: o ledger aplica os deltas exatamente das linhas escritas,
+na mesma transação, mesmo que outras linhas passem a casar com o filtro.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+
+from . import ledger, search
+from .forms import TransactionForm
+from .models import Transaction
+
+EDITABLE_FIELDS = ('name', 'description', 'value')
+
+# Limite de ids por requisição, para o IN (...) continuar razoável
+MAX_IDS = 5000
+
+CHUNK_SIZE = 1000
+
+
+def select(user, ids=None, start=None, end=None, name=None):
+    """
+    Queryset dos lançamentos do usuário que casam com ids e/ou filtro.
+
+    Exige ao menos um critério, para uma requisição vazia nunca apagar tudo.
+    """
+    if ids is None and start is None and end is None and not name:
+        raise ValidationError('Selecione ao menos um lançamento ou informe um filtro.')
+    queryset = Transaction.objects.filter(user=user)
+    if ids is not None:
+        try:
+            ids = {int(pk) for pk in ids}
+        except (TypeError, ValueError):
+            raise ValidationError('Lista de ids inválida.')
+        if len(ids) > MAX_IDS:
+            raise ValidationError(f'No máximo {MAX_IDS} lançamentos por vez.')
+        queryset = queryset.filter(pk__in=ids)
+    if start is not None:
+        queryset = queryset.filter(created_at__date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(created_at__date__lte=end)
+    if name:
+        queryset = queryset.filter(name__icontains=name)
+    return queryset
+
+
+def clean_fields(data):
+    """Valida os campos editáveis presentes em `data` com as regras do TransactionForm."""
+    form_fields = TransactionForm.base_fields
+    cleaned, errors = {}, {}
+    for field in EDITABLE_FIELDS:
+        if field not in data:
+            continue
+        try:
+            cleaned[field] = form_fields[field].clean(data[field])
+        except ValidationError as error:
+            errors[field] = error.messages
+    if errors:
+        raise ValidationError(errors)
+    if not cleaned:
+        raise ValidationError(f'Informe ao menos um campo: {", ".join(EDITABLE_FIELDS)}.')
+    return cleaned
+
+
+def _lock(queryset):
+    return list(queryset.select_for_update().values_list('pk', 'user_id', 'value', 'created_at', 'category_id'))
+
+
+def _chunks(pks):
+    for offset in range(0, len(pks), CHUNK_SIZE):
+        yield Transaction.objects.filter(pk__in=pks[offset:offset + CHUNK_SIZE])
+
+
+def delete(queryset):
+    """Apaga a seleção e desconta as linhas do ledger. Retorna quantas foram apagadas."""
+    with db_transaction.atomic():
+        rows = _lock(queryset)
+        if not rows:
+            return 0
+        for chunk in _chunks([row[0] for row in rows]):
+            chunk.delete()
+        ledger.apply(removed=[ledger.Entry(*row[1:]) for row in rows])
+    return len(rows)
+
+
+def update(queryset, fields):
+    """Aplica `fields` (já validados) às linhas da seleção. Retorna quantas linhas mudaram."""
+    with db_transaction.atomic():
+        rows = _lock(queryset)
+        if not rows:
+            return 0
+        pks = [row[0] for row in rows]
+        for chunk in _chunks(pks):
+            chunk.update(**fields)
+        # Sem 'value' os deltas são zero, mas a versão do ledger troca do mesmo jeito
+        removed = [ledger.Entry(*row[1:]) for row in rows]
+        added = [entry._replace(value=fields['value']) for entry in removed] if 'value' in fields else removed
+        ledger.apply(added=added, removed=removed)
+        if fields.keys() & {'name', 'description'} and not search.uses_fulltext():
+            for chunk in _chunks(pks):
+                search.index(chunk.only('pk', 'user_id', 'name', 'description'))
+    return len(rows)
@@ -0,0 +1,111 @@
+# transactions/categories.py
+"""
+Categorias dos lançamentos e totais por categoria (CategoryTotal).
+
+Como os buckets de transactions.rollups, os totais são mantidos de forma
+incremental pelo transactions.ledger a cada escrita, com um UPDATE ... SET
+total = total + delta por (usuário, categoria). O detalhamento do dashboard
+lê só as linhas do usuário pelo índice único (user, category), sem GROUP BY
+sobre o histórico de lançamentos.
+"""
+from functools import partial
+
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q, Sum
+
+from . import rollups
+from .archive import Archive
+from .models import Category, CategoryTotal, Transaction
+
+UNCATEGORIZED = 'Sem categoria'
+
+
+def available(user):
+    """Categorias que o usuário pode usar: as dele e as padrão."""
+    return Category.objects.filter(Q(user=user) | Q(user__isnull=True))
+
+
+def apply_deltas(deltas):
+    """Aplica deltas {(user_id, category_id): delta} aos totais por categoria."""
+    rollups.upsert_many(CategoryTotal, 'category_id', deltas)
+
+
+def merge_into_uncategorized(category):
+    """Soma os totais de `category` ao bucket sem categoria de cada usuário (antes de apagá-la)."""
+    from .ledger import Delta, bump_version
+
+    totals = list(CategoryTotal.objects.select_for_update().filter(category=category))
+    for total in totals:
+        delta = Delta()
+        delta.income, delta.expense, delta.count = total.income_total, total.expense_total, total.transaction_count
+        if delta:
+            rollups.upsert(CategoryTotal, total.user_id, 'category_id', None, delta)
+    if totals:
+        db_transaction.on_commit(partial(bump_version, *{total.user_id for total in totals}))
+
+
+def breakdown(user):
+    """Gastos e entradas por categoria, da maior despesa para a menor."""
+    rows = {}
+    for total in CategoryTotal.objects.filter(user=user, transaction_count__gt=0).select_related('category'):
+        # Sem categoria não tem unicidade garantida no banco (NULL); soma as linhas
+        row = rows.setdefault(total.category_id, {
+            'name': total.category.name if total.category else UNCATEGORIZED,
+            'income': 0, 'expense': 0, 'count': 0,
+        })
+        row['income'] += total.income_total
+        row['expense'] -= total.expense_total
+        row['count'] += total.transaction_count
+    expense_total = sum(row['expense'] for row in rows.values())
+    for row in rows.values():
+        row['percentage'] = int(row['expense'] / expense_total * 100) if expense_total else 0
+    return sorted(rows.values(), key=lambda row: (-row['expense'], row['name']))
+
+
+def rebuild(user_ids=None):
+    """Recalcula os totais por categoria dos usuários informados (ou de todos)."""
+    from django.contrib.auth.models import User
+
+    from .ledger import bump_version
+
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    for user_id in users.values_list('pk', flat=True).iterator():
+        rows = Transaction.objects.filter(user_id=user_id).values('category_id').annotate(
+            income=Sum('value', filter=Q(value__gt=0)),
+            expense=Sum('value', filter=Q(value__lt=0)),
+            count=Count('id'),
+        ).order_by()
+        totals = {row['category_id']: [row['income'] or 0, row['expense'] or 0, row['count']] for row in rows}
+        _add_archived(totals, Archive(user_id))
+        with db_transaction.atomic():
+            CategoryTotal.objects.filter(user_id=user_id).delete()
+            CategoryTotal.objects.bulk_create([
+                CategoryTotal(
+                    user_id=user_id, category_id=category_id, income_total=income,
+                    expense_total=expense, transaction_count=count,
+                )
+                for category_id, (income, expense, count) in totals.items()
+            ])
+            # O detalhamento por categoria está no resumo do dashboard
+            db_transaction.on_commit(partial(bump_version, user_id))
+
+
+def _add_archived(totals, archive):
+    """Soma aos `totals` {category_id: [income, expense, count]} os lançamentos do arquivo frio."""
+    if archive.newest is None:
+        return
+    archived = {}
+    for row in archive.iter_rows():
+        entry = archived.setdefault(row.category_id, [0, 0, 0])
+        if row.value > 0:
+            entry[0] += row.value
+        elif row.value < 0:
+            entry[1] += row.value
+        entry[2] += 1
+    # Categorias apagadas depois do arquivamento viraram "sem categoria"
+    existing = set(Category.objects.filter(pk__in=[pk for pk in archived if pk]).values_list('pk', flat=True))
+    for category_id, (income, expense, count) in archived.items():
+        total = totals.setdefault(category_id if category_id in existing else None, [0, 0, 0])
+        total[0] += income
+        total[1] += expense
+        total[2] += count
@@ -0,0 +1,56 @@
+# transactions/exporters.py
+"""
+Exportação do histórico de lançamentos em CSV ou JSON, como stream.
+
+As linhas são lidas em blocos por cursor (pagination.iter_chunks) e
+serializadas bloco a bloco, então a memória do worker não cresce com o
+tamanho do histórico e o primeiro byte sai logo após a primeira consulta.
+Com `archive`, os lançamentos do arquivo frio entram na mesma ordem.
+"""
+import csv
+import json
+
+from .pagination import iter_chunks
+
+FIELDS = ('created_at', 'name', 'description', 'value')
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Pseudo-arquivo para o csv.writer devolver a linha em vez de gravá-la."""
+
+    def write(self, value):
+        return value
+
+
+def export_csv(queryset, chunk_size=None, archive=None):
+    writer = csv.writer(Echo())
+    yield writer.writerow(['data', 'nome', 'descricao', 'valor'])
+    for chunk in iter_chunks(queryset, FIELDS, chunk_size or CHUNK_SIZE, archive):
+        yield ''.join(
+            writer.writerow([created_at.isoformat(), name, description, value])
+            for created_at, name, description, value in chunk
+        )
+
+
+def export_json(queryset, chunk_size=None, archive=None):
+    yield '['
+    separator = ''
+    for chunk in iter_chunks(queryset, FIELDS, chunk_size or CHUNK_SIZE, archive):
+        yield separator + ','.join(
+            json.dumps({
+                'created_at': created_at.isoformat(),
+                'name': name,
+                'description': description,
+                'value': str(value),
+            }, ensure_ascii=False)
+            for created_at, name, description, value in chunk
+        )
+        separator = ','
+    yield ']'
+
+
+EXPORTERS = {
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'json': (export_json, 'application/json'),
+}
@@ -1,14 +1,20 @@
 from django import forms
-from .models import Transaction
+from django.core.validators import MinValueValidator
+from .categories import available
+from .models import Category, RecurringRule, Transaction
 from decimal import Decimal
 
 class TransactionForm(forms.ModelForm):
     class Meta:
         model = Transaction
-        fields = ['name', 'value', 'description']
+        fields = ['name', 'value', 'category', 'description']
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, user=None, **kwargs):
         super().__init__(*args, **kwargs)
+        # Só as categorias padrão e as do próprio usuário
+        self.fields['category'].queryset = available(user)
+        self.fields['category'].empty_label = 'Sem categoria'
+        self.fields['category'].widget.attrs.update({'class': 'form-input'})
         self.fields['name'].widget.attrs.update(
             {'class': 'form-input', 'placeholder': 'Ex: Salário, Aluguel, Compra no mercado'}
         )
@@ -18,4 +24,65 @@ class TransactionForm(forms.ModelForm):
         self.fields['description'].widget.attrs.update(
             {'class': 'form-textarea', 'rows': 4, 'placeholder': 'Detalhes adicionais (opcional)'}
         )
-   
\ No newline at end of file
+
+
+class CategoryForm(forms.ModelForm):
+    class Meta:
+        model = Category
+        fields = ['name']
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.fields['name'].widget.attrs.update({'class': 'form-input', 'placeholder': 'Ex: Pets, Assinaturas'})
+
+    def clean_name(self):
+        name = self.cleaned_data['name'].strip()
+        if available(self.user).filter(name__iexact=name).exists():
+            raise forms.ValidationError('Já existe uma categoria com esse nome.')
+        return name
+
+
+class RecurringRuleForm(forms.ModelForm):
+    class Meta:
+        model = RecurringRule
+        fields = ['name', 'value', 'category', 'frequency', 'interval', 'start_date', 'end_date', 'description']
+        labels = {
+            'name': 'Nome', 'value': 'Valor', 'category': 'Categoria', 'frequency': 'Frequência',
+            'interval': 'Intervalo (meses, semanas ou dias)', 'start_date': 'Primeira ocorrência',
+            'end_date': 'Última ocorrência (opcional)', 'description': 'Descrição',
+        }
+        widgets = {
+            'start_date': forms.DateInput(attrs={'type': 'date'}),
+            'end_date': forms.DateInput(attrs={'type': 'date'}),
+        }
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['category'].queryset = available(user)
+        self.fields['category'].empty_label = 'Sem categoria'
+        # 0 faria a regra gerar a mesma data para sempre
+        self.fields['interval'].validators.append(MinValueValidator(1))
+        self.fields['interval'].widget.attrs['min'] = 1
+        for name in ('name', 'value', 'category', 'frequency', 'interval', 'start_date', 'end_date'):
+            self.fields[name].widget.attrs.update({'class': 'form-input'})
+        self.fields['name'].widget.attrs.update({'placeholder': 'Ex: Aluguel, Salário'})
+        self.fields['value'].widget.attrs.update({'placeholder': 'Positivo para entradas, negativo para saídas'})
+        self.fields['description'].widget.attrs.update({'class': 'form-textarea', 'rows': 2})
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date, end_date = cleaned_data.get('start_date'), cleaned_data.get('end_date')
+        if start_date and end_date and end_date < start_date:
+            self.add_error('end_date', 'O fim deve ser depois do início.')
+        return cleaned_data
+
+
+class StatementImportForm(forms.Form):
+    file = forms.FileField(label='Arquivo do extrato')
+    format = forms.ChoiceField(label='Formato', choices=[('csv', 'CSV'), ('ofx', 'OFX')])
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['file'].widget.attrs.update({'class': 'form-input', 'accept': '.csv,.ofx,.txt'})
+        self.fields['format'].widget.attrs.update({'class': 'form-input'})
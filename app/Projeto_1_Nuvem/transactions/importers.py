@@ -0,0 +1,229 @@
+# transactions/importers.py
+"""
+Importação de extratos bancários (CSV e OFX) em lote.
+
+O arquivo é lido como stream, linha a linha (CSV) ou em blocos (OFX), e
+nunca é carregado inteiro em memória. Cada linha passa pelas mesmas
+validações de campo do TransactionForm e as linhas válidas são gravadas com
+bulk_create em lotes de tamanho fixo, cada lote na sua própria transação
+junto com a atualização do ledger.
+"""
+import csv
+import io
+import re
+import time
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.exceptions import ValidationError
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from . import ledger, search
+from .forms import TransactionForm
+from .models import Transaction
+
+CSV = 'csv'
+OFX = 'ofx'
+
+BATCH_SIZE = 1000
+
+# Quantidade máxima de erros guardados para exibir ao usuário
+MAX_ERRORS = 20
+
+# Aliases aceitos no cabeçalho do CSV (sem acentos, em minúsculas)
+CSV_COLUMNS = {
+    'date': ('date', 'data'),
+    'name': ('name', 'nome', 'titulo', 'historico'),
+    'value': ('value', 'valor', 'amount'),
+    'description': ('description', 'descricao', 'memo'),
+}
+
+
+class ImportResult:
+    """Resumo de uma importação: linhas gravadas, ignoradas e velocidade."""
+
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+def _normalize_header(name):
+    name = (name or '').strip().lower()
+    for accented, plain in (('ç', 'c'), ('ã', 'a'), ('á', 'a'), ('é', 'e'), ('í', 'i'), ('ó', 'o')):
+        name = name.replace(accented, plain)
+    return name
+
+
+def _normalize_amount(raw):
+    raw = (raw or '').strip().replace('R$', '').replace(' ', '')
+    # Formato brasileiro: 1.234,56 -> 1234.56
+    if ',' in raw:
+        raw = raw.replace('.', '').replace(',', '.')
+    return raw
+
+
+# Extratos repetem muito as mesmas datas; o cache evita strptime a cada linha
+@lru_cache(maxsize=4096)
+def parse_date(raw):
+    """Aceita YYYY-MM-DD, DD/MM/YYYY (com hora opcional) e retorna datetime aware."""
+    raw = (raw or '').strip()
+    if not raw:
+        return None
+    for fmt in ('%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%d/%m/%Y', '%d/%m/%Y %H:%M:%S'):
+        try:
+            value = datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+        return timezone.make_aware(value) if timezone.is_naive(value) else value
+    raise ValueError(f'Data inválida: {raw}')
+
+
+OFX_DATE = re.compile(r'(\d{8})(\d{6})?(?:\.\d+)?(?:\[([+-]?\d+(?:\.\d+)?)(?::\w+)?\])?')
+
+
+@lru_cache(maxsize=4096)
+def parse_ofx_date(raw):
+    """Datas OFX: YYYYMMDD[HHMMSS[.XXX]][[+-]H:TZ]."""
+    match = OFX_DATE.match((raw or '').strip())
+    if not match:
+        raise ValueError(f'Data inválida: {raw}')
+    day, clock, offset = match.groups()
+    value = datetime.strptime(day + (clock or '000000'), '%Y%m%d%H%M%S')
+    if offset is not None:
+        return value.replace(tzinfo=dt_timezone(timedelta(hours=float(offset))))
+    return timezone.make_aware(value)
+
+
+def parse_csv(stream):
+    """Gera (linha, campos) para cada registro de um CSV com cabeçalho."""
+    sample = stream.readline()
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    header = next(csv.reader([sample], dialect), [])
+    positions = {}
+    for index, column in enumerate(_normalize_header(h) for h in header):
+        for field, aliases in CSV_COLUMNS.items():
+            if column in aliases and field not in positions:
+                positions[field] = index
+    missing = {'name', 'value'} - positions.keys()
+    if missing:
+        raise ValidationError(f'Colunas obrigatórias ausentes no CSV: {", ".join(sorted(missing))}.')
+
+    for line, row in enumerate(csv.reader(stream, dialect), start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        fields = {field: row[index] if index < len(row) else '' for field, index in positions.items()}
+        fields['value'] = _normalize_amount(fields['value'])
+        yield line, fields
+
+
+OFX_TOKEN = re.compile(r'<(/?[A-Za-z0-9.]+)>([^<]*)')
+
+
+def _ofx_tokens(stream, chunk_size=64 * 1024):
+    buffer = ''
+    for chunk in iter(lambda: stream.read(chunk_size), ''):
+        buffer += chunk
+        # Só processa até a última tag aberta; o resto pode continuar no próximo bloco
+        cut = buffer.rfind('<')
+        ready, buffer = (buffer[:cut], buffer[cut:]) if cut > 0 else ('', buffer)
+        for match in OFX_TOKEN.finditer(ready):
+            yield match.group(1).upper(), match.group(2).strip()
+    for match in OFX_TOKEN.finditer(buffer):
+        yield match.group(1).upper(), match.group(2).strip()
+
+
+def parse_ofx(stream):
+    """Gera (n, campos) para cada <STMTTRN> de um OFX (SGML v1 ou XML v2)."""
+    current = None
+    count = 0
+    for tag, text in _ofx_tokens(stream):
+        if tag == 'STMTTRN':
+            current = {}
+        elif tag == '/STMTTRN' and current is not None:
+            count += 1
+            yield count, {
+                'date': current.get('DTPOSTED', ''),
+                'name': current.get('NAME') or current.get('MEMO', ''),
+                'value': _normalize_amount(current.get('TRNAMT', '')),
+                'description': current.get('MEMO', '') if current.get('NAME') else '',
+            }
+            current = None
+        elif current is not None and not tag.startswith('/'):
+            current[tag] = text
+
+
+PARSERS = {CSV: (parse_csv, parse_date), OFX: (parse_ofx, parse_ofx_date)}
+
+
+def _clean(fields, date_parser):
+    """Valida os campos com as mesmas regras do TransactionForm."""
+    form_fields = TransactionForm.base_fields
+    cleaned = {name: form_fields[name].clean(fields.get(name, '')) for name in ('name', 'value', 'description')}
+    try:
+        created_at = date_parser(fields.get('date'))
+    except ValueError as error:
+        raise ValidationError(str(error))
+    if created_at is not None:
+        cleaned['created_at'] = created_at
+    return cleaned
+
+
+def _flush(batch, result):
+    with db_transaction.atomic():
+        Transaction.objects.bulk_create(batch, batch_size=len(batch))
+        ledger.apply(added=batch)
+        search.index(batch)
+    result.created += len(batch)
+
+
+def import_rows(user, rows, date_parser, batch_size=BATCH_SIZE):
+    """Valida e grava registros (linha, campos) em lotes de `batch_size`."""
+    result = ImportResult()
+    started = time.perf_counter()
+    user_id = user.pk
+    batch = []
+    for line, fields in rows:
+        try:
+            cleaned = _clean(fields, date_parser)
+        except ValidationError as error:
+            result.add_error(line, ' '.join(error.messages))
+            continue
+        batch.append(Transaction(user_id=user_id, **cleaned))
+        if len(batch) >= batch_size:
+            _flush(batch, result)
+            batch = []
+    if batch:
+        _flush(batch, result)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def import_statement(user, fileobj, fmt, encoding='utf-8-sig', batch_size=BATCH_SIZE):
+    """
+    Importa um extrato binário (upload ou arquivo aberto em modo 'rb').
+
+    Lotes já gravados permanecem se uma linha posterior falhar de forma
+    inesperada; linhas inválidas são apenas ignoradas e reportadas.
+    """
+    parser, date_parser = PARSERS[fmt]
+    stream = io.TextIOWrapper(fileobj, encoding=encoding, errors='replace', newline='')
+    try:
+        return import_rows(user, parser(stream), date_parser, batch_size)
+    finally:
+        # Devolve o arquivo ao chamador em vez de fechá-lo junto com o wrapper
+        stream.detach()
@@ -0,0 +1,220 @@
+# transactions/ledger.py
+"""
+Manutenção incremental do Ledger (totais por usuário).
+
+Toda escrita em Transaction chama `apply()` dentro da mesma transação de
+banco, com as linhas adicionadas e removidas. O delta é aplicado com um
+único UPDATE ... SET total = total + delta por usuário, sem reagregar o
+histórico. Os buckets diários/mensais (transactions.rollups) são atualizados
+e os totais por categoria (transactions.categories) são atualizados no mesmo
+passo. As linhas removidas vêm do banco, travadas com SELECT ... FOR UPDATE
+(Transaction.locked_snapshot, bulk), e não da cópia que a view leu: duas
+edições concorrentes da mesma linha se enfileiram e cada uma desconta o
+valor que a outra deixou. `rebuild()` recalcula o Ledger a partir dos
+lançamentos.
+
+Cada usuário também tem uma "versão do ledger" guardada no cache, trocada
+após o commit de qualquer escrita. Caches derivados dos lançamentos (como o
+resumo do dashboard) usam a versão na chave e nunca precisam ser apagados.
+"""
+import time
+from collections import namedtuple
+from decimal import Decimal
+from functools import partial
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+from MyProject import db_router
+
+from . import categories, rollups
+from .models import ArchiveSegment, Ledger, Transaction
+
+ZERO = Decimal('0.00')
+
+# Linha mínima que afeta os totais; Transaction tem os mesmos atributos.
+Entry = namedtuple('Entry', ['user_id', 'value', 'created_at', 'category_id'], defaults=[None])
+
+
+class Delta:
+    """Acumula o efeito de várias linhas nos totais de um usuário."""
+
+    def __init__(self):
+        self.income = ZERO
+        self.expense = ZERO
+        self.count = 0
+
+    def add(self, value, sign=1):
+        if value > 0:
+            self.income += sign * value
+        elif value < 0:
+            self.expense += sign * value
+        self.count += sign
+
+    def __bool__(self):
+        return bool(self.income or self.expense or self.count)
+
+
+def collect(added=(), removed=()):
+    """
+    Agrupa linhas adicionadas/removidas em deltas por usuário, por dia, por mês e por categoria.
+
+    Retorna (por_usuario, por_dia, por_mes, por_categoria), com chaves user_id,
+    (user_id, dia), (user_id, mês) e (user_id, category_id).
+    """
+    users, daily, monthly, by_category = {}, {}, {}, {}
+    for entries, sign in ((added, 1), (removed, -1)):
+        for entry in entries:
+            day, month = rollups.bucket(entry.created_at)
+            users.setdefault(entry.user_id, Delta()).add(entry.value, sign)
+            daily.setdefault((entry.user_id, day), Delta()).add(entry.value, sign)
+            monthly.setdefault((entry.user_id, month), Delta()).add(entry.value, sign)
+            by_category.setdefault((entry.user_id, entry.category_id), Delta()).add(entry.value, sign)
+    return users, daily, monthly, by_category
+
+
+def apply(added=(), removed=()):
+    """Aplica ao Ledger, aos buckets e aos totais por categoria o efeito de inserir `added` e apagar `removed`."""
+    users, daily, monthly, by_category = collect(added, removed)
+    changed = {user_id: delta for user_id, delta in users.items() if delta}
+    if len(changed) == 1:
+        apply_delta(*changed.popitem())
+    elif changed:
+        apply_many(changed)
+    rollups.apply_deltas(daily, monthly)
+    categories.apply_deltas(by_category)
+    # A versão muda a cada escrita, mesmo sem delta: o resumo do dashboard e a API
+    # também mostram o nome e a descrição dos lançamentos
+    if users:
+        db_transaction.on_commit(partial(bump_version, *users))
+
+
+def apply_delta(user_id, delta):
+    with db_transaction.atomic():
+        updated = Ledger.objects.filter(user_id=user_id).update(
+            income_total=F('income_total') + delta.income,
+            expense_total=F('expense_total') + delta.expense,
+            transaction_count=F('transaction_count') + delta.count,
+        )
+        if not updated:
+            # Sem linha de ledger (usuário anterior à tabela): recalcula do zero.
+            # A escrita atual já está visível nesta transação.
+            rebuild(user_ids=[user_id])
+
+
+def apply_many(deltas):
+    """Aplica deltas {user_id: delta} de vários usuários com os UPDATEs agrupados de rollups.increment()."""
+    with db_transaction.atomic():
+        user_ids = list(deltas)
+        for offset in range(0, len(user_ids), rollups.UPSERT_CHUNK):
+            chunk = user_ids[offset:offset + rollups.UPSERT_CHUNK]
+            ledgers = dict(Ledger.objects.filter(user_id__in=chunk).values_list('user_id', 'pk'))
+            if ledgers:
+                rollups.increment(Ledger, {pk: deltas[user_id] for user_id, pk in ledgers.items()})
+            missing = [user_id for user_id in chunk if user_id not in ledgers]
+            if missing:
+                rebuild(user_ids=missing)
+
+
+def _version_key(user_id):
+    return f'ledger:version:{user_id}'
+
+
+def get_version(user_id):
+    """Versão atual do ledger do usuário (um inteiro que muda a cada escrita)."""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Versão perdida (cache novo ou despejado): começa de um valor baseado no
+        # relógio para não reaproveitar chaves antigas que ainda estejam no cache.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key, time.time_ns())
+    return version
+
+
+def bump_version(*user_ids):
+    # Antes da versão nova: quem a lê já está preso ao primário e não preenche
+    # os caches da versão com uma réplica atrasada (MyProject.db_router)
+    db_router.pin_users(*user_ids)
+    now = time.time_ns()
+    current = cache.get_many([_version_key(user_id) for user_id in user_ids])
+    cache.set_many({
+        _version_key(user_id): max(current.get(_version_key(user_id), 0) + 1, now)
+        for user_id in user_ids
+    }, None)
+
+
+def get_for_user(user):
+    """Retorna o Ledger do usuário, criando-o a partir dos lançamentos se faltar."""
+    try:
+        return Ledger.objects.get(user=user)
+    except Ledger.DoesNotExist:
+        rebuild(user_ids=[user.pk])
+        return Ledger.objects.get(user=user)
+
+
+def compute(user_ids=None):
+    """
+    Calcula os totais diretamente de Transaction: {user_id: (income, expense, count)}.
+
+    Os lançamentos arquivados entram pelos totais dos seus ArchiveSegment.
+    """
+    queryset = Transaction.objects.all()
+    segments = ArchiveSegment.objects.all()
+    if user_ids is not None:
+        queryset = queryset.filter(user_id__in=user_ids)
+        segments = segments.filter(user_id__in=user_ids)
+    rows = queryset.values('user_id').annotate(
+        income=Sum('value', filter=Q(value__gt=0)),
+        expense=Sum('value', filter=Q(value__lt=0)),
+        count=Count('id'),
+    )
+    totals = {
+        row['user_id']: (row['income'] or ZERO, row['expense'] or ZERO, row['count'])
+        for row in rows
+    }
+    archived = segments.values('user_id').annotate(
+        income=Sum('income_total'), expense=Sum('expense_total'), count=Sum('transaction_count'),
+    ).order_by()
+    for row in archived:
+        income, expense, count = totals.get(row['user_id'], (ZERO, ZERO, 0))
+        totals[row['user_id']] = (income + row['income'], expense + row['expense'], count + row['count'])
+    return totals
+
+
+def rebuild(user_ids=None):
+    """Recalcula e grava o Ledger dos usuários informados (ou de todos)."""
+    from django.contrib.auth.models import User
+
+    totals = compute(user_ids)
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    rebuilt = []
+    for user_id in users.values_list('pk', flat=True).iterator():
+        rebuilt.append(user_id)
+        income, expense, count = totals.get(user_id, (ZERO, ZERO, 0))
+        defaults = {'income_total': income, 'expense_total': expense, 'transaction_count': count}
+        try:
+            with db_transaction.atomic():
+                Ledger.objects.update_or_create(user_id=user_id, defaults=defaults)
+        except IntegrityError:
+            Ledger.objects.filter(user_id=user_id).update(**defaults)
+    if rebuilt:
+        db_transaction.on_commit(partial(bump_version, *rebuilt))
+
+
+def verify(user_ids=None):
+    """Lista (user_id, esperado, atual) para cada Ledger divergente."""
+    totals = compute(user_ids)
+    ledgers = Ledger.objects.all() if user_ids is None else Ledger.objects.filter(user_id__in=user_ids)
+    mismatches = []
+    seen = set()
+    for ledger in ledgers.iterator():
+        seen.add(ledger.user_id)
+        expected = totals.get(ledger.user_id, (ZERO, ZERO, 0))
+        actual = (ledger.income_total, ledger.expense_total, ledger.transaction_count)
+        if expected != actual:
+            mismatches.append((ledger.user_id, expected, actual))
+    for user_id, expected in totals.items():
+        if user_id not in seen:
+            mismatches.append((user_id, expected, None))
+    return mismatches
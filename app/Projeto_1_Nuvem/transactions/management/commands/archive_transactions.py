@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from transactions import archive
+
+
+class Command(BaseCommand):
+    help = ('Move os anos inteiros anteriores ao horizonte (ARCHIVE_HORIZON_DAYS) para o arquivo frio, '
+            'um arquivo comprimido por usuário e ano. Pode ser rodado de novo a qualquer momento.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before-year', type=int,
+                            help='Arquiva os anos anteriores a este (padrão: pelo ARCHIVE_HORIZON_DAYS).')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Limita a um ou mais ids de usuário.')
+
+    def handle(self, *args, **options):
+        before_year = options['before_year'] or archive.horizon_year()
+        moved = archive.archive(options['user_ids'], before_year)
+        self.stdout.write(self.style.SUCCESS(f'{moved} lançamentos anteriores a {before_year} arquivados.'))
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions import importers
+
+
+class Command(BaseCommand):
+    help = 'Importa um extrato bancário (CSV ou OFX) para um usuário, em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=[importers.CSV, importers.OFX],
+                            help='Formato do arquivo (padrão: pela extensão).')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--batch-size', type=int, default=importers.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Usuário {options['username']} não encontrado.")
+
+        fmt = options['format'] or (importers.OFX if options['path'].lower().endswith('.ofx') else importers.CSV)
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                result = importers.import_statement(
+                    user, fileobj, fmt, encoding=options['encoding'], batch_size=options['batch_size']
+                )
+        except ValidationError as error:
+            raise CommandError(' '.join(error.messages))
+
+        for line, message in result.errors:
+            self.stderr.write(f'linha {line}: {message}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} lançamentos importados, {result.skipped} ignorados, '
+            f'{result.elapsed:.2f}s ({result.rows_per_second:.0f} linhas/s).'
+        ))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.utils.dateparse import parse_date
+
+from transactions import recurring
+
+
+class Command(BaseCommand):
+    help = 'Gera os lançamentos recorrentes vencidos de todos os usuários, em lotes. Pode ser rodado de novo sem duplicar.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Gera as ocorrências até esta data (AAAA-MM-DD; padrão: hoje).')
+        parser.add_argument('--chunk-size', type=int, default=recurring.CHUNK_SIZE,
+                            help='Regras por transação.')
+        parser.add_argument('--loop', type=int, metavar='SECONDS',
+                            help='Continua rodando, uma execução a cada SECONDS segundos (agendador).')
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            today = parse_date(options['date'])
+            if today is None:
+                raise CommandError(f"Data inválida: {options['date']}")
+
+        while True:
+            # No modo --loop a conexão fica parada entre execuções e pode ter caído
+            close_old_connections()
+            result = recurring.materialize(today, chunk_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{result.created} lançamentos gerados de {result.rules} regras em {result.elapsed:.2f}s.'
+            ))
+            if not options['loop']:
+                break
+            self.stdout.flush()
+            time.sleep(options['loop'])
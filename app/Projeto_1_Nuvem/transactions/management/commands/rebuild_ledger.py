@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions import ledger
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o Ledger (totais por usuário) a partir dos lançamentos, ou apenas verifica divergências.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true',
+                            help='Só compara o Ledger com os lançamentos, sem gravar nada.')
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Limita a um ou mais ids de usuário.')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+
+        if not options['verify']:
+            ledger.rebuild(user_ids)
+            self.stdout.write(self.style.SUCCESS('Ledger recalculado.'))
+
+        mismatches = ledger.verify(user_ids)
+        for user_id, expected, actual in mismatches:
+            self.stderr.write(f'Usuário {user_id}: esperado {expected}, encontrado {actual}')
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} ledger(s) divergente(s).')
+        self.stdout.write(self.style.SUCCESS('Ledger consistente com os lançamentos.'))
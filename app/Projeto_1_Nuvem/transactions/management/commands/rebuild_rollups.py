@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from transactions import categories, rollups
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os totais diários, mensais (rollups) e por categoria a partir dos lançamentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Limita a um ou mais ids de usuário.')
+
+    def handle(self, *args, **options):
+        rollups.rebuild(options['user_ids'])
+        categories.rebuild(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS('Rollups recalculados.'))
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_ledgers(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Transaction = apps.get_model('transactions', 'Transaction')
+    Ledger = apps.get_model('transactions', 'Ledger')
+
+    totals = {
+        row['user_id']: row
+        for row in Transaction.objects.values('user_id').annotate(
+            income=Sum('value', filter=Q(value__gt=0)),
+            expense=Sum('value', filter=Q(value__lt=0)),
+            count=Count('id'),
+        )
+    }
+    ledgers = []
+    for user_id in User.objects.values_list('pk', flat=True).iterator():
+        row = totals.get(user_id, {})
+        ledgers.append(Ledger(
+            user_id=user_id,
+            income_total=row.get('income') or 0,
+            expense_total=row.get('expense') or 0,
+            transaction_count=row.get('count') or 0,
+        ))
+    Ledger.objects.bulk_create(ledgers, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0002_transaction_user_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ledger',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+FULLTEXT_INDEX = 'transaction_fulltext_idx'
+
+
+def create_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        f'CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON transactions_transaction (name, description)'
+    )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'DROP INDEX {FULLTEXT_INDEX} ON transactions_transaction')
+
+
+def populate_search_terms(apps, schema_editor):
+    # Sem FULLTEXT, a busca depende do índice invertido em SearchTerm
+    if schema_editor.connection.vendor == 'mysql':
+        return
+    from transactions.search import tokenize
+
+    Transaction = apps.get_model('transactions', 'Transaction')
+    SearchTerm = apps.get_model('transactions', 'SearchTerm')
+    terms = []
+    rows = Transaction.objects.values_list('pk', 'user_id', 'name', 'description')
+    for pk, user_id, name, description in rows.iterator(chunk_size=2000):
+        terms.extend(
+            SearchTerm(user_id=user_id, transaction_id=pk, term=term)
+            for term in tokenize(f'{name} {description}')
+        )
+        if len(terms) >= 5000:
+            SearchTerm.objects.bulk_create(terms)
+            terms = []
+    SearchTerm.objects.bulk_create(terms)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0005_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('transaction', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='transactions.transaction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'term'], name='search_term_user_term_idx')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(populate_search_terms, migrations.RunPython.noop),
+    ]
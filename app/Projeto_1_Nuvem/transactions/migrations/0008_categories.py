@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+DEFAULT_CATEGORIES = [
+    'Alimentação', 'Moradia', 'Transporte', 'Saúde', 'Educação', 'Lazer', 'Compras', 'Salário', 'Investimentos',
+    'Outros',
+]
+
+
+def create_defaults(apps, schema_editor):
+    Category = apps.get_model('transactions', 'Category')
+    Category.objects.using(schema_editor.connection.alias).bulk_create([Category(name=name) for name in DEFAULT_CATEGORIES])
+
+
+def populate_totals(apps, schema_editor):
+    # Todo lançamento existente fica sem categoria: o total dele é o do Ledger
+    Ledger = apps.get_model('transactions', 'Ledger')
+    CategoryTotal = apps.get_model('transactions', 'CategoryTotal')
+    db_alias = schema_editor.connection.alias
+    CategoryTotal.objects.using(db_alias).bulk_create([
+        CategoryTotal(
+            user_id=ledger.user_id, category=None, income_total=ledger.income_total,
+            expense_total=ledger.expense_total, transaction_count=ledger.transaction_count,
+        )
+        for ledger in Ledger.objects.using(db_alias).filter(transaction_count__gt=0).iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_covering_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='categories', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='transactions.category'),
+        ),
+        migrations.CreateModel(
+            name='CategoryTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='transactions.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('user', 'name'), name='category_user_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='categorytotal',
+            constraint=models.UniqueConstraint(fields=('user', 'category'), name='category_total_user_category_uniq'),
+        ),
+        migrations.RunPython(create_defaults, migrations.RunPython.noop),
+        migrations.RunPython(populate_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0009_recurring'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('path', models.CharField(max_length=255)),
+                ('newest_at', models.DateTimeField()),
+                ('newest_id', models.BigIntegerField()),
+                ('oldest_at', models.DateTimeField()),
+                ('oldest_id', models.BigIntegerField()),
+                ('blocks', models.JSONField(default=list)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'year'), name='archive_segment_user_year_uniq')],
+            },
+        ),
+    ]
@@ -1,12 +1,107 @@
-from django.db import models
+from django.db import models, transaction as db_transaction
 from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+class Category(models.Model):
+    """Categoria de lançamentos: sem usuário é uma das categorias padrão, visíveis para todos."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='categories')
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'name'], name='category_user_name_uniq'),
+        ]
+        verbose_name_plural = 'categories'
+
+    def __str__(self):
+        return self.name
+
+    def delete(self, *args, **kwargs):
+        from . import categories
+
+        # Os lançamentos ficam sem categoria (SET_NULL num UPDATE só); os totais
+        # da categoria passam antes para o bucket "sem categoria" de cada usuário
+        with db_transaction.atomic():
+            categories.merge_into_uncategorized(self)
+            return super().delete(*args, **kwargs)
+
+
+class RecurringRule(models.Model):
+    """Lançamento que se repete (aluguel, salário); o transactions.recurring gera as ocorrências."""
+    MONTHLY = 'monthly'
+    WEEKLY = 'weekly'
+    DAYS = 'days'
+    FREQUENCY_CHOICES = [
+        (MONTHLY, 'Mensal'),
+        (WEEKLY, 'Semanal'),
+        (DAYS, 'A cada N dias'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_rules')
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='recurring_rules',
+    )
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True)
+    value = models.DecimalField(max_digits=10, decimal_places=2)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default=MONTHLY)
+    # Meses, semanas ou dias entre duas ocorrências, conforme a frequência
+    interval = models.PositiveSmallIntegerField(default=1)
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    # Próxima ocorrência ainda não gerada; None quando a regra terminou
+    next_date = models.DateField(null=True, editable=False)
+
+    class Meta:
+        ordering = ['name']
+        indexes = [
+            # Consulta do agendador: WHERE next_date <= hoje, percorrida por id
+            models.Index(fields=['next_date', 'id'], name='recurring_next_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} - R$ {self.value} ({self.get_frequency_display()})'
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.next_date is None:
+            self.next_date = self.start_date
+        super().save(*args, **kwargs)
+
 
 class Transaction(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='transactions')
+    # ForeignKey já cria o índice de category_id
+    category = models.ForeignKey(
+        Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='transactions',
+    )
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     value = models.DecimalField(max_digits=10, decimal_places=2) # Usar DecimalField é a melhor prática para dinheiro
-    created_at = models.DateTimeField(auto_now_add=True)
+    # default em vez de auto_now_add para que importações preservem a data do extrato
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Chave de idempotência das ocorrências geradas por uma regra recorrente.
+    # O índice único (recurring_rule, occurrence_date) já serve à ForeignKey.
+    recurring_rule = models.ForeignKey(
+        RecurringRule, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='transactions', db_index=False,
+    )
+    occurrence_date = models.DateField(null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recurring_rule', 'occurrence_date'], name='transaction_occurrence_uniq'),
+        ]
+        indexes = [
+            # Índice da paginação por cursor: WHERE user_id = ? ORDER BY created_at DESC, id DESC.
+            # O value no fim cobre a carga dos insights (transactions.analytics), que lê só o índice.
+            models.Index(fields=['user', 'created_at', 'id', 'value'], name='transaction_user_created_idx'),
+        ]
+
+    # Lançamentos lidos do arquivo frio (transactions.archive) são somente leitura
+    archived = False
 
     def __str__(self):
         return f'{self.name} - R$ {self.value}'
@@ -19,3 +114,167 @@ class Transaction(models.Model):
     @property
     def is_expense(self):
         return self.value < 0
+
+    def snapshot(self):
+        """Cópia dos campos que afetam os totais agregados (ledger)."""
+        from .ledger import Entry
+        return Entry(self.user_id, self.value, self.created_at, self.category_id)
+
+    def locked_snapshot(self):
+        """
+        Snapshot da linha como está no banco, travada (SELECT ... FOR UPDATE)
+        até o fim da transação, ou None se ela não existe. É o que sai dos
+        totais: o estado lido na instância pode já ter sido mudado por outra
+        edição concorrente, que então seria descontada duas vezes.
+        """
+        from .ledger import Entry
+
+        if self.pk is None:
+            return None
+        row = (
+            Transaction.objects.select_for_update().filter(pk=self.pk)
+            .values_list('user_id', 'value', 'created_at', 'category_id').first()
+        )
+        return row and Entry(*row)
+
+    def save(self, *args, **kwargs):
+        from . import ledger, search
+
+        with db_transaction.atomic():
+            old = self.locked_snapshot()
+            super().save(*args, **kwargs)
+            ledger.apply(added=[self], removed=[old] if old else [])
+            search.index([self])
+
+    def delete(self, *args, **kwargs):
+        from . import ledger
+
+        with db_transaction.atomic():
+            old = self.locked_snapshot()
+            result = super().delete(*args, **kwargs)
+            ledger.apply(removed=[old] if old else [])
+        return result
+
+
+class Ledger(models.Model):
+    """
+    Resumo desnormalizado dos lançamentos de um usuário.
+
+    Mantido de forma incremental (transactions.ledger) na mesma transação de
+    banco de cada escrita, para que o dashboard leia os totais por chave primária.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='ledger')
+    income_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'Ledger de {self.user_id}'
+
+    @property
+    def balance(self):
+        return self.income_total + self.expense_total
+
+
+@receiver(post_save, sender=User)
+def create_user_ledger(sender, instance, created, **kwargs):
+
+    if created:
+        Ledger.objects.get_or_create(user=instance)
+
+
+class Rollup(models.Model):
+    """Totais pré-agregados de um usuário em um período (dia ou mês, no TIME_ZONE)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    income_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    expense_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    transaction_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def balance(self):
+        return self.income_total + self.expense_total
+
+
+class DailyRollup(Rollup):
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='daily_rollup_user_day_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.day}'
+
+
+class MonthlyRollup(Rollup):
+    # Sempre o primeiro dia do mês
+    month = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='monthly_rollup_user_month_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.month:%Y-%m}'
+
+
+class CategoryTotal(Rollup):
+    """Totais de um usuário por categoria; category nula é o bucket "sem categoria"."""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='category_total_user_category_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.category_id}'
+
+
+class ArchiveSegment(Rollup):
+    """
+    Lançamentos de um usuário em um ano, movidos da tabela para um arquivo
+    comprimido (transactions.archive). Os totais herdados de Rollup são os
+    do arquivo e entram nos recálculos do ledger.
+    """
+    year = models.PositiveSmallIntegerField()
+    # Nome do arquivo no storage 'archive'
+    path = models.CharField(max_length=255)
+    # Chaves (created_at, id) do lançamento mais novo e do mais antigo do arquivo
+    newest_at = models.DateTimeField()
+    newest_id = models.BigIntegerField()
+    oldest_at = models.DateTimeField()
+    oldest_id = models.BigIntegerField()
+    # [offset, tamanho, created_at em µs, id] de cada bloco, do mais novo para o mais antigo
+    blocks = models.JSONField(default=list)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'year'], name='archive_segment_user_year_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} {self.year}'
+
+
+class SearchTerm(models.Model):
+    """
+    Índice invertido (termo -> lançamento) usado na busca quando o banco não
+    tem FULLTEXT (SQLite nos testes). No MySQL a tabela fica vazia.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    transaction = models.ForeignKey(Transaction, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'term'], name='search_term_user_term_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
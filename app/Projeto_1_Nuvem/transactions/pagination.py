@@ -0,0 +1,200 @@
+# transactions/pagination.py
+"""
+Paginação por cursor (keyset) para listas de lançamentos.
+
+Em vez de OFFSET, cada página continua a partir da última linha da página
+anterior usando a chave (created_at, id). Com o índice composto
+(user, created_at, id) toda página é uma varredura limitada do índice,
+não importa quão fundo o usuário navegue.
+"""
+import base64
+import heapq
+import json
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+# Ordenação canônica das listas: mais recentes primeiro, id como desempate
+ORDERING = ('-created_at', '-id')
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, created_at, pk):
+    payload = json.dumps({'d': direction, 't': created_at.isoformat(), 'i': pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Retorna (direction, created_at, pk) ou levanta Http404 para tokens inválidos."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction, created_at, pk = data['d'], parse_datetime(data['t']), int(data['i'])
+    except (ValueError, TypeError, KeyError):
+        raise Http404('Cursor inválido.')
+    if direction not in (NEXT, PREVIOUS) or created_at is None:
+        raise Http404('Cursor inválido.')
+    return direction, created_at, pk
+
+
+class CursorPage:
+    """Uma página de resultados com os tokens para a página seguinte/anterior."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def next_query(self):
+        return f'cursor={self.next_cursor}' if self.has_next else None
+
+    @property
+    def previous_query(self):
+        return f'cursor={self.previous_cursor}' if self.has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def seek(queryset, direction, created_at, pk):
+    """Filtra o queryset para as linhas depois (NEXT) ou antes (PREVIOUS) da chave."""
+    # O limite redundante em created_at deixa o banco começar a leitura do índice
+    # na chave: só com o OR, o SQLite percorre o índice desde o início do usuário
+    if direction == NEXT:
+        return queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk), created_at__lte=created_at,
+        ).order_by(*ORDERING)
+    return queryset.filter(
+        Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk), created_at__gte=created_at,
+    ).order_by('created_at', 'id')
+
+
+def _query(queryset, cursor, per_page):
+    if cursor:
+        direction, created_at, pk = decode_cursor(cursor)
+        return direction, seek(queryset, direction, created_at, pk)[:per_page + 1]
+    return NEXT, queryset.order_by(*ORDERING)[:per_page + 1]
+
+
+def _key(row):
+    return row.created_at, row.pk
+
+
+def merge_archive(rows, archive, direction, cursor, per_page):
+    """
+    Completa as linhas da tabela com as do arquivo frio (transactions.archive)
+    quando a página alcança a parte arquivada do histórico.
+    """
+    newest = archive.newest
+    if newest is None:
+        return rows
+    key = decode_cursor(cursor)[1:] if cursor else None
+    if direction == NEXT:
+        # Página cheia só com lançamentos mais novos que o arquivo: nada a ler
+        if len(rows) > per_page and _key(rows[-1]) > newest:
+            return rows
+    elif key >= newest:
+        return rows
+    archived = archive.rows(direction, key, per_page + 1)
+    return sorted(rows + archived, key=_key, reverse=direction == NEXT)[:per_page + 1]
+
+
+def paginate(queryset, cursor=None, per_page=25, archive=None):
+    """
+    Retorna a CursorPage correspondente ao `cursor` (None = primeira página).
+
+    Busca per_page + 1 linhas para saber se existe uma página além desta sem
+    precisar de COUNT(*). Com `archive` (um transactions.archive.Archive), a
+    página continua nos lançamentos arquivados depois da janela recente.
+    """
+    direction, rows = _query(queryset, cursor, per_page)
+    rows = list(rows)
+    if archive is not None:
+        rows = merge_archive(rows, archive, direction, cursor, per_page)
+    return _build_page(rows, direction, cursor, per_page)
+
+
+async def apaginate(queryset, cursor=None, per_page=25, archive=None):
+    """Versão assíncrona de paginate(), para views async."""
+    direction, rows = _query(queryset, cursor, per_page)
+    rows = [row async for row in rows]
+    if archive is not None:
+        rows = await sync_to_async(merge_archive)(rows, archive, direction, cursor, per_page)
+    return _build_page(rows, direction, cursor, per_page)
+
+
+def _build_page(rows, direction, cursor, per_page):
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == PREVIOUS:
+        rows.reverse()
+
+    if not rows:
+        return CursorPage(rows)
+
+    first, last = rows[0], rows[-1]
+    # Andando para frente, "mais" significa página seguinte; para trás, anterior.
+    has_next = has_more if direction == NEXT else True
+    has_previous = bool(cursor) if direction == NEXT else has_more
+
+    next_cursor = encode_cursor(NEXT, last.created_at, last.pk) if has_next else None
+    previous_cursor = encode_cursor(PREVIOUS, first.created_at, first.pk) if has_previous else None
+    return CursorPage(rows, next_cursor, previous_cursor)
+
+
+def _iter_keyed(queryset, fields, chunk_size):
+    columns = ('created_at', 'id') + tuple(fields)
+    rows = list(queryset.order_by(*ORDERING).values_list(*columns)[:chunk_size])
+    while rows:
+        yield rows
+        if len(rows) < chunk_size:
+            break
+        created_at, pk = rows[-1][:2]
+        rows = list(seek(queryset, NEXT, created_at, pk).values_list(*columns)[:chunk_size])
+
+
+def iter_chunks(queryset, fields, chunk_size=2000, archive=None):
+    """
+    Percorre todo o queryset na ordem da lista, em blocos de `chunk_size`.
+
+    Cada bloco é uma consulta por cursor projetando só `fields`, então a
+    memória fica limitada a um bloco em qualquer banco (o MySQL não faz
+    streaming de QuerySet.iterator(), o mysqlclient carrega o resultado inteiro).
+    Com `archive`, os lançamentos arquivados entram na mesma ordem.
+    """
+    if archive is None or archive.newest is None:
+        for rows in _iter_keyed(queryset, fields, chunk_size):
+            yield [row[2:] for row in rows]
+        return
+    hot = (row for rows in _iter_keyed(queryset, fields, chunk_size) for row in rows)
+    cold = (
+        (row.created_at, row.pk) + tuple(getattr(row, field) for field in fields)
+        for row in archive.iter_rows()
+    )
+    chunk = []
+    for row in heapq.merge(hot, cold, key=lambda row: row[:2], reverse=True):
+        chunk.append(row[2:])
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
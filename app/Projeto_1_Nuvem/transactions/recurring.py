@@ -0,0 +1,132 @@
+# transactions/recurring.py
+"""
+Geração das ocorrências dos lançamentos recorrentes (RecurringRule).
+
+`materialize()` percorre, em blocos por id, as regras com next_date <= hoje
+e grava todas as ocorrências vencidas de cada bloco com bulk_create, na
+mesma transação que atualiza o ledger e avança o next_date das regras. Um
+agendador que ficou parado gera de uma vez as ocorrências atrasadas de
+todos os usuários.
+
+Cada ocorrência leva (recurring_rule, occurrence_date), com índice único no
+banco: rodar de novo, em paralelo ou depois de uma falha nunca duplica um
+lançamento. As regras do bloco são travadas com SELECT ... FOR UPDATE SKIP
+LOCKED, então dois agendadores simultâneos dividem as regras entre si.
+"""
+import calendar
+import time
+from datetime import datetime, time as dt_time, timedelta
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from . import ledger, search
+from .models import RecurringRule, Transaction
+
+CHUNK_SIZE = 500
+
+BATCH_SIZE = 1000
+
+
+class RunResult:
+    """Resumo de uma execução: regras processadas, lançamentos gerados e tempo."""
+
+    def __init__(self):
+        self.rules = 0
+        self.created = 0
+        self.elapsed = 0.0
+
+
+def add_months(day, months, anchor_day):
+    """`day` avançado `months` meses, no dia `anchor_day` (ou no último dia de meses mais curtos)."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def following(rule, day):
+    """Ocorrência seguinte a `day`."""
+    if rule.frequency == RecurringRule.MONTHLY:
+        # Ancorada no dia do início: 31/01 -> 29/02 -> 31/03
+        return add_months(day, rule.interval, rule.start_date.day)
+    if rule.frequency == RecurringRule.WEEKLY:
+        return day + timedelta(weeks=rule.interval)
+    return day + timedelta(days=rule.interval)
+
+
+def due_dates(rule, today):
+    """Datas vencidas da regra até `today` e o novo next_date (None quando a regra termina)."""
+    dates = []
+    day = rule.next_date
+    while day is not None and day <= today and (rule.end_date is None or day <= rule.end_date):
+        dates.append(day)
+        day = following(rule, day)
+    if day is not None and rule.end_date is not None and day > rule.end_date:
+        day = None
+    return dates, day
+
+
+def occurrence(rule, day):
+    return Transaction(
+        user_id=rule.user_id, category_id=rule.category_id, name=rule.name, description=rule.description,
+        value=rule.value, created_at=timezone.make_aware(datetime.combine(day, dt_time.min)),
+        recurring_rule_id=rule.pk, occurrence_date=day,
+    )
+
+
+def _materialize_chunk(rules, today):
+    """Grava as ocorrências vencidas de `rules` (já travadas). Retorna quantas foram criadas."""
+    batch, earliest = [], {}
+    for rule in rules:
+        dates, rule.next_date = due_dates(rule, today)
+        batch.extend(occurrence(rule, day) for day in dates)
+        if dates:
+            earliest[rule.pk] = dates[0]
+    if earliest:
+        # Ocorrências que já existem (next_date voltou, execução anterior interrompida
+        # depois do INSERT) ficam de fora; o índice único garante o resto
+        existing = set(
+            Transaction.objects.filter(
+                recurring_rule_id__in=earliest, occurrence_date__gte=min(earliest.values()),
+            ).values_list('recurring_rule_id', 'occurrence_date')
+        )
+        batch = [item for item in batch if (item.recurring_rule_id, item.occurrence_date) not in existing]
+    if batch:
+        Transaction.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        ledger.apply(added=batch)
+        search.index(batch)
+    # Um UPDATE por next_date distinto (regras do mesmo dia andam juntas), em vez
+    # do UPDATE ... CASE por linha do bulk_update
+    advanced = {}
+    for rule in rules:
+        advanced.setdefault(rule.next_date, []).append(rule.pk)
+    for next_date, pks in advanced.items():
+        RecurringRule.objects.filter(pk__in=pks).update(next_date=next_date)
+    return len(batch)
+
+
+def materialize(today=None, rules=None, chunk_size=CHUNK_SIZE):
+    """
+    Gera as ocorrências vencidas até `today` (padrão: hoje) das regras em `rules`
+    (padrão: todas), um bloco de `chunk_size` regras por transação.
+    """
+    result = RunResult()
+    started = time.perf_counter()
+    today = today or timezone.localdate()
+    queryset = (RecurringRule.objects.all() if rules is None else rules).filter(next_date__lte=today)
+    last = 0
+    while True:
+        with db_transaction.atomic():
+            chunk = list(
+                queryset.filter(pk__gt=last).order_by('pk')
+                .select_for_update(skip_locked=True)[:chunk_size]
+            )
+            if not chunk:
+                break
+            result.created += _materialize_chunk(chunk, today)
+        result.rules += len(chunk)
+        last = chunk[-1].pk
+        if len(chunk) < chunk_size:
+            break
+    result.elapsed = time.perf_counter() - started
+    return result
@@ -0,0 +1,195 @@
+# transactions/rollups.py
+"""
+Totais por dia e por mês (DailyRollup/MonthlyRollup) para os gráficos.
+
+Os buckets são mantidos de forma incremental pelo transactions.ledger a
+cada escrita, usando a data local no TIME_ZONE do projeto. Consultar uma
+série custa O(buckets) e nunca lê a tabela de lançamentos.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .archive import Archive
+from .models import DailyRollup, MonthlyRollup, Transaction
+from .pagination import iter_chunks
+
+DAY = 'day'
+MONTH = 'month'
+MODELS = {DAY: (DailyRollup, 'day'), MONTH: (MonthlyRollup, 'month')}
+
+ZERO = Decimal('0.00')
+
+# Chaves por SELECT/INSERT em upsert_many
+UPSERT_CHUNK = 500
+
+
+def bucket(created_at):
+    """Retorna (dia, primeiro dia do mês) locais de um instante."""
+    day = timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+    return day, day.replace(day=1)
+
+
+def apply_deltas(daily, monthly):
+    """Aplica deltas {(user_id, data): delta} às tabelas de buckets."""
+    for granularity, deltas in ((DAY, daily), (MONTH, monthly)):
+        model, field = MODELS[granularity]
+        upsert_many(model, field, deltas)
+
+
+def increment(model, deltas):
+    """
+    Soma deltas {pk: delta} aos totais das linhas, com um UPDATE ... WHERE pk IN
+    por delta distinto (lançamentos recorrentes e importações repetem muito o
+    mesmo delta). A soma acontece no banco, como no upsert de uma linha só.
+    """
+    groups = {}
+    for pk, delta in deltas.items():
+        groups.setdefault((delta.income, delta.expense, delta.count), []).append(pk)
+    for (income, expense, count), pks in groups.items():
+        model.objects.filter(pk__in=pks).update(
+            income_total=F('income_total') + income,
+            expense_total=F('expense_total') + expense,
+            transaction_count=F('transaction_count') + count,
+        )
+
+
+def upsert_many(model, field, deltas):
+    """
+    Aplica deltas {(user_id, período): delta} com um SELECT, os UPDATEs de
+    increment() e um INSERT por bloco de UPSERT_CHUNK chaves.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if len(deltas) == 1:
+        # Escrita de um lançamento, o caso comum
+        (user_id, period), delta = deltas.popitem()
+        upsert(model, user_id, field, period, delta)
+        return
+    keys = list(deltas)
+    for offset in range(0, len(keys), UPSERT_CHUNK):
+        chunk = keys[offset:offset + UPSERT_CHUNK]
+        periods = {period for _, period in chunk}
+        # O bucket NULL (sem categoria) não é único no banco: vale qualquer uma das linhas
+        period_filter = Q(**{f'{field}__in': periods - {None}})
+        if None in periods:
+            period_filter |= Q(**{f'{field}__isnull': True})
+        rows = model.objects.filter(period_filter, user_id__in={user_id for user_id, _ in chunk})
+        existing = {(user_id, period): pk for pk, user_id, period in rows.values_list('pk', 'user_id', field)}
+        found = {existing[key]: deltas[key] for key in chunk if key in existing}
+        if found:
+            increment(model, found)
+        missing = [key for key in chunk if key not in existing]
+        if not missing:
+            continue
+        try:
+            with db_transaction.atomic():
+                model.objects.bulk_create([
+                    model(user_id=user_id, income_total=deltas[user_id, period].income,
+                          expense_total=deltas[user_id, period].expense,
+                          transaction_count=deltas[user_id, period].count, **{field: period})
+                    for user_id, period in missing
+                ])
+        except IntegrityError:
+            # Outro worker criou algum desses buckets no meio tempo: volta ao upsert de um por um
+            for user_id, period in missing:
+                upsert(model, user_id, field, period, deltas[user_id, period])
+
+
+def upsert(model, user_id, field, period, delta):
+    values = {
+        'income_total': F('income_total') + delta.income,
+        'expense_total': F('expense_total') + delta.expense,
+        'transaction_count': F('transaction_count') + delta.count,
+    }
+    lookup = {'user_id': user_id, field: period}
+    if model.objects.filter(**lookup).update(**values):
+        return
+    try:
+        with db_transaction.atomic():
+            model.objects.create(
+                income_total=delta.income, expense_total=delta.expense,
+                transaction_count=delta.count, **lookup
+            )
+    except IntegrityError:
+        # Outro worker criou o bucket entre o UPDATE e o INSERT
+        model.objects.filter(**lookup).update(**values)
+
+
+def rebuild(user_ids=None):
+    """Recalcula os buckets dos usuários informados (ou de todos) a partir dos lançamentos."""
+    from django.contrib.auth.models import User
+
+    users = User.objects.all() if user_ids is None else User.objects.filter(pk__in=user_ids)
+    for user_id in users.values_list('pk', flat=True).iterator():
+        daily, monthly = {}, {}
+        rows = Transaction.objects.filter(user_id=user_id)
+        # Os buckets dos anos arquivados vêm dos arquivos
+        for chunk in iter_chunks(rows, ('created_at', 'value'), archive=Archive(user_id)):
+            for created_at, value in chunk:
+                day, month = bucket(created_at)
+                for totals, period in ((daily, day), (monthly, month)):
+                    income, expense, count = totals.get(period, (ZERO, ZERO, 0))
+                    totals[period] = (
+                        income + (value if value > 0 else 0),
+                        expense + (value if value < 0 else 0),
+                        count + 1,
+                    )
+        with db_transaction.atomic():
+            for granularity, totals in ((DAY, daily), (MONTH, monthly)):
+                model, field = MODELS[granularity]
+                model.objects.filter(user_id=user_id).delete()
+                model.objects.bulk_create([
+                    model(user_id=user_id, income_total=income, expense_total=expense,
+                          transaction_count=count, **{field: period})
+                    for period, (income, expense, count) in totals.items()
+                ], batch_size=1000)
+
+
+def _periods(granularity, start, end):
+    current = start
+    while current <= end:
+        yield current
+        if granularity == DAY:
+            current += timedelta(days=1)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def series(user, granularity, start, end):
+    """Série contínua de buckets entre start e end (inclusive), com zeros nos buracos."""
+    model, field = MODELS[granularity]
+    if granularity == MONTH:
+        start, end = start.replace(day=1), end.replace(day=1)
+    rows = {
+        row[field]: row
+        for row in model.objects.filter(
+            user=user, **{f'{field}__gte': start, f'{field}__lte': end}
+        ).values(field, 'income_total', 'expense_total', 'transaction_count')
+    }
+    result = []
+    for period in _periods(granularity, start, end):
+        row = rows.get(period, {})
+        income = row.get('income_total', ZERO)
+        expense = row.get('expense_total', ZERO)
+        result.append({
+            'period': period.isoformat() if granularity == DAY else f'{period:%Y-%m}',
+            'income': str(income),
+            'expense': str(abs(expense)),
+            'balance': str(income + expense),
+            'count': row.get('transaction_count', 0),
+        })
+    return result
+
+
+def default_range(granularity, today=None):
+    """Últimos 30 dias ou últimos 12 meses até hoje."""
+    today = today or timezone.localdate()
+    if granularity == DAY:
+        return today - timedelta(days=29), today
+    start = today.replace(day=1)
+    for _ in range(11):
+        start = (start - timedelta(days=1)).replace(day=1)
+    return start, today
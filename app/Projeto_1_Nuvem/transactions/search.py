@@ -0,0 +1,134 @@
+# transactions/search.py
+"""
+Busca textual indexada em nome e descrição dos lançamentos.
+
+No MySQL a busca usa o índice FULLTEXT (name, description) criado na
+migração 0006, em modo BOOLEAN com prefixo em cada termo ("merc*"), e o
+ranking é a relevância calculada pelo próprio MATCH ... AGAINST.
+
+Nos demais bancos (SQLite nos testes) é mantido um índice invertido na
+tabela SearchTerm, atualizado a cada escrita; o ranking é o número de
+termos da busca encontrados no lançamento. O último termo também casa por
+prefixo, para a busca funcionar enquanto o usuário digita.
+
+Os lançamentos do arquivo frio (transactions.archive) não entram: a busca
+cobre só os que ainda estão na tabela, a janela recente.
+"""
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import BooleanField, Count, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.http import QueryDict
+
+from .models import SearchTerm, Transaction
+
+TERM_MAX_LENGTH = SearchTerm._meta.get_field('term').max_length
+MIN_TERM_LENGTH = 2
+MAX_QUERY_TERMS = 8
+
+WORD = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Termos normalizados (minúsculas, sem acentos) de um texto, sem repetição."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode().lower()
+    terms = []
+    for word in WORD.findall(text):
+        word = word[:TERM_MAX_LENGTH]
+        if len(word) >= MIN_TERM_LENGTH and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def uses_fulltext():
+    return connections[Transaction.objects.db].vendor == 'mysql'
+
+
+def index(transactions):
+    """(Re)indexa os lançamentos no índice invertido, quando não há FULLTEXT."""
+    if uses_fulltext():
+        return
+    transactions = [t for t in transactions if t.pk is not None]
+    SearchTerm.objects.filter(transaction__in=[t.pk for t in transactions]).delete()
+    SearchTerm.objects.bulk_create([
+        SearchTerm(user_id=t.user_id, transaction_id=t.pk, term=term)
+        for t in transactions
+        for term in tokenize(f'{t.name} {t.description}')
+    ], batch_size=1000)
+
+
+def _fulltext_search(user, terms):
+    table = Transaction._meta.db_table
+    against = ' '.join(f'{term}*' for term in terms)
+    match = f'MATCH ({table}.name, {table}.description) AGAINST (%s IN BOOLEAN MODE)'
+    return (
+        Transaction.objects.filter(user=user)
+        .filter(RawSQL(match, (against,), output_field=BooleanField()))
+        .annotate(rank=RawSQL(match, (against,), output_field=FloatField()))
+        .order_by('-rank', '-created_at', '-id')
+    )
+
+
+def _inverted_index_search(user, terms):
+    *whole, prefix = terms
+    condition = Q(term__gte=prefix, term__lt=prefix + '\uffff')
+    if whole:
+        condition |= Q(term__in=whole)
+    return (
+        SearchTerm.objects.filter(condition, user=user)
+        .values('transaction_id')
+        .annotate(rank=Count('id'))
+        .order_by('-rank', '-transaction_id')
+    )
+
+
+def search(user, query, page=1, per_page=25):
+    """
+    Retorna (lançamentos da página, há_próxima_página) ordenados por relevância.
+    """
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return [], False
+    offset = (page - 1) * per_page
+
+    if uses_fulltext():
+        rows = list(_fulltext_search(user, terms)[offset:offset + per_page + 1])
+        return rows[:per_page], len(rows) > per_page
+
+    ranked = list(_inverted_index_search(user, terms)[offset:offset + per_page + 1])
+    ids = [row['transaction_id'] for row in ranked[:per_page]]
+    found = Transaction.objects.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found], len(ranked) > per_page
+
+
+class SearchPage:
+    """Página de resultados de busca, com a mesma interface usada no template da lista."""
+
+    def __init__(self, object_list, query, number, has_next):
+        self.object_list = object_list
+        self.query = query
+        self.number = number
+        self.has_next = has_next
+        self.has_previous = number > 1
+
+    def _query_string(self, number):
+        params = QueryDict(mutable=True)
+        params['q'] = self.query
+        params['page'] = number
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query_string(self.number + 1) if self.has_next else None
+
+    @property
+    def previous_query(self):
+        return self._query_string(self.number - 1) if self.has_previous else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
@@ -0,0 +1,114 @@
+# transactions/test_analytics.py
+
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from transactions import analytics
+from transactions.models import Transaction
+
+NOW = datetime(2025, 6, 15, 12, tzinfo=dt_timezone.utc)
+
+
+def at(month, day):
+    return datetime(2025, month, day, tzinfo=dt_timezone.utc)
+
+
+def series(rows):
+    """Series a partir de [(datetime, centavos)], com ids 1..n."""
+    rows = sorted(rows)
+    return analytics.Series(
+        np.arange(1, len(rows) + 1, dtype=np.int64),
+        np.array([int(moment.timestamp()) for moment, _ in rows], dtype=np.int64),
+        np.array([cents for _, cents in rows], dtype=np.int64),
+    )
+
+
+class AnalyticsComputeTestCase(TestCase):
+    """Tests para os indicadores vetorizados de transactions.analytics"""
+
+    def test_metrics(self):
+        """Testa janelas, mês atual, percentil, tendência, saldo e projeção com valores conhecidos"""
+        rows = [(at(1, 1), 100000)] + [(at(month, 10), -month * 10000) for month in range(1, 6)]
+        rows += [(at(6, 10), -25000), (at(7, 1), -99999)]  # o de julho é futuro e fica de fora
+
+        insights = analytics.compute(series(rows), now=NOW)
+
+        self.assertEqual(insights['count'], 7)
+        self.assertEqual(insights['balance'], Decimal('-750.00'))
+        self.assertEqual(insights['spent_30'], Decimal('250.00'))
+        self.assertEqual(insights['spent_90'], Decimal('1150.00'))
+        self.assertEqual(insights['month_spent'], Decimal('250.00'))
+        self.assertEqual(insights['month_percentile'], 40)
+        self.assertEqual(insights['month_median'], Decimal('300.00'))
+        self.assertEqual(insights['trend'], {'direction': 'up', 'monthly_change': 33.3})
+        # -750 + (-1150 / 90 dias) * 15,5 dias restantes no mês
+        self.assertEqual(insights['projected_balance'], Decimal('-948.06'))
+        self.assertEqual(insights['outliers'], [])
+
+    def test_outliers(self):
+        """Testa se só os gastos muito acima da mediana aparecem, do maior para o menor"""
+        rows = [(at(5, 1 + i % 28), -(1000 + i)) for i in range(50)]
+        rows += [(at(5, 20), -50000), (at(5, 21), -100000), (at(5, 22), 1000000)]
+        data = series(rows)
+
+        outliers = analytics.compute(data, now=NOW)['outliers']
+
+        self.assertEqual([outlier['value'] for outlier in outliers], [Decimal('-1000.00'), Decimal('-500.00')])
+        self.assertEqual(outliers[0]['timestamp'], int(at(5, 21).timestamp()))
+        self.assertEqual(data.cents[data.ids == outliers[0]['id']][0], -100000)
+
+    def test_empty_history(self):
+        """Testa se um usuário sem lançamentos recebe zeros, sem erro"""
+        insights = analytics.compute(series([]), now=NOW)
+
+        self.assertEqual(insights['count'], 0)
+        self.assertEqual(insights['spent_30'], Decimal('0.00'))
+        self.assertIsNone(insights['trend'])
+
+
+class AnalyticsLoadTestCase(TestCase):
+    """Tests para a carga do histórico em arrays e a página de insights"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='insights', password='testpass123')
+        other = User.objects.create_user(username='outro', password='testpass123')
+        Transaction.objects.create(user=other, name='Outro', value=Decimal('-1.00'))
+
+    def test_load_arrays(self):
+        """Testa se load() traz só os lançamentos do usuário, em ordem cronológica, em centavos"""
+        late = Transaction.objects.create(user=self.user, name='B', value=Decimal('-12.34'), created_at=at(3, 2))
+        early = Transaction.objects.create(user=self.user, name='A', value=Decimal('1500.00'), created_at=at(3, 1))
+
+        data = analytics.load(self.user, chunk_size=1)
+
+        self.assertEqual(data.ids.tolist(), [early.pk, late.pk])
+        self.assertEqual(data.timestamps.tolist(), [int(at(3, 1).timestamp()), int(at(3, 2).timestamp())])
+        self.assertEqual(data.cents.tolist(), [150000, -1234])
+        self.assertEqual(data.cents.dtype, np.int64)
+
+    def test_insights_page_cached_by_ledger_version(self):
+        """Testa a página de insights e se ela só relê o histórico depois de uma escrita"""
+        self.client.login(username='insights', password='testpass123')
+        Transaction.objects.create(user=self.user, name='Mercado', value=Decimal('-80.00'))
+
+        with patch('transactions.analytics.load', wraps=analytics.load) as load:
+            response = self.client.get(reverse('transactions:insights'))
+            self.client.get(reverse('transactions:insights'))
+            self.assertEqual(load.call_count, 1)
+
+            # A versão do ledger muda depois do commit
+            with self.captureOnCommitCallbacks(execute=True):
+                Transaction.objects.create(user=self.user, name='Feira', value=Decimal('-20.00'))
+            response_after = self.client.get(reverse('transactions:insights'))
+            self.assertEqual(load.call_count, 2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['spent_30'], Decimal('80.00'))
+        self.assertEqual(response_after.context['spent_30'], Decimal('100.00'))
@@ -0,0 +1,157 @@
+"""
+Unit tests para a API JSON de transações
+"""
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from transactions.models import Transaction
+from decimal import Decimal
+import json
+
+
+class TransactionApiTestCase(TestCase):
+    """Tests para transactions.api"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='apiuser',
+            email='api@example.com',
+            password='testpass123'
+        )
+        self.other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        self.transaction = Transaction.objects.create(user=self.user, name='Salary', value=Decimal('100.00'))
+        self.client.login(username='apiuser', password='testpass123')
+
+    def send(self, method, url, data):
+        return getattr(self.client, method)(url, json.dumps(data), content_type='application/json')
+
+    def test_api_requires_login(self):
+        """Testa se a API responde 401 sem login"""
+        response = Client().get(reverse('transactions:api_list'))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_list_only_user_transactions(self):
+        """Testa se a lista só traz lançamentos do usuário"""
+        Transaction.objects.create(user=self.other_user, name='Other', value=Decimal('1.00'))
+
+        response = self.client.get(reverse('transactions:api_list'))
+
+        self.assertEqual([item['name'] for item in response.json()['results']], ['Salary'])
+        self.assertIsNone(response.json()['next_cursor'])
+
+    def test_conditional_get_returns_304_until_write(self):
+        """Testa 304 com If-None-Match e nova ETag após uma escrita"""
+        url = reverse('transactions:api_list')
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send('post', url, {'name': 'Rent', 'value': '-50.00'})
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_rename_changes_detail_etag(self):
+        """Testa se editar só o nome ou a descrição invalida a ETag do detalhe"""
+        url = reverse('transactions:api_detail', args=[self.transaction.pk])
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:update', args=[self.transaction.pk]), {
+                'name': 'Salário', 'value': '100.00', 'description': 'Março',
+            })
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['name'], response.json()['description']), ('Salário', 'Março'))
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.send('patch', url, {'description': 'Abril'})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_create_update_delete(self):
+        """Testa criação, edição parcial e exclusão pela API"""
+        response = self.send('post', reverse('transactions:api_list'), {'name': 'Rent', 'value': '-50.00'})
+        self.assertEqual(response.status_code, 201)
+        url = response['Location']
+
+        response = self.send('patch', url, {'value': '-75.00'})
+        self.assertEqual(response.json()['value'], '-75.00')
+        self.assertEqual(response.json()['name'], 'Rent')
+
+        response = self.send('put', url, {'name': 'Rent', 'value': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('value', response.json()['errors'])
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
+
+    def test_stale_if_match_is_rejected(self):
+        """Testa 412 ao editar com ETag desatualizada"""
+        url = reverse('transactions:api_detail', args=[self.transaction.pk])
+        response = self.client.put(
+            url, json.dumps({'name': 'X', 'value': '1.00'}),
+            content_type='application/json', HTTP_IF_MATCH='"velha"'
+        )
+
+        self.assertEqual(response.status_code, 412)
+
+    def test_cannot_access_other_user_transaction(self):
+        """Testa se lançamento de outro usuário retorna 404"""
+        other = Transaction.objects.create(user=self.other_user, name='Other', value=Decimal('1.00'))
+
+        response = self.client.delete(reverse('transactions:api_detail', args=[other.pk]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(Transaction.objects.filter(pk=other.pk).exists())
+
+    def test_bulk_update_and_delete(self):
+        """Testa edição e exclusão em massa mantendo o ledger consistente"""
+        extra = Transaction.objects.create(user=self.user, name='Mercado', value=Decimal('-30.00'))
+        foreign = Transaction.objects.create(user=self.other_user, name='Alheio', value=Decimal('-5.00'))
+        ids = [self.transaction.pk, extra.pk, foreign.pk]
+
+        response = self.send('post', reverse('transactions:api_bulk'), {
+            'action': 'update', 'ids': ids, 'fields': {'value': '-10.00'},
+        })
+        self.assertEqual(response.json(), {'action': 'update', 'count': 2})
+        self.assertEqual(Transaction.objects.get(pk=foreign.pk).value, Decimal('-5.00'))
+        self.user.ledger.refresh_from_db()
+        self.assertEqual(self.user.ledger.income_total, Decimal('0.00'))
+        self.assertEqual(self.user.ledger.expense_total, Decimal('-20.00'))
+
+        response = self.send('post', reverse('transactions:api_bulk'), {
+            'action': 'delete', 'filter': {'name': 'merc'},
+        })
+        self.assertEqual(response.json()['count'], 1)
+        self.user.ledger.refresh_from_db()
+        self.assertEqual(self.user.ledger.transaction_count, 1)
+        self.assertEqual(self.user.ledger.expense_total, Decimal('-10.00'))
+
+    def test_bulk_requires_selection_and_valid_fields(self):
+        """Testa se a operação em massa rejeita seleção vazia e campos inválidos"""
+        response = self.send('post', reverse('transactions:api_bulk'), {'action': 'delete'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.send('post', reverse('transactions:api_bulk'), {
+            'action': 'update', 'ids': [self.transaction.pk], 'fields': {'value': 'abc'},
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('value', response.json()['errors'])
+        self.assertEqual(Transaction.objects.count(), 1)
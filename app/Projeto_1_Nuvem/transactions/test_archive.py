@@ -0,0 +1,203 @@
+# transactions/test_archive.py
+
+import gzip
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from transactions import analytics, archive, categories, ledger, rollups
+from transactions.models import ArchiveSegment, Category, CategoryTotal, DailyRollup, Ledger, Transaction
+from transactions.pagination import ORDERING, paginate
+
+ARCHIVE_ROOT = tempfile.mkdtemp()
+
+
+def storages_with_archive(location):
+    return {**settings.STORAGES, 'archive': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': location},
+    }}
+
+
+@override_settings(STORAGES=storages_with_archive(ARCHIVE_ROOT))
+class ArchiveTestCase(TestCase):
+    """Tests para o arquivo frio dos lançamentos antigos"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(ARCHIVE_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.user = User.objects.create_user(username='archiveuser', password='testpass123')
+        self.food = Category.objects.get(user=None, name='Alimentação')
+        start = datetime(2022, 1, 1, 12, tzinfo=dt_timezone.utc)
+        # Um lançamento a cada 5 dias de 2022 até meados de 2025, alguns com o mesmo instante
+        self.transactions = [
+            Transaction.objects.create(
+                user=self.user, name=f'Compra {i}',
+                value=Decimal(f'-{i % 90 + 1}.25') if i % 4 else Decimal('300.00'),
+                created_at=start + timedelta(days=5 * (i - i % 7 // 6)), category=self.food if i % 2 else None,
+            )
+            for i in range(250)
+        ]
+        self.other = User.objects.create_user(username='otheruser', password='testpass123')
+        Transaction.objects.create(user=self.other, name='Outro', value=Decimal('-1.00'),
+                                   created_at=datetime(2022, 5, 1, tzinfo=dt_timezone.utc))
+
+    def totals(self, model, field):
+        rows = model.objects.filter(user=self.user)
+        return sorted(rows.values_list(field, 'income_total', 'expense_total', 'transaction_count'), key=str)
+
+    def listed(self, transactions):
+        ordered = sorted(transactions, key=lambda t: (t.created_at, t.pk), reverse=True)
+        return [t.pk for t in ordered]
+
+    def test_archive_moves_old_years_and_keeps_totals(self):
+        """Testa se os anos antigos saem da tabela para arquivos gzip e se os totais continuam exatos"""
+        ledger_before = self.totals(Ledger, 'user_id')
+        daily_before = self.totals(DailyRollup, 'day')
+        category_before = self.totals(CategoryTotal, 'category_id')
+        old = [t for t in self.transactions if t.created_at.year < 2024]
+
+        with patch.object(archive, 'BLOCK_ROWS', 30), self.captureOnCommitCallbacks(execute=True):
+            moved = archive.archive(before_year=2024)
+
+        self.assertEqual(moved, len(old) + 1)  # + o do outro usuário
+        self.assertFalse(Transaction.objects.filter(user=self.user, created_at__year__lt=2024).exists())
+        # O lançamento do outro usuário vai para um segmento dele
+        years = ArchiveSegment.objects.filter(user=self.user).values_list('year', flat=True)
+        self.assertEqual(sorted(years), [2022, 2023])
+        segment = ArchiveSegment.objects.get(user=self.user, year=2022)
+        self.assertEqual(segment.transaction_count, sum(1 for t in old if t.created_at.year == 2022))
+        self.assertGreater(len(segment.blocks), 1)
+        with archive.get_storage().open(segment.path, 'rb') as fileobj:
+            lines = gzip.decompress(fileobj.read()).splitlines()
+        self.assertEqual(len(lines), segment.transaction_count)
+
+        # Nada muda nos totais, e os recálculos somam o arquivo
+        self.assertEqual(self.totals(Ledger, 'user_id'), ledger_before)
+        self.assertEqual(ledger.verify(), [])
+        rollups.rebuild([self.user.pk])
+        categories.rebuild([self.user.pk])
+        self.assertEqual(self.totals(DailyRollup, 'day'), daily_before)
+        self.assertEqual(self.totals(CategoryTotal, 'category_id'), category_before)
+
+    def test_pages_continue_into_archive(self):
+        """Testa se a paginação por cursor atravessa a janela recente e o arquivo nos dois sentidos"""
+        expected = self.listed(self.transactions)
+        with patch.object(archive, 'BLOCK_ROWS', 20):
+            archive.archive(before_year=2024)
+        queryset = Transaction.objects.filter(user=self.user)
+
+        pages, cursor = [], None
+        while True:
+            page = paginate(queryset, cursor, per_page=25, archive=archive.Archive(self.user.pk))
+            pages.append(page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual([row.pk for page in pages for row in page], expected)
+        self.assertTrue(any(row.archived for row in pages[-1]))
+
+        # E de volta, da última página até a primeira
+        page, walked = pages[-1], []
+        while page.has_previous:
+            page = paginate(queryset, page.previous_cursor, per_page=25, archive=archive.Archive(self.user.pk))
+            walked = [row.pk for row in page] + walked
+        self.assertEqual(walked + [row.pk for row in pages[-1]], expected)
+
+    def test_recent_pages_do_not_read_archive(self):
+        """Testa se as páginas que não passam da janela recente não abrem os arquivos"""
+        archive.archive(before_year=2024)
+        self.client.login(username='archiveuser', password='testpass123')
+
+        with patch.object(archive.Archive, '_read', side_effect=AssertionError('leu o arquivo')):
+            response = self.client.get(reverse('transactions:list'))
+
+        self.assertEqual(len(response.context['transactions']), 25)
+        self.assertFalse(any(row.archived for row in response.context['transactions']))
+
+    def test_rearchive_merges_late_rows(self):
+        """Testa se um lançamento antigo importado depois entra no arquivo do ano já existente"""
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive(before_year=2024)
+        segment = ArchiveSegment.objects.get(user=self.user, year=2023)
+        late = Transaction.objects.create(user=self.user, name='Atrasado', value=Decimal('-7.00'),
+                                          created_at=datetime(2023, 6, 1, 10, tzinfo=dt_timezone.utc))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(archive.archive(before_year=2024), 1)
+
+        merged = ArchiveSegment.objects.get(pk=segment.pk)
+        self.assertEqual(merged.transaction_count, segment.transaction_count + 1)
+        self.assertEqual(merged.expense_total, segment.expense_total - Decimal('7.00'))
+        self.assertFalse(archive.get_storage().exists(segment.path))
+        rows = [row.pk for row in archive.Archive(self.user.pk).iter_rows()]
+        self.assertIn(late.pk, rows)
+        self.assertEqual(rows, self.listed([t for t in self.transactions if t.created_at.year < 2024] + [late]))
+        self.assertEqual(ledger.verify([self.user.pk]), [])
+
+    def test_rearchive_drops_deleted_categories(self):
+        """Testa se, ao arquivar o ano de novo, a categoria apagada some das linhas do arquivo"""
+        pets = Category.objects.create(user=self.user, name='Pets')
+        with_pets = [t.pk for t in self.transactions[:20]]
+        Transaction.objects.filter(pk__in=with_pets).update(category=pets)
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive(before_year=2024)
+        pets.delete()
+        Transaction.objects.create(user=self.user, name='Atrasado', value=Decimal('-7.00'),
+                                   created_at=datetime(2022, 6, 1, 10, tzinfo=dt_timezone.utc))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive(before_year=2024)
+
+        categories_by_pk = {row.pk: row.category_id for row in archive.Archive(self.user.pk).iter_rows()}
+        self.assertEqual({categories_by_pk[pk] for pk in with_pets}, {None})
+        self.assertEqual(set(categories_by_pk.values()), {None, self.food.pk})
+
+    def test_search_covers_only_recent_window(self):
+        """Testa se a busca avisa que os lançamentos arquivados ficam de fora"""
+        with self.captureOnCommitCallbacks(execute=True):
+            archive.archive(before_year=2024)
+        self.client.login(username='archiveuser', password='testpass123')
+
+        response = self.client.get(reverse('transactions:search') + '?q=compra')
+
+        self.assertTrue(response.context['transactions'])
+        self.assertTrue(all(t.created_at.year >= 2024 for t in response.context['transactions']))
+        newest = max(t.created_at for t in self.transactions if t.created_at.year < 2024)
+        self.assertContains(response, f'A busca cobre só os lançamentos depois de {newest:%d/%m/%Y}')
+
+    def test_list_export_and_insights_include_archive(self):
+        """Testa a lista (somente leitura), a exportação e os insights com lançamentos arquivados"""
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_transactions', '--before-year', '2024', '--user', str(self.user.pk),
+                         stdout=StringIO())
+        self.assertTrue(Transaction.objects.filter(user=self.other).exists())
+        self.client.login(username='archiveuser', password='testpass123')
+
+        response = self.client.get(reverse('transactions:export') + '?format=csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines) - 1, len(self.transactions))
+        self.assertTrue(lines[-1].startswith('2022-01-01T12:00:00+00:00,Compra 0,'))
+
+        first = Transaction.objects.filter(user=self.user).order_by(*ORDERING).values_list('pk', flat=True)
+        cursor = paginate(Transaction.objects.filter(user=self.user), per_page=len(first) - 1).next_cursor
+        response = self.client.get(reverse('transactions:list') + f'?cursor={cursor}')
+        archived = [row for row in response.context['transactions'] if row.archived]
+        self.assertTrue(archived)
+        self.assertNotContains(response, reverse('transactions:update', args=[archived[0].pk]))
+
+        series = analytics.load(self.user)
+        self.assertEqual(len(series.ids), len(self.transactions))
+        self.assertTrue((series.timestamps[1:] >= series.timestamps[:-1]).all())
+        self.assertEqual(analytics.compute(series)['balance'], sum(t.value for t in self.transactions))
@@ -0,0 +1,88 @@
+"""
+Unit tests para a importação de extratos
+"""
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from transactions.models import Transaction, Ledger
+from transactions import importers
+from decimal import Decimal
+from io import BytesIO
+
+
+OFX_SAMPLE = b"""OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240105120000[-3:BRT]
+<TRNAMT>2500,00
+<FITID>1
+<NAME>Salario
+<MEMO>Empresa X
+</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240110<TRNAMT>-89.90<FITID>2<MEMO>Mercado</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class StatementImportTestCase(TestCase):
+    """Tests para transactions.importers"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.user = User.objects.create_user(
+            username='importuser',
+            email='import@example.com',
+            password='testpass123'
+        )
+
+    def test_import_csv_in_batches(self):
+        """Testa importação de CSV em vários lotes, com linhas inválidas ignoradas"""
+        lines = ['data;nome;valor;descrição']
+        lines += [f'2024-01-{day:02d};Compra {day};-{day},50;Cartão' for day in range(1, 26)]
+        lines.append('2024-02-01;;10.00;sem nome')
+        lines.append('2024-02-02;Valor ruim;abc;')
+        content = '\n'.join(lines).encode()
+
+        result = importers.import_statement(self.user, BytesIO(content), importers.CSV, batch_size=10)
+
+        self.assertEqual(result.created, 25)
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual([line for line, _ in result.errors], [27, 28])
+        first = Transaction.objects.get(user=self.user, name='Compra 1')
+        self.assertEqual(first.value, Decimal('-1.50'))
+        self.assertEqual(first.created_at.date().isoformat(), '2024-01-01')
+
+        ledger = Ledger.objects.get(user=self.user)
+        self.assertEqual(ledger.transaction_count, 25)
+        self.assertEqual(ledger.expense_total, -sum(Decimal(f'{d}.50') for d in range(1, 26)))
+
+    def test_import_csv_missing_columns(self):
+        """Testa se CSV sem as colunas obrigatórias é rejeitado"""
+        with self.assertRaises(importers.ValidationError):
+            importers.import_statement(self.user, BytesIO(b'foo,bar\n1,2\n'), importers.CSV)
+
+    def test_import_ofx(self):
+        """Testa importação de OFX SGML com tags não fechadas"""
+        result = importers.import_statement(self.user, BytesIO(OFX_SAMPLE), importers.OFX)
+
+        self.assertEqual(result.created, 2)
+        salary = Transaction.objects.get(user=self.user, name='Salario')
+        self.assertEqual(salary.value, Decimal('2500.00'))
+        self.assertEqual(salary.description, 'Empresa X')
+        self.assertEqual(salary.created_at.isoformat(), '2024-01-05T15:00:00+00:00')
+        self.assertTrue(Transaction.objects.filter(user=self.user, name='Mercado', value=Decimal('-89.90')).exists())
+
+    def test_import_view(self):
+        """Testa upload de extrato pela view de importação"""
+        client = Client()
+        client.login(username='importuser', password='testpass123')
+        upload = SimpleUploadedFile('extrato.csv', b'name,value\nCafe,-7.00\n', content_type='text/csv')
+
+        response = client.post(reverse('transactions:import'), {'file': upload, 'format': 'csv'})
+
+        self.assertRedirects(response, reverse('transactions:list'))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 1)
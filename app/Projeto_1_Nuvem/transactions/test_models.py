@@ -1,10 +1,15 @@
 """
 Unit tests para Transaction Model
 """
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
-from transactions.models import Transaction
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from transactions import bulk, categories, ledger
+from transactions.models import Transaction, Ledger, DailyRollup, MonthlyRollup, Category, CategoryTotal
+from datetime import datetime, timezone as dt_timezone
 from decimal import Decimal
+from io import StringIO
 
 
 class TransactionModelTestCase(TestCase):
@@ -124,3 +129,232 @@ class TransactionModelTestCase(TestCase):
         
         user_transactions = Transaction.objects.filter(user=self.user)
         self.assertEqual(user_transactions.count(), 2)
+
+
+class LedgerTestCase(TestCase):
+    """Tests para a manutenção incremental do Ledger"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.user = User.objects.create_user(
+            username='ledgeruser',
+            email='ledger@example.com',
+            password='testpass123'
+        )
+
+    def assertLedger(self, income, expense, count):
+        ledger = Ledger.objects.get(user=self.user)
+        self.assertEqual(ledger.income_total, Decimal(income))
+        self.assertEqual(ledger.expense_total, Decimal(expense))
+        self.assertEqual(ledger.transaction_count, count)
+
+    def test_ledger_created_with_user(self):
+        """Testa se o Ledger é criado zerado junto com o usuário"""
+        self.assertLedger('0.00', '0.00', 0)
+
+    def test_ledger_follows_create_update_delete(self):
+        """Testa se o Ledger acompanha criação, edição e exclusão"""
+        salary = Transaction.objects.create(user=self.user, name='Salary', value=Decimal('5000.00'))
+        rent = Transaction.objects.create(user=self.user, name='Rent', value=Decimal('-1200.00'))
+        self.assertLedger('5000.00', '-1200.00', 2)
+
+        # Troca de sinal move o valor de entradas para gastos
+        salary = Transaction.objects.get(pk=salary.pk)
+        salary.value = Decimal('-100.00')
+        salary.save()
+        self.assertLedger('0.00', '-1300.00', 2)
+
+        rent.delete()
+        self.assertLedger('0.00', '-100.00', 1)
+
+    def test_stale_copies_do_not_drift_ledger(self):
+        """Testa se duas cópias lidas antes de uma edição descontam o valor do banco, não o que leram"""
+        rent = Transaction.objects.create(user=self.user, name='Rent', value=Decimal('-1200.00'))
+        first = Transaction.objects.get(pk=rent.pk)
+        second = Transaction.objects.get(pk=rent.pk)
+
+        first.value = Decimal('-1000.00')
+        first.save()
+        second.value = Decimal('-900.00')
+        second.save()
+        self.assertLedger('0.00', '-900.00', 1)
+
+        first.delete()
+        second.delete()
+        self.assertLedger('0.00', '0.00', 0)
+        self.assertEqual(ledger.verify([self.user.pk]), [])
+
+    def test_ledger_rebuilt_when_missing(self):
+        """Testa se um Ledger ausente é recalculado a partir dos lançamentos"""
+        Transaction.objects.create(user=self.user, name='Income', value=Decimal('10.00'))
+        Ledger.objects.filter(user=self.user).delete()
+
+        Transaction.objects.create(user=self.user, name='Expense', value=Decimal('-4.00'))
+        self.assertLedger('10.00', '-4.00', 2)
+
+    def test_rebuild_ledger_command(self):
+        """Testa o comando rebuild_ledger em modo verificação e recálculo"""
+        Transaction.objects.create(user=self.user, name='Income', value=Decimal('10.00'))
+        Ledger.objects.filter(user=self.user).update(income_total=Decimal('999.00'))
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_ledger', '--verify', stdout=StringIO(), stderr=StringIO())
+
+        call_command('rebuild_ledger', stdout=StringIO(), stderr=StringIO())
+        self.assertLedger('10.00', '0.00', 1)
+
+
+@override_settings(TIME_ZONE='America/Sao_Paulo')
+class RollupTestCase(TestCase):
+    """Tests para os totais diários e mensais"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.user = User.objects.create_user(
+            username='rollupuser',
+            email='rollup@example.com',
+            password='testpass123'
+        )
+
+    def rollups(self):
+        daily = {
+            r.day.isoformat(): (r.income_total, r.expense_total, r.transaction_count)
+            for r in DailyRollup.objects.filter(user=self.user)
+        }
+        monthly = {
+            r.month.isoformat(): (r.income_total, r.expense_total, r.transaction_count)
+            for r in MonthlyRollup.objects.filter(user=self.user)
+        }
+        return daily, monthly
+
+    def test_rollups_use_local_date(self):
+        """Testa se o bucket usa a data local do TIME_ZONE"""
+        # 01:00 UTC de 1º de fevereiro ainda é 31 de janeiro em São Paulo
+        Transaction.objects.create(
+            user=self.user, name='Late', value=Decimal('10.00'),
+            created_at=datetime(2024, 2, 1, 1, 0, tzinfo=dt_timezone.utc)
+        )
+
+        daily, monthly = self.rollups()
+        self.assertEqual(daily, {'2024-01-31': (Decimal('10.00'), Decimal('0.00'), 1)})
+        self.assertEqual(monthly, {'2024-01-01': (Decimal('10.00'), Decimal('0.00'), 1)})
+
+    def test_rollups_follow_update_and_delete(self):
+        """Testa se os buckets acompanham edição e exclusão"""
+        when = datetime(2024, 3, 10, 15, 0, tzinfo=dt_timezone.utc)
+        first = Transaction.objects.create(user=self.user, name='A', value=Decimal('100.00'), created_at=when)
+        second = Transaction.objects.create(user=self.user, name='B', value=Decimal('-30.00'), created_at=when)
+
+        first = Transaction.objects.get(pk=first.pk)
+        first.value = Decimal('-5.00')
+        first.save()
+        second.delete()
+
+        daily, monthly = self.rollups()
+        self.assertEqual(daily['2024-03-10'], (Decimal('0.00'), Decimal('-5.00'), 1))
+        self.assertEqual(monthly['2024-03-01'], (Decimal('0.00'), Decimal('-5.00'), 1))
+
+    def test_rebuild_rollups_matches_incremental(self):
+        """Testa se o comando rebuild_rollups chega aos mesmos buckets"""
+        for day in (1, 1, 15, 28):
+            Transaction.objects.create(
+                user=self.user, name='X', value=Decimal(f'{day}.00') * (-1 if day == 15 else 1),
+                created_at=datetime(2024, 4, day, 12, 0, tzinfo=dt_timezone.utc)
+            )
+        incremental = self.rollups()
+        DailyRollup.objects.all().delete()
+        MonthlyRollup.objects.all().update(income_total=0)
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.rollups(), incremental)
+
+
+class CategoryTotalTestCase(TestCase):
+    """Tests para os totais por categoria mantidos a cada escrita"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.user = User.objects.create_user(username='categoryuser', password='testpass123')
+        self.food = Category.objects.get(user=None, name='Alimentação')
+        self.pets = Category.objects.create(user=self.user, name='Pets')
+
+    def totals(self):
+        return {
+            total.category_id: (total.income_total, total.expense_total, total.transaction_count)
+            for total in CategoryTotal.objects.filter(user=self.user)
+        }
+
+    def test_defaults_created(self):
+        """Testa se as categorias padrão existem e ficam disponíveis para todo usuário"""
+        self.assertIn('Outros', Category.objects.filter(user=None).values_list('name', flat=True))
+        self.assertEqual(categories.available(self.user).count(), Category.objects.filter(user=None).count() + 1)
+
+    def test_totals_follow_save_recategorize_and_delete(self):
+        """Testa se os totais acompanham criação, troca de categoria, edição e exclusão"""
+        lunch = Transaction.objects.create(user=self.user, name='Almoço', value=Decimal('-40.00'), category=self.food)
+        Transaction.objects.create(user=self.user, name='Ração', value=Decimal('-60.00'), category=self.pets)
+        Transaction.objects.create(user=self.user, name='Salário', value=Decimal('1000.00'))
+        self.assertEqual(self.totals(), {
+            self.food.pk: (Decimal('0.00'), Decimal('-40.00'), 1),
+            self.pets.pk: (Decimal('0.00'), Decimal('-60.00'), 1),
+            None: (Decimal('1000.00'), Decimal('0.00'), 1),
+        })
+
+        lunch = Transaction.objects.get(pk=lunch.pk)
+        lunch.category = self.pets
+        lunch.value = Decimal('-50.00')
+        lunch.save()
+        self.assertEqual(self.totals()[self.food.pk], (Decimal('0.00'), Decimal('0.00'), 0))
+        self.assertEqual(self.totals()[self.pets.pk], (Decimal('0.00'), Decimal('-110.00'), 2))
+
+        lunch.delete()
+        self.assertEqual(self.totals()[self.pets.pk], (Decimal('0.00'), Decimal('-60.00'), 1))
+
+    def test_bulk_update_and_delete(self):
+        """Testa se a edição e a exclusão em massa descontam cada linha da sua categoria"""
+        for category in (self.food, self.pets, None):
+            Transaction.objects.create(user=self.user, name='X', value=Decimal('-10.00'), category=category)
+
+        bulk.update(bulk.select(self.user, name='X'), {'value': Decimal('-25.00')})
+        self.assertEqual(self.totals()[self.food.pk], (Decimal('0.00'), Decimal('-25.00'), 1))
+        self.assertEqual(self.totals()[None], (Decimal('0.00'), Decimal('-25.00'), 1))
+
+        bulk.delete(bulk.select(self.user, name='X'))
+        self.assertEqual({key: value[2] for key, value in self.totals().items()}, {self.food.pk: 0, self.pets.pk: 0, None: 0})
+
+    def test_category_delete_moves_totals_to_uncategorized(self):
+        """Testa se apagar uma categoria deixa os lançamentos e os totais dela sem categoria"""
+        feed = Transaction.objects.create(user=self.user, name='Ração', value=Decimal('-60.00'), category=self.pets)
+        Transaction.objects.create(user=self.user, name='Bônus', value=Decimal('200.00'))
+
+        self.pets.delete()
+
+        feed.refresh_from_db()
+        self.assertIsNone(feed.category_id)
+        self.assertEqual(self.totals(), {None: (Decimal('200.00'), Decimal('-60.00'), 2)})
+
+    def test_breakdown_single_query(self):
+        """Testa se o detalhamento do dashboard é uma leitura só, ordenada pelo maior gasto"""
+        Transaction.objects.create(user=self.user, name='Almoço', value=Decimal('-25.00'), category=self.food)
+        Transaction.objects.create(user=self.user, name='Ração', value=Decimal('-75.00'), category=self.pets)
+        Transaction.objects.create(user=self.user, name='Salário', value=Decimal('500.00'))
+
+        with self.assertNumQueries(1):
+            rows = categories.breakdown(self.user)
+
+        self.assertEqual(
+            [(row['name'], row['expense'], row['percentage'], row['count']) for row in rows],
+            [('Pets', Decimal('75.00'), 75, 1), ('Alimentação', Decimal('25.00'), 25, 1),
+             (categories.UNCATEGORIZED, Decimal('0.00'), 0, 1)],
+        )
+
+    def test_rebuild_matches_incremental(self):
+        """Testa se o rebuild_rollups recalcula os mesmos totais por categoria"""
+        Transaction.objects.create(user=self.user, name='A', value=Decimal('-10.00'), category=self.food)
+        Transaction.objects.create(user=self.user, name='B', value=Decimal('30.00'), category=self.food)
+        Transaction.objects.create(user=self.user, name='C', value=Decimal('-5.00'))
+        incremental = self.totals()
+        CategoryTotal.objects.all().delete()
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.totals(), incremental)
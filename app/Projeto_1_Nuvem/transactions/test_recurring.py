@@ -0,0 +1,147 @@
+# transactions/test_recurring.py
+
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from transactions import recurring
+from transactions.models import Ledger, RecurringRule, Transaction
+
+TODAY = date(2025, 6, 15)
+
+
+class RecurringScheduleTestCase(TestCase):
+    """Tests para o cálculo das datas das regras recorrentes"""
+
+    def rule(self, **fields):
+        fields.setdefault('start_date', date(2025, 1, 31))
+        rule = RecurringRule(name='Aluguel', value=Decimal('-1500.00'), **fields)
+        rule.next_date = rule.start_date
+        return rule
+
+    def test_monthly_keeps_anchor_day(self):
+        """Testa se a regra mensal volta ao dia do início depois de meses mais curtos"""
+        dates, next_date = recurring.due_dates(self.rule(), TODAY)
+
+        self.assertEqual(dates, [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31),
+                                 date(2025, 4, 30), date(2025, 5, 31)])
+        self.assertEqual(next_date, date(2025, 6, 30))
+
+    def test_weekly_and_custom_interval(self):
+        """Testa as frequências semanal e a cada N dias, com intervalo"""
+        weekly = self.rule(frequency=RecurringRule.WEEKLY, interval=2, start_date=date(2025, 6, 1))
+        every_five_days = self.rule(frequency=RecurringRule.DAYS, interval=5, start_date=date(2025, 6, 1))
+
+        self.assertEqual(recurring.due_dates(weekly, TODAY)[0], [date(2025, 6, 1), date(2025, 6, 15)])
+        self.assertEqual(recurring.due_dates(every_five_days, TODAY)[0],
+                         [date(2025, 6, 1), date(2025, 6, 6), date(2025, 6, 11)])
+
+    def test_end_date_finishes_rule(self):
+        """Testa se a regra para na data final e fica sem próxima ocorrência"""
+        dates, next_date = recurring.due_dates(self.rule(end_date=date(2025, 3, 1)), TODAY)
+
+        self.assertEqual(dates, [date(2025, 1, 31), date(2025, 2, 28)])
+        self.assertIsNone(next_date)
+
+
+class MaterializeTestCase(TestCase):
+    """Tests para a geração em lote das ocorrências"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.users = [User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(3)]
+        for user in self.users:
+            RecurringRule.objects.create(user=user, name='Salário', value=Decimal('5000.00'),
+                                         start_date=date(2025, 1, 5))
+            RecurringRule.objects.create(user=user, name='Academia', value=Decimal('-25.00'),
+                                         frequency=RecurringRule.WEEKLY, start_date=date(2025, 6, 1))
+
+    def test_catch_up_all_users_in_chunks(self):
+        """Testa se todas as ocorrências atrasadas de todos os usuários são geradas, em blocos"""
+        result = recurring.materialize(TODAY, chunk_size=1)
+
+        self.assertEqual(result.rules, 6)
+        self.assertEqual(result.created, 3 * (6 + 3))
+        for user in self.users:
+            ledger = Ledger.objects.get(user=user)
+            self.assertEqual(ledger.income_total, Decimal('30000.00'))
+            self.assertEqual(ledger.expense_total, Decimal('-75.00'))
+            self.assertEqual(ledger.transaction_count, 9)
+        salary = Transaction.objects.filter(user=self.users[0], name='Salário').order_by('created_at')
+        self.assertEqual([t.occurrence_date for t in salary][:2], [date(2025, 1, 5), date(2025, 2, 5)])
+        self.assertEqual(salary[0].created_at.date(), date(2025, 1, 5))
+
+    def test_rerun_is_idempotent(self):
+        """Testa se rodar de novo, ou com o next_date voltado para trás, não duplica lançamentos"""
+        recurring.materialize(TODAY)
+        self.assertEqual(recurring.materialize(TODAY).created, 0)
+
+        RecurringRule.objects.update(next_date=F('start_date'))
+        result = recurring.materialize(TODAY)
+
+        self.assertEqual(result.created, 0)
+        self.assertEqual(Transaction.objects.count(), 27)
+        self.assertEqual(Ledger.objects.get(user=self.users[0]).transaction_count, 9)
+
+    def test_command(self):
+        """Testa o comando materialize_recurring com data fixa"""
+        out = StringIO()
+        call_command('materialize_recurring', '--date', '2025-06-15', stdout=out)
+
+        self.assertIn('27 lançamentos gerados de 6 regras', out.getvalue())
+
+
+class RecurringRuleViewTestCase(TestCase):
+    """Tests para a página de lançamentos recorrentes"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_create_materializes_past_occurrences(self):
+        """Testa se criar uma regra com início no passado já lança as ocorrências vencidas"""
+        start = timezone.localdate().replace(day=1)
+        response = self.client.post(reverse('transactions:recurring'), {
+            'name': 'Aluguel', 'value': '-1500.00', 'frequency': RecurringRule.MONTHLY, 'interval': 1,
+            'start_date': start.isoformat(), 'description': '',
+        })
+
+        self.assertRedirects(response, reverse('transactions:recurring'))
+        rule = RecurringRule.objects.get(user=self.user)
+        self.assertEqual(list(rule.transactions.values_list('occurrence_date', flat=True)), [start])
+        self.assertGreater(rule.next_date, timezone.localdate())
+
+    def test_invalid_interval_and_end_date(self):
+        """Testa se intervalo zero e fim antes do início são rejeitados"""
+        response = self.client.post(reverse('transactions:recurring'), {
+            'name': 'Aluguel', 'value': '-1500.00', 'frequency': RecurringRule.DAYS, 'interval': 0,
+            'start_date': '2025-06-01', 'end_date': '2025-05-01',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('interval', response.context['form'].errors)
+        self.assertIn('end_date', response.context['form'].errors)
+        self.assertFalse(RecurringRule.objects.exists())
+
+    def test_delete_keeps_transactions(self):
+        """Testa se excluir a regra mantém os lançamentos e se a de outro usuário dá 404"""
+        rule = RecurringRule.objects.create(user=self.user, name='Aluguel', value=Decimal('-10.00'),
+                                            start_date=date(2025, 1, 1))
+        other = RecurringRule.objects.create(user=self.other_user, name='Aluguel', value=Decimal('-10.00'),
+                                             start_date=date(2025, 1, 1))
+        recurring.materialize(TODAY, rules=RecurringRule.objects.filter(pk=rule.pk))
+
+        response = self.client.post(reverse('transactions:recurring_delete', args=[other.pk]))
+        self.assertEqual(response.status_code, 404)
+
+        self.client.post(reverse('transactions:recurring_delete', args=[rule.pk]))
+        self.assertFalse(RecurringRule.objects.filter(pk=rule.pk).exists())
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 6)
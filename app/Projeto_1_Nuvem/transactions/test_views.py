@@ -4,8 +4,13 @@ Unit tests para Transaction Views
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 from django.urls import reverse
-from transactions.models import Transaction
+from django.utils import timezone
+from transactions import bulk, ledger
+from transactions.models import Category, Transaction
+from datetime import datetime, timezone as dt_timezone
 from decimal import Decimal
+from unittest.mock import patch
+import json
 
 
 class TransactionListViewTestCase(TestCase):
@@ -73,6 +78,39 @@ class TransactionListViewTestCase(TestCase):
         self.assertEqual(transactions[0].id, trans2.id)
         self.assertEqual(transactions[1].id, trans1.id)
 
+    def test_transaction_list_cursor_pagination(self):
+        """Testa navegação por cursor entre páginas, inclusive com datas iguais"""
+        for i in range(30):
+            Transaction.objects.create(user=self.user, name=f'T{i}', value=Decimal('1.00'))
+        # Força empates em created_at para exercitar o desempate por id
+        Transaction.objects.filter(user=self.user).update(created_at=timezone.now())
+        expected = list(
+            Transaction.objects.filter(user=self.user).order_by('-id').values_list('id', flat=True)
+        )
+
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('transactions:list'))
+        page = response.context['page']
+        self.assertEqual([t.id for t in response.context['transactions']], expected[:25])
+        self.assertFalse(page.has_previous)
+        self.assertTrue(page.has_next)
+
+        response = self.client.get(reverse('transactions:list'), {'cursor': page.next_cursor})
+        page = response.context['page']
+        self.assertEqual([t.id for t in response.context['transactions']], expected[25:])
+        self.assertFalse(page.has_next)
+
+        response = self.client.get(reverse('transactions:list'), {'cursor': page.previous_cursor})
+        self.assertEqual([t.id for t in response.context['transactions']], expected[:25])
+        self.assertFalse(response.context['page'].has_previous)
+
+    def test_transaction_list_invalid_cursor(self):
+        """Testa se cursor inválido retorna 404"""
+        self.client.login(username='testuser', password='testpass123')
+        response = self.client.get(reverse('transactions:list'), {'cursor': 'lixo'})
+
+        self.assertEqual(response.status_code, 404)
+
 
 class TransactionCreateViewTestCase(TestCase):
     """Tests para TransactionCreateView"""
@@ -109,6 +147,52 @@ class TransactionCreateViewTestCase(TestCase):
         self.assertEqual(transaction.user, self.user)
 
 
+class CategoryViewTestCase(TestCase):
+    """Tests para as categorias do usuário"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.other_category = Category.objects.create(user=self.other_user, name='Viagens')
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_create_and_delete_category(self):
+        """Testa se o usuário cria e apaga as próprias categorias"""
+        response = self.client.post(reverse('transactions:categories'), {'name': 'Pets'})
+        self.assertRedirects(response, reverse('transactions:categories'))
+        category = Category.objects.get(user=self.user, name='Pets')
+
+        self.client.post(reverse('transactions:category_delete', args=[category.pk]))
+        self.assertFalse(Category.objects.filter(pk=category.pk).exists())
+
+    def test_duplicate_name_rejected(self):
+        """Testa se não dá para repetir o nome de uma categoria padrão"""
+        response = self.client.post(reverse('transactions:categories'), {'name': 'alimentação'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Category.objects.filter(user=self.user).exists())
+
+    def test_cannot_delete_default_or_other_users_category(self):
+        """Testa se categorias padrão e de outros usuários não podem ser apagadas"""
+        default = Category.objects.filter(user=None).first()
+        for category in (default, self.other_category):
+            response = self.client.post(reverse('transactions:category_delete', args=[category.pk]))
+            self.assertEqual(response.status_code, 404)
+            self.assertTrue(Category.objects.filter(pk=category.pk).exists())
+
+    def test_transaction_form_only_offers_available_categories(self):
+        """Testa se o lançamento só aceita categorias padrão ou do próprio usuário"""
+        food = Category.objects.get(user=None, name='Alimentação')
+        data = {'name': 'Almoço', 'value': '-30.00', 'description': ''}
+
+        self.client.post(reverse('transactions:create'), {**data, 'category': self.other_category.pk})
+        self.assertFalse(Transaction.objects.exists())
+
+        self.client.post(reverse('transactions:create'), {**data, 'category': food.pk})
+        self.assertEqual(Transaction.objects.get().category, food)
+
+
 class TransactionDeleteViewTestCase(TestCase):
     """Tests para TransactionDeleteView"""
     
@@ -151,3 +235,260 @@ class TransactionDeleteViewTestCase(TestCase):
         
         self.assertEqual(response.status_code, 403)
         self.assertEqual(Transaction.objects.count(), 1)
+
+    def test_delete_fetches_transaction_once(self):
+        """Testa se a exclusão busca o lançamento uma única vez"""
+        self.client.login(username='testuser', password='testpass123')
+        url = reverse('transactions:delete', args=[self.transaction.id])
+
+        # sessão, usuário (com o perfil) e o lançamento
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+
+class TransactionExportViewTestCase(TestCase):
+    """Tests para TransactionExportView"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        for i in range(5):
+            Transaction.objects.create(user=self.user, name=f'T{i}', value=Decimal(f'{i}.50'))
+        Transaction.objects.create(user=other_user, name='Other', value=Decimal('1.00'))
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_export_csv_streams_all_rows(self):
+        """Testa exportação CSV em blocos menores que o histórico"""
+        with patch('transactions.exporters.CHUNK_SIZE', 2):
+            response = self.client.get(reverse('transactions:export'), {'format': 'csv'})
+
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'data,nome,descricao,valor')
+        self.assertEqual([line.split(',')[1] for line in lines[1:]], ['T4', 'T3', 'T2', 'T1', 'T0'])
+
+    def test_export_json(self):
+        """Testa exportação JSON"""
+        response = self.client.get(reverse('transactions:export'), {'format': 'json'})
+
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data[0]['name'], 'T4')
+        self.assertEqual(data[0]['value'], '4.50')
+
+    def test_export_unknown_format(self):
+        """Testa formato de exportação inválido"""
+        response = self.client.get(reverse('transactions:export'), {'format': 'xml'})
+
+        self.assertEqual(response.status_code, 404)
+
+
+class TransactionSeriesViewTestCase(TestCase):
+    """Tests para TransactionSeriesView"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.client = Client()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        Transaction.objects.create(
+            user=self.user, name='Salary', value=Decimal('1000.00'),
+            created_at=datetime(2024, 1, 5, 12, 0, tzinfo=dt_timezone.utc)
+        )
+        Transaction.objects.create(
+            user=self.user, name='Rent', value=Decimal('-400.00'),
+            created_at=datetime(2024, 3, 5, 12, 0, tzinfo=dt_timezone.utc)
+        )
+        self.client.login(username='testuser', password='testpass123')
+
+    def test_monthly_series_fills_gaps(self):
+        """Testa série mensal contínua, com meses vazios zerados"""
+        response = self.client.get(reverse('transactions:series'), {
+            'granularity': 'month', 'start': '2024-01-01', 'end': '2024-03-31'
+        })
+
+        buckets = response.json()['buckets']
+        self.assertEqual([b['period'] for b in buckets], ['2024-01', '2024-02', '2024-03'])
+        self.assertEqual(buckets[0]['income'], '1000.00')
+        self.assertEqual(buckets[1]['count'], 0)
+        self.assertEqual(buckets[2]['expense'], '400.00')
+        self.assertEqual(buckets[2]['balance'], '-400.00')
+
+    def test_daily_series(self):
+        """Testa série diária"""
+        response = self.client.get(reverse('transactions:series'), {
+            'granularity': 'day', 'start': '2024-01-04', 'end': '2024-01-06'
+        })
+
+        counts = [b['count'] for b in response.json()['buckets']]
+        self.assertEqual(counts, [0, 1, 0])
+
+    def test_series_invalid_parameters(self):
+        """Testa parâmetros inválidos"""
+        url = reverse('transactions:series')
+        self.assertEqual(self.client.get(url, {'granularity': 'year'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': '2024-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'granularity': 'day', 'start': '2000-01-01'}).status_code, 400)
+
+
+class TransactionSearchViewTestCase(TestCase):
+    """Tests para a busca de lançamentos"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+
+    def _create(self, name, description='', user=None):
+        return Transaction.objects.create(
+            user=user or self.user, name=name, description=description, value=Decimal('-10.00')
+        )
+
+    def test_search_ranks_by_matching_terms(self):
+        """Testa se lançamentos com mais termos da busca vêm primeiro"""
+        partial = self._create('Mercado')
+        full = self._create('Mercado Central', 'compras do mês')
+        self._create('Aluguel')
+
+        response = self.client.get(reverse('transactions:search'), {'q': 'mercado central'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['transactions']), [full, partial])
+
+    def test_search_prefix_and_accents(self):
+        """Testa se a busca casa prefixos e ignora acentos"""
+        transaction = self._create('Farmácia', 'Remédios')
+
+        response = self.client.get(reverse('transactions:search'), {'q': 'farmac'})
+        self.assertEqual(list(response.context['transactions']), [transaction])
+
+        response = self.client.get(reverse('transactions:search'), {'q': 'REMEDIOS'})
+        self.assertEqual(list(response.context['transactions']), [transaction])
+
+    def test_search_only_user_transactions(self):
+        """Testa se a busca só retorna lançamentos do usuário"""
+        self._create('Mercado', user=self.other_user)
+
+        response = self.client.get(reverse('transactions:search'), {'q': 'mercado'})
+
+        self.assertEqual(list(response.context['transactions']), [])
+        self.assertContains(response, 'Nenhum lançamento encontrado')
+
+    def test_search_reindexes_on_update(self):
+        """Testa se a edição de um lançamento atualiza o índice"""
+        transaction = self._create('Mercado')
+        transaction.name = 'Padaria'
+        transaction.save()
+
+        response = self.client.get(reverse('transactions:search'), {'q': 'mercado'})
+        self.assertEqual(list(response.context['transactions']), [])
+        response = self.client.get(reverse('transactions:search'), {'q': 'padaria'})
+        self.assertEqual(list(response.context['transactions']), [transaction])
+
+    def test_search_pagination(self):
+        """Testa a paginação dos resultados"""
+        for i in range(30):
+            self._create(f'Mercado {i}')
+
+        response = self.client.get(reverse('transactions:search'), {'q': 'mercado'})
+        page = response.context['page']
+        self.assertEqual(len(response.context['transactions']), 25)
+        self.assertTrue(page.has_next)
+        self.assertEqual(page.next_query, 'q=mercado&page=2')
+
+        response = self.client.get(reverse('transactions:search'), {'q': 'mercado', 'page': 2})
+        self.assertEqual(len(response.context['transactions']), 5)
+        self.assertFalse(response.context['page'].has_next)
+
+    def test_search_api(self):
+        """Testa a busca pela API JSON"""
+        transaction = self._create('Supermercado')
+
+        response = self.client.get(reverse('transactions:api_search'), {'q': 'superm'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], [transaction.pk])
+
+
+class TransactionBulkViewTestCase(TestCase):
+    """Tests para a exclusão/edição em massa"""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.other_user = User.objects.create_user(username='otheruser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.transactions = [
+            Transaction.objects.create(user=self.user, name=f'Import {i}', value=Decimal('-1.00'))
+            for i in range(5)
+        ]
+        self.foreign = Transaction.objects.create(user=self.other_user, name='Alheio', value=Decimal('-1.00'))
+
+    def test_bulk_delete_only_own_transactions(self):
+        """Testa se a exclusão em massa ignora lançamentos de outros usuários"""
+        ids = [t.pk for t in self.transactions[:3]] + [self.foreign.pk]
+
+        response = self.client.post(reverse('transactions:bulk'), {'action': 'delete', 'ids': ids})
+
+        self.assertRedirects(response, reverse('transactions:list'))
+        self.assertEqual(Transaction.objects.filter(user=self.user).count(), 2)
+        self.assertTrue(Transaction.objects.filter(pk=self.foreign.pk).exists())
+        self.user.ledger.refresh_from_db()
+        self.assertEqual(self.user.ledger.transaction_count, 2)
+        self.assertEqual(self.user.ledger.expense_total, Decimal('-2.00'))
+
+    def test_bulk_update_name(self):
+        """Testa a edição em massa do nome"""
+        ids = [t.pk for t in self.transactions]
+
+        self.client.post(reverse('transactions:bulk'), {'action': 'update', 'ids': ids, 'name': 'Mercado'})
+
+        self.assertEqual(Transaction.objects.filter(user=self.user, name='Mercado').count(), 5)
+        response = self.client.get(reverse('transactions:search'), {'q': 'mercado'})
+        self.assertEqual(len(response.context['transactions']), 5)
+
+    def test_bulk_writes_only_locked_rows(self):
+        """Testa se um lançamento que passa a casar com o filtro depois da trava não é apagado"""
+        real_lock = bulk._lock
+
+        def lock_then_insert(queryset):
+            rows = real_lock(queryset)
+            Transaction.objects.create(user=self.user, name='Import tardio', value=Decimal('-9.00'))
+            return rows
+
+        with patch.object(bulk, '_lock', lock_then_insert):
+            self.assertEqual(bulk.delete(bulk.select(self.user, name='Import')), 5)
+
+        self.assertEqual(list(Transaction.objects.filter(user=self.user).values_list('name', flat=True)),
+                         ['Import tardio'])
+        self.assertEqual(ledger.verify([self.user.pk]), [])
+
+    def test_bulk_rename_bumps_ledger_version(self):
+        """Testa se a edição em massa só do nome também troca a versão do ledger"""
+        version = ledger.get_version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:bulk'), {
+                'action': 'update', 'ids': [t.pk for t in self.transactions], 'description': 'Lote',
+            })
+
+        self.assertNotEqual(ledger.get_version(self.user.pk), version)
+
+    def test_bulk_without_selection(self):
+        """Testa se a ação sem lançamentos selecionados não apaga nada"""
+        self.client.post(reverse('transactions:bulk'), {'action': 'delete'})
+
+        self.assertEqual(Transaction.objects.count(), 6)
@@ -1,13 +1,21 @@
 # transactions/urls.py
 
+from django.conf import settings
 from django.urls import path
-from .views import (TransactionListView, TransactionCreateView, TransactionUpdateView, TransactionDeleteView)
+from .views import (TransactionListView, TransactionSearchView, TransactionCreateView, TransactionUpdateView, TransactionDeleteView,
+                    TransactionBulkView, TransactionImportView, TransactionExportView, TransactionSeriesView,
+                    TransactionInsightsView, CategoryListView, CategoryDeleteView, RecurringRuleListView,
+                    RecurringRuleDeleteView, transaction_list_async)
+from . import api
 
 app_name = 'transactions'
 
 urlpatterns = [
-    # R: Read/Listar 
-    path('', TransactionListView.as_view(), name='list'),
+    # R: Read/Listar (versão assíncrona no modo ASGI)
+    path('', transaction_list_async if settings.ASYNC_VIEWS else TransactionListView.as_view(), name='list'),
+
+    # Busca por nome/descrição, ordenada por relevância (?q=...)
+    path('search/', TransactionSearchView.as_view(), name='search'),
 
     # C: Create/Criar 
     path('create/', TransactionCreateView.as_view(), name='create'),
@@ -17,4 +25,33 @@ urlpatterns = [
 
     # D: Delete/Deletar -> Página para confirmar a exclusão de um lançamento
     path('<int:pk>/delete/', TransactionDeleteView.as_view(), name='delete'),
+
+    # Exclusão/edição em massa dos lançamentos selecionados
+    path('bulk/', TransactionBulkView.as_view(), name='bulk'),
+
+    # Importação de extratos bancários (CSV/OFX) em lote
+    path('import/', TransactionImportView.as_view(), name='import'),
+
+    # Exportação do histórico completo (?format=csv ou ?format=json)
+    path('export/', TransactionExportView.as_view(), name='export'),
+
+    # Série de entradas/gastos por dia ou mês para gráficos (JSON)
+    path('series/', TransactionSeriesView.as_view(), name='series'),
+
+    # Insights de gastos: janelas de 30/90 dias, tendência, outliers e projeção do mês
+    path('insights/', TransactionInsightsView.as_view(), name='insights'),
+
+    # Categorias (listagem/criação e exclusão das do usuário)
+    path('categories/', CategoryListView.as_view(), name='categories'),
+    path('categories/<int:pk>/delete/', CategoryDeleteView.as_view(), name='category_delete'),
+
+    # Lançamentos recorrentes (regras); as ocorrências são geradas pelo materialize_recurring
+    path('recurring/', RecurringRuleListView.as_view(), name='recurring'),
+    path('recurring/<int:pk>/delete/', RecurringRuleDeleteView.as_view(), name='recurring_delete'),
+
+    # API JSON (lista/criação e detalhe/edição/exclusão) com ETag
+    path('api/', api.transaction_list, name='api_list'),
+    path('api/<int:pk>/', api.transaction_detail, name='api_detail'),
+    path('api/search/', api.transaction_search, name='api_search'),
+    path('api/bulk/', api.transaction_bulk, name='api_bulk'),
 ]
\ No newline at end of file
@@ -1,11 +1,22 @@
 # transactions/views.py
 
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.urls import reverse_lazy
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView
-from .models import Transaction
-from .forms import TransactionForm
+from django.views import View
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, FormView
+from django.core.exceptions import ValidationError
+from .models import Category, RecurringRule, Transaction
+from .forms import CategoryForm, RecurringRuleForm, TransactionForm, StatementImportForm
+from .archive import Archive
+from .pagination import apaginate, paginate
+from .importers import import_statement
+from .exporters import EXPORTERS
+from . import analytics, bulk, categories, recurring, rollups, search
 from django.contrib import messages
 
 # R
@@ -13,10 +24,63 @@ class TransactionListView(LoginRequiredMixin, ListView):
     model = Transaction
     template_name = 'transactions/transaction_list.html'
     context_object_name = 'transactions' 
+    page_size = 25
 
     def get_queryset(self):
         
-        return Transaction.objects.filter(user=self.request.user).order_by('-created_at')
+        return Transaction.objects.filter(user=self.request.user)
+
+    def get_context_data(self, **kwargs):
+        # Paginação por cursor (keyset) em vez do Paginator padrão, que usa OFFSET
+        # Passando da janela recente, a lista continua no arquivo frio
+        page = paginate(
+            self.object_list, self.request.GET.get('cursor'), self.page_size, archive=Archive(self.request.user.pk),
+        )
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context['page'] = page
+        return context
+
+
+@login_required
+async def transaction_list_async(request):
+    """TransactionListView para o modo ASGI (settings.ASYNC_VIEWS), com o ORM assíncrono."""
+    request.user = await request.auser()
+    page = await apaginate(
+        Transaction.objects.filter(user=request.user), request.GET.get('cursor'), TransactionListView.page_size,
+        archive=Archive(request.user.pk),
+    )
+    return render(request, TransactionListView.template_name, {
+        'object_list': page.object_list,
+        'transactions': page.object_list,
+        'page': page,
+    })
+
+
+class TransactionSearchView(LoginRequiredMixin, ListView):
+    template_name = 'transactions/transaction_list.html'
+    context_object_name = 'transactions'
+    page_size = 25
+
+    def get_page_number(self):
+        try:
+            return max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            return 1
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        self.page_number = self.get_page_number()
+        results, self.has_next = search.search(self.request.user, self.query, self.page_number, self.page_size)
+        return results
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['page'] = search.SearchPage(self.object_list, self.query, self.page_number, self.has_next)
+        # Os lançamentos arquivados não têm termos no índice: a busca fica na janela recente
+        newest = Archive(self.request.user.pk).newest
+        context['archived_until'] = newest and newest[0]
+        return context
 
 # C
 class TransactionCreateView(LoginRequiredMixin, CreateView):
@@ -25,19 +89,33 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
     template_name = 'transactions/transaction_form.html'
     success_url = reverse_lazy('transactions:list')
 
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), 'user': self.request.user}
+
     def form_valid(self, form):
         
         form.instance.user = self.request.user
         messages.success(self.request, "Lançamento adicionado com sucesso!")
         return super().form_valid(form)
 
+class OwnedObjectMixin:
+    """Reaproveita o objeto buscado no test_func, em vez de buscá-lo de novo na view."""
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object(queryset)
+        return self._object
+
 # U
-class TransactionUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class TransactionUpdateView(OwnedObjectMixin, LoginRequiredMixin, UserPassesTestMixin, UpdateView):
     model = Transaction
     form_class = TransactionForm
     template_name = 'transactions/transaction_form.html'
     success_url = reverse_lazy('transactions:list')
 
+    def get_form_kwargs(self):
+        return {**super().get_form_kwargs(), 'user': self.request.user}
+
     def form_valid(self, form):
         messages.success(self.request, "Lançamento atualizado com sucesso!")
         return super().form_valid(form)
@@ -45,10 +123,10 @@ class TransactionUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView)
     def test_func(self):
         
         transaction = self.get_object()
-        return self.request.user == transaction.user
+        return self.request.user.pk == transaction.user_id
 
 # D:
-class TransactionDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
+class TransactionDeleteView(OwnedObjectMixin, LoginRequiredMixin, UserPassesTestMixin, DeleteView):
     model = Transaction
     template_name = 'transactions/transaction_confirm_delete.html'
     success_url = reverse_lazy('transactions:list')
@@ -56,8 +134,176 @@ class TransactionDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView)
     def test_func(self):
         
         transaction = self.get_object()
-        return self.request.user == transaction.user
+        return self.request.user.pk == transaction.user_id
     
     def form_valid(self, form):
         messages.success(self.request, "Lançamento excluído com sucesso!")
-        return super().form_valid(form)
\ No newline at end of file
+        return super().form_valid(form)
+
+# Exclusão/edição em massa dos lançamentos selecionados na lista
+class TransactionBulkView(LoginRequiredMixin, View):
+
+    def post(self, request, *args, **kwargs):
+        action = request.POST.get('action')
+        try:
+            queryset = bulk.select(request.user, ids=request.POST.getlist('ids') or None)
+            if action == 'delete':
+                count = bulk.delete(queryset)
+                messages.success(request, f"{count} lançamentos excluídos.")
+            elif action == 'update':
+                data = {field: request.POST[field] for field in bulk.EDITABLE_FIELDS if request.POST.get(field, '').strip()}
+                count = bulk.update(queryset, bulk.clean_fields(data))
+                messages.success(request, f"{count} lançamentos atualizados.")
+            else:
+                messages.error(request, "Ação inválida.")
+        except ValidationError as error:
+            messages.error(request, ' '.join(error.messages))
+        return redirect('transactions:list')
+
+# Importação de extratos (CSV/OFX)
+class TransactionImportView(LoginRequiredMixin, FormView):
+    form_class = StatementImportForm
+    template_name = 'transactions/transaction_import.html'
+    success_url = reverse_lazy('transactions:list')
+
+    def form_valid(self, form):
+        try:
+            result = import_statement(self.request.user, form.cleaned_data['file'].file, form.cleaned_data['format'])
+        except ValidationError as error:
+            form.add_error('file', error)
+            return self.form_invalid(form)
+
+        messages.success(
+            self.request,
+            f"{result.created} lançamentos importados em {result.elapsed:.1f}s "
+            f"({result.rows_per_second:.0f} linhas/s)."
+        )
+        if result.skipped:
+            details = '; '.join(f'linha {line}: {message}' for line, message in result.errors)
+            messages.warning(self.request, f"{result.skipped} linhas ignoradas. {details}")
+        return super().form_valid(form)
+
+# Exportação do histórico completo (CSV/JSON) como stream
+class TransactionExportView(LoginRequiredMixin, View):
+
+    def get(self, request, *args, **kwargs):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORTERS:
+            raise Http404('Formato de exportação desconhecido.')
+
+        exporter, content_type = EXPORTERS[fmt]
+        response = StreamingHttpResponse(
+            exporter(Transaction.objects.filter(user=request.user), archive=Archive(request.user.pk)),
+            content_type=content_type,
+        )
+        filename = f"lancamentos-{timezone.localdate():%Y%m%d}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+# Série temporal (entradas/gastos por dia ou mês) para os gráficos
+class TransactionSeriesView(LoginRequiredMixin, View):
+    # Limite de buckets por resposta, para a série ficar O(buckets) e pequena
+    max_buckets = 400
+
+    def get(self, request, *args, **kwargs):
+        granularity = request.GET.get('granularity', rollups.MONTH)
+        if granularity not in rollups.MODELS:
+            return JsonResponse({'error': 'granularity deve ser day ou month.'}, status=400)
+
+        start, end = rollups.default_range(granularity)
+        try:
+            start = parse_date(request.GET['start']) if 'start' in request.GET else start
+            end = parse_date(request.GET['end']) if 'end' in request.GET else end
+        except ValueError:
+            start = end = None
+        if start is None or end is None or start > end:
+            return JsonResponse({'error': 'start/end devem ser datas YYYY-MM-DD com start <= end.'}, status=400)
+
+        span = (end - start).days + 1 if granularity == rollups.DAY else \
+            (end.year - start.year) * 12 + end.month - start.month + 1
+        if span > self.max_buckets:
+            return JsonResponse({'error': f'Intervalo maior que {self.max_buckets} períodos.'}, status=400)
+
+        return JsonResponse({
+            'granularity': granularity,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'buckets': rollups.series(request.user, granularity, start, end),
+        })
+
+
+class TransactionInsightsView(LoginRequiredMixin, View):
+    template_name = 'transactions/transaction_insights.html'
+
+    def get(self, request, *args, **kwargs):
+        # Indicadores vetorizados (transactions.analytics), em cache pela versão do ledger
+        return render(request, self.template_name, analytics.get_insights(request.user))
+
+
+# Categorias: as padrão e as criadas pelo usuário
+class CategoryListView(LoginRequiredMixin, View):
+    template_name = 'transactions/category_list.html'
+
+    def render(self, request, form):
+        return render(request, self.template_name, {
+            'form': form,
+            'categories': categories.available(request.user),
+        })
+
+    def get(self, request, *args, **kwargs):
+        return self.render(request, CategoryForm(user=request.user))
+
+    def post(self, request, *args, **kwargs):
+        form = CategoryForm(request.POST, user=request.user)
+        if not form.is_valid():
+            return self.render(request, form)
+        form.instance.user = request.user
+        form.save()
+        messages.success(request, "Categoria criada com sucesso!")
+        return redirect('transactions:categories')
+
+
+class CategoryDeleteView(LoginRequiredMixin, View):
+
+    def post(self, request, pk, *args, **kwargs):
+        # Só as categorias do próprio usuário; as padrão não podem ser apagadas
+        category = Category.objects.filter(pk=pk, user=request.user).first()
+        if category is None:
+            raise Http404
+        category.delete()
+        messages.success(request, "Categoria excluída. Os lançamentos dela ficaram sem categoria.")
+        return redirect('transactions:categories')
+
+
+class RecurringRuleListView(LoginRequiredMixin, View):
+    template_name = 'transactions/recurring_list.html'
+
+    def render(self, request, form):
+        return render(request, self.template_name, {
+            'form': form,
+            'rules': RecurringRule.objects.filter(user=request.user).select_related('category'),
+        })
+
+    def get(self, request, *args, **kwargs):
+        return self.render(request, RecurringRuleForm(user=request.user))
+
+    def post(self, request, *args, **kwargs):
+        form = RecurringRuleForm(request.POST, user=request.user)
+        if not form.is_valid():
+            return self.render(request, form)
+        form.instance.user = request.user
+        rule = form.save()
+        # Ocorrências já vencidas (início no passado) aparecem na hora, sem esperar o agendador
+        result = recurring.materialize(rules=RecurringRule.objects.filter(pk=rule.pk))
+        messages.success(request, f"Lançamento recorrente criado! {result.created} ocorrência(s) lançada(s).")
+        return redirect('transactions:recurring')
+
+
+class RecurringRuleDeleteView(LoginRequiredMixin, View):
+
+    def post(self, request, pk, *args, **kwargs):
+        deleted, _ = RecurringRule.objects.filter(pk=pk, user=request.user).delete()
+        if not deleted:
+            raise Http404
+        messages.success(request, "Lançamento recorrente excluído. Os lançamentos já gerados foram mantidos.")
+        return redirect('transactions:recurring')
@@ -1,4 +1,43 @@
 from django.contrib import admin
-from .models import Profile
+from django.contrib.auth import admin as auth_admin
+from django.contrib.auth.models import User
+
+from . import purge
+from .models import AccountPurge, Profile
 
 admin.site.register(Profile)
+
+
+class UserAdmin(auth_admin.UserAdmin):
+    """Excluir um usuário pelo admin agenda a exclusão em lotes (users.purge) em vez do CASCADE."""
+
+    def get_deleted_objects(self, objs, request):
+        # Não coleta o histórico só para montar a página de confirmação
+        deleted = [f'{user} (dados apagados em segundo plano)' for user in objs]
+        return deleted, {User._meta.verbose_name_plural: len(deleted)}, set(), []
+
+    def delete_model(self, request, obj):
+        purge.request(obj)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            purge.request(user)
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
+
+
+@admin.register(AccountPurge)
+class AccountPurgeAdmin(admin.ModelAdmin):
+    list_display = ('username', 'user_id', 'status', 'step', 'progress', 'requested_at', 'finished_at')
+    list_filter = ('status',)
+    search_fields = ('username',)
+    readonly_fields = [field.name for field in AccountPurge._meta.fields]
+
+    @admin.display(description='Progresso (%)')
+    def progress(self, obj):
+        return obj.progress
+
+    def has_add_permission(self, request):
+        return False
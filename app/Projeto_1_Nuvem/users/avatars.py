@@ -0,0 +1,132 @@
+# users/avatars.py
+"""
+Processamento dos avatares fora da requisição.
+
+Quando o arquivo do avatar muda, Profile.save() agenda (após o commit) a
+geração das versões reduzidas em SIZES, cada uma em WebP e em JPEG. O
+trabalho roda numa thread de fundo do próprio worker, alimentada por uma
+fila local; com AVATAR_PROCESSING='sync' roda na hora (testes, scripts).
+Enquanto as versões não existem, o template usa o arquivo original.
+
+As versões ficam em Profile.avatar_variants, junto com o nome do arquivo de
+origem; se o avatar mudar de novo antes do fim do processamento, o resultado
+antigo é descartado. `python manage.py process_avatars` reprocessa o que
+estiver pendente (por exemplo depois de um restart com a fila cheia).
+"""
+import logging
+import queue
+import threading
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AVATAR = 'default.jpg'
+
+# Lados (px) gerados; o template escolhe o menor que cobre 1x e 2x
+SIZES = (48, 96, 240)
+FORMATS = (('webp', 'WEBP', 'image/webp'), ('jpg', 'JPEG', 'image/jpeg'))
+QUALITY = 85
+
+DERIVED_DIR = 'profile_images/derived'
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def variant_key(size, extension):
+    return f'{size}.{extension}'
+
+
+def is_current(profile):
+    """True se as versões derivadas correspondem ao avatar atual."""
+    return bool(profile.avatar_variants) and profile.avatar_variants.get('source') == profile.avatar.name
+
+
+def needs_processing(profile):
+    return profile.avatar.name not in ('', DEFAULT_AVATAR) and not is_current(profile)
+
+
+def enqueue(profile_id):
+    if settings.AVATAR_PROCESSING == 'sync':
+        process(profile_id)
+        return
+    _ensure_worker()
+    _queue.put(profile_id)
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name='avatar-worker', daemon=True)
+            _worker.start()
+
+
+def _run():
+    while True:
+        profile_id = _queue.get()
+        close_old_connections()
+        try:
+            process(profile_id)
+        except Exception:
+            logger.exception('Falha ao processar o avatar do perfil %s', profile_id)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def render_variants(image, stem):
+    """Gera os arquivos de cada tamanho/formato e retorna {chave: nome no storage}."""
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    variants = {}
+    for size in SIZES:
+        thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        for extension, pil_format, _ in FORMATS:
+            buffer = BytesIO()
+            thumbnail.save(buffer, pil_format, quality=QUALITY)
+            name = f'{DERIVED_DIR}/{stem}-{size}.{extension}'
+            variants[variant_key(size, extension)] = default_storage.save(name, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def process(profile_id):
+    from . import loader
+    from .models import Profile
+
+    profile = Profile.objects.filter(pk=profile_id).first()
+    if profile is None or not needs_processing(profile):
+        return
+    source = profile.avatar.name
+    with default_storage.open(source) as handle:
+        image = Image.open(handle)
+        image.load()
+
+    variants = render_variants(image, PurePosixPath(source).stem)
+    variants['source'] = source
+    # Só grava se o avatar ainda for o mesmo; senão descarta o que foi gerado
+    if Profile.objects.filter(pk=profile_id, avatar=source).update(avatar_variants=variants):
+        _delete_files(profile.avatar_variants)
+        loader.invalidate(profile.user_id)
+    else:
+        _delete_files(variants)
+
+
+def delete_files(profile):
+    """Apaga o avatar enviado e as versões reduzidas (o avatar padrão fica)."""
+    _delete_files(profile.avatar_variants)
+    if profile.avatar.name not in ('', DEFAULT_AVATAR):
+        default_storage.delete(profile.avatar.name)
+
+
+def _delete_files(variants):
+    for key, name in (variants or {}).items():
+        if key != 'source':
+            default_storage.delete(name)
@@ -0,0 +1,123 @@
+# users/dashboard.py
+"""
+Resumo do dashboard (totais, percentuais, gastos por categoria e lançamentos
+recentes) com cache.
+
+A chave inclui a versão do ledger do usuário (transactions.ledger), que muda
+a cada escrita em Transaction. Enquanto o usuário não escreve nada, visitas
+repetidas ao dashboard saem inteiramente do cache, sem consultar o banco.
+
+aget_summary() é a versão para a view assíncrona (modo ASGI): o Ledger, os
+totais por categoria e os lançamentos recentes são buscados em paralelo com
+asyncio.gather.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from transactions import categories, ledger
+from transactions.models import Transaction
+
+HITS_KEY = 'dashboard:stats:hits'
+MISSES_KEY = 'dashboard:stats:misses'
+
+
+def recent_queryset(user):
+    return Transaction.objects.filter(user=user).order_by('-created_at', '-id')[:10]
+
+
+def build_summary(user):
+    """Calcula o resumo do dashboard direto do banco."""
+    return summarize(ledger.get_for_user(user), list(recent_queryset(user)), categories.breakdown(user))
+
+
+async def abuild_summary(user):
+    user_ledger, recent_transactions, category_totals = await asyncio.gather(
+        sync_to_async(ledger.get_for_user)(user),
+        _alist(recent_queryset(user)),
+        sync_to_async(categories.breakdown)(user),
+    )
+    return summarize(user_ledger, recent_transactions, category_totals)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def summarize(user_ledger, recent_transactions, category_totals=()):
+    positiveTotal = user_ledger.income_total
+    negativeTotal = user_ledger.expense_total
+
+    balance = positiveTotal + negativeTotal
+
+    total_flow = positiveTotal + abs(negativeTotal)
+
+    if total_flow > 0:
+        incomePercentage = int((positiveTotal / total_flow) * 100)
+        expensePercentage = int((abs(negativeTotal) / total_flow) * 100)
+    else:
+        incomePercentage = 0
+        expensePercentage = 0
+
+    return {
+        'balance': balance,
+        'positiveTotal': positiveTotal,
+        'negativeTotal': abs(negativeTotal),
+        'incomePercentage': incomePercentage,
+        'expensePercentage': expensePercentage,
+        'data_transactions': recent_transactions,
+        'category_totals': list(category_totals),
+    }
+
+
+def get_summary(user):
+    """Retorna o resumo do cache, calculando-o apenas quando a versão mudou."""
+    key = f'dashboard:{user.pk}:{ledger.get_version(user.pk)}'
+    summary = cache.get(key)
+    if summary is None:
+        _count(MISSES_KEY)
+        summary = build_summary(user)
+        cache.set(key, summary, settings.DASHBOARD_CACHE_TIMEOUT)
+    else:
+        _count(HITS_KEY)
+    return summary
+
+
+async def aget_summary(user):
+    key = f'dashboard:{user.pk}:{await sync_to_async(ledger.get_version)(user.pk)}'
+    summary = await cache.aget(key)
+    if summary is None:
+        await sync_to_async(_count)(MISSES_KEY)
+        summary = await abuild_summary(user)
+        await cache.aset(key, summary, settings.DASHBOARD_CACHE_TIMEOUT)
+    else:
+        await sync_to_async(_count)(HITS_KEY)
+    return summary
+
+
+def _count(key):
+    # Contadores no próprio cache para somar os acessos de todos os workers
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def stats():
+    """Acertos/erros acumulados do cache do dashboard."""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
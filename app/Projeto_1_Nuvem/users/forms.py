@@ -111,3 +111,22 @@ class UpdateProfileForm(forms.ModelForm):
     class Meta:
         model = Profile
         fields = ['avatar', 'bio']
+
+
+class DeleteAccountForm(forms.Form):
+    # Contas criadas pelo login social não têm senha: basta a confirmação
+    password = forms.CharField(required=False,
+                               widget=forms.PasswordInput(attrs={'class': 'form-control',
+                                                                 'autocomplete': 'current-password'}))
+    confirm = forms.BooleanField(required=True)
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user = user
+        self.fields['password'].required = user.has_usable_password()
+
+    def clean_password(self):
+        password = self.cleaned_data['password']
+        if self.user.has_usable_password() and not self.user.check_password(password):
+            raise forms.ValidationError('Senha incorreta.')
+        return password
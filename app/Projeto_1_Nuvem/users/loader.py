@@ -0,0 +1,66 @@
+# users/loader.py
+"""
+Carregamento do usuário da requisição com o perfil junto, e cache opcional.
+
+`get_user` faz o mesmo que django.contrib.auth.get_user, mas busca o usuário
+com select_related('profile') (o base.html sempre mostra o avatar) e, com
+USER_CACHE_TIMEOUT > 0, guarda o usuário no cache compartilhado. A
+verificação do hash da sessão continua acontecendo a cada requisição; em
+qualquer caso fora do caminho comum (outro backend, hash diferente, usuário
+inativo) a decisão fica com o get_user do Django.
+
+O cache é invalidado no post_save/post_delete de User e Profile
+(users.models). Alterações feitas com QuerySet.update() não passam pelos
+sinais e só aparecem quando a entrada expira.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model, load_backend
+from django.contrib.auth import get_user as get_user_from_backend
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.utils.crypto import constant_time_compare
+
+
+def cache_key(user_id):
+    return f'user:{user_id}'
+
+
+def invalidate(user_id):
+    # Depois do commit, para uma leitura concorrente não recolocar o valor antigo
+    db_transaction.on_commit(partial(cache.delete, cache_key(user_id)))
+
+
+def fetch(user_id):
+    timeout = settings.USER_CACHE_TIMEOUT
+    if timeout:
+        user = cache.get(cache_key(user_id))
+        if user is not None:
+            return user
+    user = get_user_model().objects.select_related('profile').filter(pk=user_id).first()
+    if user is not None and timeout:
+        cache.set(cache_key(user_id), user, timeout)
+    return user
+
+
+def get_user(request):
+    session = request.session
+    backend_path = session.get(BACKEND_SESSION_KEY)
+    if SESSION_KEY not in session or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return get_user_from_backend(request)
+    backend = load_backend(backend_path)
+    if not isinstance(backend, ModelBackend):
+        return get_user_from_backend(request)
+
+    user = fetch(get_user_model()._meta.pk.to_python(session[SESSION_KEY]))
+    session_hash = session.get(HASH_SESSION_KEY)
+    if (
+        user is None
+        or not backend.user_can_authenticate(user)
+        or not session_hash
+        or not constant_time_compare(session_hash, user.get_session_auth_hash())
+    ):
+        return get_user_from_backend(request)
+    return user
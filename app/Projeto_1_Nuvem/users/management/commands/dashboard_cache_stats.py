@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from users import dashboard
+
+
+class Command(BaseCommand):
+    help = 'Mostra acertos/erros do cache do dashboard (somados entre os workers num cache compartilhado).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zera os contadores depois de mostrar.')
+
+    def handle(self, *args, **options):
+        stats = dashboard.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit_ratio={stats['hit_ratio']:.2%}"
+        )
+        if options['reset']:
+            dashboard.reset_stats()
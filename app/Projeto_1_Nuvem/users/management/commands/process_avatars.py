@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from users import avatars
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = 'Gera as versões reduzidas (WebP/JPEG) dos avatares que ainda não foram processados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Reprocessa também os avatares já processados.')
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(avatar__in=['', avatars.DEFAULT_AVATAR]).only('pk', 'avatar', 'avatar_variants')
+        processed = 0
+        for profile in profiles.iterator():
+            if options['all']:
+                Profile.objects.filter(pk=profile.pk).update(avatar_variants={})
+            elif not avatars.needs_processing(profile):
+                continue
+            avatars.process(profile.pk)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(f'{processed} avatares processados.'))
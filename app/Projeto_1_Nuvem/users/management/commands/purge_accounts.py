@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from users import purge
+
+
+class Command(BaseCommand):
+    help = 'Retoma as exclusões de conta pendentes, interrompidas ou que falharam, apagando os dados em lotes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help=f'Registros por transação (padrão: {purge.BATCH_SIZE}).')
+
+    def handle(self, *args, **options):
+        finished = 0
+        for purge_id in list(purge.pending().values_list('pk', flat=True)):
+            try:
+                if purge.run(purge_id, options['batch_size']):
+                    finished += 1
+            except Exception as exc:
+                # Fica como 'failed', com o erro no AccountPurge; as outras seguem
+                self.stderr.write(f'Falha ao excluir a conta (AccountPurge {purge_id}): {exc!r}')
+        self.stdout.write(self.style.SUCCESS(f'{finished} contas excluídas.'))
@@ -0,0 +1,21 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import loader
+
+
+class CachedUserMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware com o usuário e o perfil vindos de users.loader."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: loader.get_user(request))
+        request.auser = lambda: aget_user(request)
+
+
+async def aget_user(request):
+    # Versão para views assíncronas; a sessão e o loader são síncronos
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(loader.get_user)(request)
+    return request._acached_user
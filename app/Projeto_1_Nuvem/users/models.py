@@ -1,7 +1,8 @@
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from PIL import Image
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 
@@ -10,22 +11,66 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     avatar = models.ImageField(default='default.jpg', upload_to='profile_images')
     bio = models.TextField(blank=True)
+    # Versões reduzidas do avatar: {"48.webp": nome, ..., "source": avatar de origem}
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.user.username
 
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Nome do avatar carregado, para só reprocessar quando o arquivo muda
+        instance._loaded_avatar = instance.__dict__.get('avatar')
+        return instance
+
     def save(self, *args, **kwargs):
+        from . import avatars
 
         super().save(*args, **kwargs)
 
+        # As versões reduzidas são geradas fora da requisição (users.avatars)
+        if self.avatar.name != getattr(self, '_loaded_avatar', None) and avatars.needs_processing(self):
+            transaction.on_commit(partial(avatars.enqueue, self.pk))
+        self._loaded_avatar = self.avatar.name
+
 
-        img = Image.open(self.avatar.path)
+class AccountPurge(models.Model):
+    """Exclusão de uma conta em segundo plano (users.purge), com o progresso de cada etapa."""
 
-        if img.height > 100 or img.width > 100:
-            output_size = (100, 100)
-            img.thumbnail(output_size)
-            img.save(self.avatar.path) 
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Na fila'),
+        (RUNNING, 'Em andamento'),
+        (DONE, 'Concluída'),
+        (FAILED, 'Falhou'),
+    ]
+
+    # Sem ForeignKey: o usuário é apagado no fim e o registro fica como histórico
+    user_id = models.IntegerField(unique=True)
+    username = models.CharField(max_length=150)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    step = models.CharField(max_length=20, blank=True)
+    # Lançamentos no início (ledger) e quantos registros já saíram, por etapa
+    total_transactions = models.PositiveIntegerField(default=0)
+    deleted = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    requested_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.username} ({self.get_status_display()})'
+
+    @property
+    def progress(self):
+        """Porcentagem dos lançamentos já apagados."""
+        if self.status == self.DONE:
+            return 100
+        if not self.total_transactions:
+            return 0
+        return min(100 * self.deleted.get('transactions', 0) // self.total_transactions, 99)
 
 
 @receiver(post_save, sender=User)
@@ -34,8 +79,10 @@ def create_user_profile(sender, instance, created, **kwargs):
     if created:
         Profile.objects.create(user=instance)
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
 
-    instance.profile.save()
-            
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Profile)
+def invalidate_cached_user(sender, instance, **kwargs):
+    from . import loader
+
+    loader.invalidate(instance.pk if sender is User else instance.user_id)
@@ -0,0 +1,208 @@
+# users/purge.py
+"""
+Exclusão de contas em lotes, fora da requisição.
+
+Apagar um User direto faz o Django coletar e apagar todo o histórico dele
+(lançamentos, termos de busca, buckets) numa transação só, segurando
+travas e memória proporcionais ao histórico. `request()` só desativa a
+conta (sem senha, sem login, sessões invalidadas), pausa as regras
+recorrentes e registra um AccountPurge; a exclusão roda depois do commit
+numa thread de fundo do worker, como os avatares (com ACCOUNT_PURGE='sync'
+roda na hora).
+
+`run()` percorre as etapas em STEPS, cada lote de BATCH_SIZE registros na
+sua própria transação, e grava a etapa e as contagens no AccountPurge a
+cada lote. Apagar é idempotente: uma exclusão interrompida (restart,
+falha) continua da etapa em que parou com `python manage.py purge_accounts`.
+O User só é apagado no fim, quando não sobra nada para o CASCADE coletar.
+"""
+import logging
+import queue
+import threading
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+from social_django.models import UserSocialAuth
+
+from transactions import archive
+from transactions.models import (
+    ArchiveSegment, Category, CategoryTotal, DailyRollup, Ledger, MonthlyRollup, RecurringRule, Transaction,
+)
+
+from . import avatars
+from .models import AccountPurge, Profile
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+# Uma exclusão 'running' sem progresso há mais que isso é retomada (worker morreu)
+LEASE = timedelta(minutes=5)
+
+_queue = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def request(user):
+    """Desativa a conta e agenda a exclusão dos dados. Retorna o AccountPurge."""
+    with db_transaction.atomic():
+        user.is_active = False
+        # Muda o hash da sessão: as outras sessões abertas da conta caem também
+        user.set_unusable_password()
+        user.save(update_fields=['is_active', 'password'])
+        # next_date vazio tira as regras do agendador enquanto a exclusão não chega nelas
+        RecurringRule.objects.filter(user=user).update(next_date=None)
+        total = Ledger.objects.filter(user=user).values_list('transaction_count', flat=True).first()
+        purge, _ = AccountPurge.objects.get_or_create(
+            user_id=user.pk, defaults={'username': user.username, 'total_transactions': total or 0},
+        )
+        db_transaction.on_commit(partial(enqueue, purge.pk))
+    return purge
+
+
+def enqueue(purge_id):
+    if settings.ACCOUNT_PURGE == 'sync':
+        run(purge_id)
+        return
+    _ensure_worker()
+    _queue.put(purge_id)
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run, name='purge-worker', daemon=True)
+            _worker.start()
+
+
+def _run():
+    while True:
+        purge_id = _queue.get()
+        close_old_connections()
+        try:
+            run(purge_id)
+        except Exception:
+            logger.exception('Falha ao excluir a conta (AccountPurge %s)', purge_id)
+        finally:
+            close_old_connections()
+            _queue.task_done()
+
+
+def _batches(queryset, batch_size, before=None):
+    """
+    Apaga `queryset` em lotes de `batch_size` pks, um por transação, chamando
+    `before(pks)` antes de cada DELETE. Gera quantos registros saíram por lote.
+    """
+    model = queryset.model
+    while True:
+        with db_transaction.atomic():
+            pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return
+            if before is not None:
+                before(pks)
+            model.objects.filter(pk__in=pks).delete()
+        yield len(pks)
+
+
+def _delete_transactions(user_id, batch_size):
+    yield from _batches(Transaction.objects.filter(user_id=user_id), batch_size)
+
+
+def _delete_archive(user_id, batch_size):
+    # Os lançamentos arquivados contam como lançamentos no progresso
+    storage = archive.get_storage()
+    for segment in ArchiveSegment.objects.filter(user_id=user_id).order_by('pk'):
+        storage.delete(segment.path)
+        segment.delete()
+        yield segment.transaction_count
+
+
+def _delete_totals(user_id, batch_size):
+    for model in (DailyRollup, MonthlyRollup, CategoryTotal):
+        yield from _batches(model.objects.filter(user_id=user_id), batch_size)
+    yield Ledger.objects.filter(user_id=user_id).delete()[0]
+
+
+def _delete_rules(user_id, batch_size):
+    yield from _batches(RecurringRule.objects.filter(user_id=user_id), batch_size)
+
+
+def _delete_categories(user_id, batch_size):
+    yield from _batches(Category.objects.filter(user_id=user_id), batch_size)
+
+
+def _delete_social_auth(user_id, batch_size):
+    yield from _batches(UserSocialAuth.objects.filter(user_id=user_id), batch_size)
+
+
+def _delete_profile(user_id, batch_size):
+    def delete_avatars(pks):
+        for profile in Profile.objects.filter(pk__in=pks):
+            avatars.delete_files(profile)
+
+    yield from _batches(Profile.objects.filter(user_id=user_id), batch_size, before=delete_avatars)
+
+
+def _delete_user(user_id, batch_size):
+    yield User.objects.filter(pk=user_id).delete()[0]
+
+
+# Etapas na ordem: as regras e categorias saem depois dos lançamentos, então
+# os SET_NULL deles não viram um UPDATE em todo o histórico
+STEPS = (
+    ('transactions', _delete_transactions),
+    ('archive', _delete_archive),
+    ('totals', _delete_totals),
+    ('recurring', _delete_rules),
+    ('categories', _delete_categories),
+    ('social_auth', _delete_social_auth),
+    ('profile', _delete_profile),
+    ('user', _delete_user),
+)
+
+
+def pending():
+    """Exclusões por terminar: na fila, que falharam ou paradas há mais que LEASE."""
+    return AccountPurge.objects.filter(
+        Q(status__in=[AccountPurge.PENDING, AccountPurge.FAILED])
+        | Q(status=AccountPurge.RUNNING, updated_at__lt=timezone.now() - LEASE)
+    )
+
+
+def _claim(purge_id):
+    """Marca a exclusão como em andamento, se ninguém estiver cuidando dela."""
+    return pending().filter(pk=purge_id).update(status=AccountPurge.RUNNING, error='', updated_at=timezone.now())
+
+
+def run(purge_id, batch_size=None):
+    """Executa (ou retoma) a exclusão `purge_id`. Retorna False se outra execução já cuida dela."""
+    if not _claim(purge_id):
+        return False
+    batch_size = batch_size or BATCH_SIZE
+    purge = AccountPurge.objects.get(pk=purge_id)
+    names = [name for name, _ in STEPS]
+    start = names.index(purge.step) if purge.step in names else 0
+    try:
+        for name, step in STEPS[start:]:
+            purge.step = name
+            purge.save(update_fields=['step', 'updated_at'])
+            for count in step(purge.user_id, batch_size):
+                key = 'transactions' if name == 'archive' else name
+                purge.deleted[key] = purge.deleted.get(key, 0) + count
+                purge.save(update_fields=['deleted', 'updated_at'])
+    except Exception as exc:
+        purge.status, purge.error = AccountPurge.FAILED, repr(exc)
+        purge.save(update_fields=['status', 'error', 'updated_at'])
+        raise
+    purge.status, purge.finished_at = AccountPurge.DONE, timezone.now()
+    purge.save(update_fields=['status', 'finished_at', 'updated_at'])
+    return True
+
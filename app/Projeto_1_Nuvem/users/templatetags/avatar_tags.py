@@ -0,0 +1,44 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from users import avatars
+
+register = template.Library()
+
+
+def _pick(size):
+    """Menor versão gerada com pelo menos `size` px (ou a maior de todas)."""
+    return next((candidate for candidate in avatars.SIZES if candidate >= size), avatars.SIZES[-1])
+
+
+@register.simple_tag
+def avatar(profile, size, css_class='', alt=''):
+    """<picture> com WebP e JPEG no tamanho certo (1x e 2x); usa o original se ainda não houver versões."""
+    size = int(size)
+    if not profile:
+        # Páginas anônimas (user.profile vira '' no template): avatar padrão
+        return format_html(
+            '<img src="{}" class="{}" alt="{}">', default_storage.url(avatars.DEFAULT_AVATAR), css_class, alt,
+        )
+    if not avatars.is_current(profile):
+        return format_html('<img src="{}" class="{}" alt="{}">', profile.avatar.url, css_class, alt)
+
+    variants = profile.avatar_variants
+    one, two = _pick(size), _pick(size * 2)
+
+    def srcset(extension):
+        return ', '.join(
+            f'{default_storage.url(variants[avatars.variant_key(candidate, extension)])} {density}'
+            for candidate, density in ((one, '1x'), (two, '2x'))
+        )
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}">',
+        ((content_type, srcset(extension)) for extension, _, content_type in avatars.FORMATS[:-1]),
+    )
+    fallback = default_storage.url(variants[avatars.variant_key(one, avatars.FORMATS[-1][0])])
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" width="{}" height="{}" class="{}" alt="{}"></picture>',
+        sources, fallback, srcset(avatars.FORMATS[-1][0]), size, size, css_class, alt,
+    )
@@ -0,0 +1,80 @@
+# users/test_async.py
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+from transactions import urls as transaction_urls
+from transactions.models import Transaction
+from transactions.views import transaction_list_async
+from users import urls as user_urls
+from users.views import ahome
+from decimal import Decimal
+
+# URLs do modo ASGI (settings.ASYNC_VIEWS), montadas aqui porque as do projeto
+# escolhem as views na importação
+urlpatterns = [
+    path('', include(([path('home/', ahome, name='home')] + user_urls.urlpatterns, 'users'))),
+    path('transactions/', include(
+        ([path('', transaction_list_async, name='list')] + transaction_urls.urlpatterns, 'transactions'),
+    )),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewsTestCase(TestCase):
+    """Tests para as views assíncronas do modo ASGI"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='asyncuser', password='testpass123')
+        cache.clear()
+
+    async def test_home_requires_login(self):
+        """Testa se a home assíncrona redireciona sem login"""
+        response = await self.async_client.get(reverse('users:home'))
+
+        self.assertEqual(response.status_code, 302)
+
+    async def test_home_totals(self):
+        """Testa os totais e recentes do dashboard na view assíncrona"""
+        await Transaction.objects.acreate(user=self.user, name='Salary', value=Decimal('1000.00'))
+        await Transaction.objects.acreate(user=self.user, name='Rent', value=Decimal('-250.00'))
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('users:home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['balance'], Decimal('750.00'))
+        self.assertEqual(response.context['incomePercentage'], 80)
+        self.assertEqual(len(response.context['data_transactions']), 2)
+        self.assertEqual(response.context['user'], self.user)
+
+    async def test_home_uses_versioned_cache(self):
+        """Testa se a segunda visita vem do cache do dashboard"""
+        await self.async_client.aforce_login(self.user)
+        await self.async_client.get(reverse('users:home'))
+
+        response = await self.async_client.get(reverse('users:home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['balance'], Decimal('0.00'))
+
+    async def test_list_paginates_with_cursor(self):
+        """Testa a lista assíncrona com a mesma paginação por cursor da síncrona"""
+        await Transaction.objects.abulk_create([
+            Transaction(user=self.user, name=f'T{i}', value=Decimal('1.00')) for i in range(30)
+        ])
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.get(reverse('transactions:list'))
+        page = response.context['page']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['transactions']), 25)
+        self.assertTrue(page.has_next)
+
+        response = await self.async_client.get(reverse('transactions:list') + '?' + page.next_query)
+
+        self.assertEqual(len(response.context['transactions']), 5)
+        self.assertFalse(response.context['page'].has_next)
+        self.assertTrue(response.context['page'].has_previous)
@@ -1,8 +1,17 @@
 """
 Unit tests para User Model
 """
-from django.test import TestCase
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image
+from users import avatars
 from users.models import Profile
 
 
@@ -79,3 +88,59 @@ class UserModelTestCase(TestCase):
         
         # Verificar que a relação 'transactions' está disponível
         self.assertTrue(hasattr(user, 'transactions'))
+
+
+@override_settings(AVATAR_PROCESSING='sync')
+class AvatarProcessingTestCase(TestCase):
+    """Tests para o processamento dos avatares (users.avatars)"""
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='avataruser', password='testpass123')
+
+    def upload(self, size=(800, 600)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+        return SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_new_avatar_generates_variants(self):
+        """Testa se trocar o avatar gera as versões WebP e JPEG de cada tamanho"""
+        profile = self.user.profile
+        profile.avatar = self.upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+
+        profile.refresh_from_db()
+        self.assertEqual(profile.avatar_variants['source'], profile.avatar.name)
+        for size in avatars.SIZES:
+            with Image.open(Path(self.media.name) / profile.avatar_variants[f'{size}.webp']) as image:
+                self.assertEqual((image.format, image.size), ('WEBP', (size, size)))
+            self.assertTrue((Path(self.media.name) / profile.avatar_variants[f'{size}.jpg']).exists())
+
+    def test_save_without_new_file_does_not_process(self):
+        """Testa se salvar o perfil ou o usuário não reprocessa a imagem"""
+        with patch('users.avatars.process') as process:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.profile.bio = 'Nova bio'
+                self.user.profile.save()
+                self.user.save()
+                self.client.login(username='avataruser', password='testpass123')
+
+        process.assert_not_called()
+
+    def test_template_uses_variants(self):
+        """Testa se o base.html usa <picture> com WebP depois do processamento"""
+        profile = self.user.profile
+        profile.avatar = self.upload()
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.client.login(username='avataruser', password='testpass123')
+
+        response = self.client.get(reverse('users:home'))
+
+        self.assertContains(response, '<source type="image/webp"')
+        self.assertContains(response, '-48.webp 1x')
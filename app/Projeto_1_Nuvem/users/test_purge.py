@@ -0,0 +1,177 @@
+"""
+Unit tests para a exclusão de contas em segundo plano (users.purge)
+"""
+import tempfile
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from social_django.models import UserSocialAuth
+from transactions import archive, ledger
+from transactions.models import ArchiveSegment, Category, Ledger, RecurringRule, SearchTerm, Transaction
+from users import purge
+from users.models import AccountPurge, Profile
+
+
+@override_settings(AVATAR_PROCESSING='sync', ACCOUNT_PURGE='sync')
+class AccountPurgeTestCase(TestCase):
+    """Tests para a exclusão em lotes de uma conta e de todos os seus dados"""
+
+    def setUp(self):
+        """Setup para cada teste"""
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        self.archive_root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive_root.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name, STORAGES={**settings.STORAGES, 'archive': {
+            'BACKEND': 'django.core.files.storage.FileSystemStorage',
+            'OPTIONS': {'location': self.archive_root.name},
+        }})
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(username='leaving', password='testpass123')
+        self.other = User.objects.create_user(username='staying', password='testpass123')
+        self.category = Category.objects.create(user=self.user, name='Pets')
+        rule = RecurringRule.objects.create(user=self.user, name='Aluguel', value=Decimal('-900.00'),
+                                            start_date=date(2025, 1, 1))
+        transactions = [
+            Transaction(user=self.user, name=f'Mercado {i}', value=Decimal('-10.00'), category=self.category,
+                        created_at=datetime(2022 + i % 4, 3, 1 + i, tzinfo=dt_timezone.utc))
+            for i in range(25)
+        ]
+        transactions.append(Transaction(user=self.user, name='Aluguel', value=Decimal('-900.00'),
+                                        recurring_rule=rule, occurrence_date=date(2025, 1, 1)))
+        transactions.append(Transaction(user=self.other, name='Mercado', value=Decimal('-5.00')))
+        for transaction in transactions:
+            transaction.save()
+        ledger.rebuild()
+        archive.archive([self.user.pk], before_year=2024)
+        self.segment_paths = list(ArchiveSegment.objects.filter(user=self.user).values_list('path', flat=True))
+        UserSocialAuth.objects.create(user=self.user, provider='google-oauth2', uid='leaving@example.com')
+
+        buffer = BytesIO()
+        Image.new('RGB', (300, 300), 'blue').save(buffer, 'JPEG')
+        profile = self.user.profile
+        profile.avatar = SimpleUploadedFile('foto.jpg', buffer.getvalue(), content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        profile.refresh_from_db()
+        self.avatar_files = [profile.avatar.name] + [
+            name for key, name in profile.avatar_variants.items() if key != 'source'
+        ]
+
+    def assert_user_data_gone(self):
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        for model in (Transaction, SearchTerm, ArchiveSegment, Ledger, RecurringRule, Category, UserSocialAuth,
+                      Profile):
+            self.assertFalse(model.objects.filter(user_id=self.user.pk).exists(), model.__name__)
+        for name in self.segment_paths:
+            self.assertFalse(archive.get_storage().exists(name))
+        for name in self.avatar_files:
+            self.assertFalse((Path(self.media.name) / name).exists())
+        # A outra conta fica intacta
+        self.assertEqual(Transaction.objects.filter(user=self.other).count(), 1)
+        self.assertEqual(ledger.verify([self.other.pk]), [])
+
+    def test_delete_account_returns_at_once(self):
+        """Testa se a requisição só desativa a conta e agenda a exclusão, sem apagar nada ainda"""
+        self.client.login(username='leaving', password='testpass123')
+
+        with patch.object(purge, 'run') as run:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('users:delete_account'),
+                                            {'password': 'testpass123', 'confirm': 'on'})
+
+        self.assertRedirects(response, reverse('users:login'))
+        purge_record = AccountPurge.objects.get(user_id=self.user.pk)
+        run.assert_called_once_with(purge_record.pk)
+        self.assertEqual((purge_record.status, purge_record.total_transactions), (AccountPurge.PENDING, 26))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertFalse(self.user.has_usable_password())
+        self.assertIsNone(RecurringRule.objects.get(user=self.user).next_date)
+        self.assertTrue(Transaction.objects.filter(user=self.user).exists())
+        # A sessão caiu
+        self.assertEqual(self.client.get(reverse('users:profile')).status_code, 302)
+
+    def test_wrong_password_keeps_account(self):
+        """Testa se a exclusão sem a senha correta não faz nada"""
+        self.client.login(username='leaving', password='testpass123')
+
+        response = self.client.post(reverse('users:delete_account'), {'password': 'errada', 'confirm': 'on'})
+
+        self.assertRedirects(response, reverse('users:profile'))
+        self.assertTrue(User.objects.get(pk=self.user.pk).is_active)
+        self.assertFalse(AccountPurge.objects.exists())
+
+    def test_purge_deletes_everything_in_batches(self):
+        """Testa se a exclusão apaga lançamentos, arquivo, perfil, avatar e login social, em lotes"""
+        self.client.login(username='leaving', password='testpass123')
+
+        with patch.object(purge, 'BATCH_SIZE', 4), patch.object(purge, '_batches', wraps=purge._batches) as batches:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse('users:delete_account'), {'password': 'testpass123', 'confirm': 'on'})
+
+        self.assertTrue(all(call.args[1] == 4 for call in batches.call_args_list))
+        self.assert_user_data_gone()
+        purge_record = AccountPurge.objects.get(user_id=self.user.pk)
+        self.assertEqual(purge_record.status, AccountPurge.DONE)
+        self.assertEqual(purge_record.progress, 100)
+        self.assertEqual(purge_record.deleted['transactions'], 26)
+        self.assertEqual(purge_record.deleted['social_auth'], 1)
+
+    def test_failed_purge_resumes_with_command(self):
+        """Testa se uma exclusão interrompida no meio continua de onde parou pelo purge_accounts"""
+        purge_record = purge.request(self.user)
+        real_batches = purge._batches
+        calls = []
+
+        def lose_connection(pks):
+            # Cai no meio do segundo lote, antes do DELETE: o lote volta inteiro
+            calls.append(pks)
+            if len(calls) == 2:
+                raise ConnectionError('conexão perdida')
+
+        def failing(queryset, batch_size, before=None):
+            return real_batches(queryset, batch_size, before or lose_connection)
+
+        with patch.object(purge, '_batches', failing), self.assertRaises(ConnectionError):
+            purge.run(purge_record.pk, batch_size=5)
+
+        purge_record.refresh_from_db()
+        self.assertEqual((purge_record.status, purge_record.step), (AccountPurge.FAILED, 'transactions'))
+        self.assertEqual(purge_record.deleted['transactions'], 5)
+        self.assertIn('conexão perdida', purge_record.error)
+
+        out = StringIO()
+        call_command('purge_accounts', stdout=out)
+
+        self.assertIn('1 contas excluídas', out.getvalue())
+        self.assert_user_data_gone()
+        purge_record.refresh_from_db()
+        self.assertEqual(purge_record.status, AccountPurge.DONE)
+        self.assertEqual(purge_record.deleted['transactions'], 26)
+
+    def test_admin_delete_schedules_purge(self):
+        """Testa se excluir o usuário pelo admin passa pela exclusão em lotes"""
+        User.objects.create_superuser(username='admin', password='testpass123')
+        self.client.login(username='admin', password='testpass123')
+        url = reverse('admin:auth_user_delete', args=[self.user.pk])
+
+        response = self.client.get(url)
+        self.assertContains(response, 'dados apagados em segundo plano')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'post': 'yes'})
+
+        self.assert_user_data_gone()
+        self.assertEqual(AccountPurge.objects.get(user_id=self.user.pk).status, AccountPurge.DONE)
@@ -1,10 +1,15 @@
 """
 Unit tests para User Views
 """
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.core.cache import cache
 from users.models import Profile
+from users import dashboard
+from transactions.models import Category, Transaction
+from decimal import Decimal
+from unittest.mock import patch
 
 
 class LoginAndRegisterViewTestCase(TestCase):
@@ -135,6 +140,7 @@ class HomeViewTestCase(TestCase):
             email='home@example.com',
             password='testpass123'
         )
+        cache.clear()
     
     def test_home_view_requires_login(self):
         """Testa se home requer login"""
@@ -151,3 +157,125 @@ class HomeViewTestCase(TestCase):
         self.assertIn('balance', response.context)
         self.assertIn('positiveTotal', response.context)
         self.assertIn('negativeTotal', response.context)
+
+    def test_home_view_totals(self):
+        """Testa os totais do dashboard lidos do Ledger"""
+        Transaction.objects.create(user=self.user, name='Salary', value=Decimal('1000.00'))
+        Transaction.objects.create(user=self.user, name='Rent', value=Decimal('-250.00'))
+
+        self.client.login(username='homeuser', password='testpass123')
+        response = self.client.get(reverse('users:home'))
+
+        self.assertEqual(response.context['balance'], Decimal('750.00'))
+        self.assertEqual(response.context['positiveTotal'], Decimal('1000.00'))
+        self.assertEqual(response.context['negativeTotal'], Decimal('250.00'))
+        self.assertEqual(response.context['incomePercentage'], 80)
+
+    def test_home_view_category_breakdown(self):
+        """Testa se o dashboard mostra os gastos por categoria e se trocar a categoria atualiza o resumo"""
+        rent = Transaction.objects.create(user=self.user, name='Rent', value=Decimal('-250.00'))
+        self.client.login(username='homeuser', password='testpass123')
+        self.client.get(reverse('users:home'))
+
+        # Só a categoria muda: o Ledger fica igual, mas a versão do resumo troca
+        with self.captureOnCommitCallbacks(execute=True):
+            rent.category = Category.objects.get(user=None, name='Moradia')
+            rent.save()
+        response = self.client.get(reverse('users:home'))
+
+        self.assertEqual(
+            [(row['name'], row['expense']) for row in response.context['category_totals']],
+            [('Moradia', Decimal('250.00'))],
+        )
+        self.assertContains(response, 'Gastos por Categoria')
+
+    @override_settings(QUOTES_PROVIDER='quotes.providers.StaticProvider', QUOTES_REFRESH='thread')
+    def test_home_view_stocks_from_quote_cache(self):
+        """Testa se o provider sem rede já mostra as cotações na primeira visita e depois as serve do cache"""
+        self.client.login(username='homeuser', password='testpass123')
+
+        response = self.client.get(reverse('users:home'))
+        self.assertEqual([stock['symbol'] for stock in response.context['stocks']], ['PETR4', 'MGLU3', 'VALE3'])
+
+        with patch('quotes.providers.StaticProvider.fetch') as fetch:
+            response = self.client.get(reverse('users:home'))
+        fetch.assert_not_called()
+        self.assertEqual([stock['symbol'] for stock in response.context['stocks']], ['PETR4', 'MGLU3', 'VALE3'])
+
+    def test_home_view_uses_versioned_cache(self):
+        """Testa se o dashboard vem do cache até o usuário escrever um lançamento"""
+        self.client.login(username='homeuser', password='testpass123')
+        self.client.get(reverse('users:home'))
+
+        # Visita repetida: só sessão e usuário (com o perfil), nenhuma consulta de totais
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('users:home'))
+        self.assertEqual(response.context['balance'], Decimal('0.00'))
+        self.assertEqual(dashboard.stats()['hits'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:create'), {
+                'name': 'Salary',
+                'value': '300.00',
+                'description': ''
+            })
+
+        response = self.client.get(reverse('users:home'))
+        self.assertEqual(response.context['balance'], Decimal('300.00'))
+        self.assertEqual(len(response.context['data_transactions']), 1)
+
+    def test_home_view_rename_refreshes_cache(self):
+        """Testa se renomear um lançamento (sem mudar o valor) atualiza os recentes do dashboard"""
+        rent = Transaction.objects.create(user=self.user, name='Old', value=Decimal('-250.00'))
+        self.client.login(username='homeuser', password='testpass123')
+        self.client.get(reverse('users:home'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:update', args=[rent.pk]), {
+                'name': 'New', 'value': '-250.00', 'description': 'Aluguel',
+            })
+        response = self.client.get(reverse('users:home'))
+
+        self.assertEqual([t.name for t in response.context['data_transactions']], ['New'])
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db', USER_CACHE_TIMEOUT=300)
+class CachedSessionTestCase(TestCase):
+    """Tests para sessões em cache e o usuário carregado por users.loader"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='cacheduser', password='testpass123')
+        self.client.login(username='cacheduser', password='testpass123')
+
+    def test_authenticated_page_without_queries(self):
+        """Testa se uma página logada com tudo em cache não faz nenhuma consulta"""
+        self.client.get(reverse('users:home'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:home'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_profile_save_invalidates_cached_user(self):
+        """Testa se salvar o perfil tira o usuário do cache"""
+        self.client.get(reverse('users:home'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = Profile.objects.get(user=self.user)
+            profile.bio = 'Nova bio'
+            profile.save()
+
+        response = self.client.get(reverse('users:home'))
+        self.assertEqual(response.context['user'].profile.bio, 'Nova bio')
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Testa se o hash da sessão continua sendo verificado com o usuário em cache"""
+        self.client.get(reverse('users:home'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('outrasenha123')
+            self.user.save()
+
+        response = self.client.get(reverse('users:home'))
+        self.assertEqual(response.status_code, 302)
@@ -1,17 +1,27 @@
+from django.conf import settings
 from django.urls import path, re_path, include
 from django.contrib.auth import views as auth_views
-from .views import home, profile, LoginAndRegisterView, ResetPasswordView, ChangePasswordView, logout_view
+from MyProject.proxy import micro_cache
+from .views import (
+    home, ahome, profile, delete_account, csrf, LoginAndRegisterView, ResetPasswordView, ChangePasswordView, logout_view,
+)
 
 app_name = 'users'
 
 urlpatterns = [
     
-    path('', LoginAndRegisterView.as_view(), name='login'),
+    # Página mais acessada sem login: o token do CSRF vem à parte (csrf), então
+    # o GET anônimo pode ficar no micro-cache do nginx
+    path('', micro_cache(LoginAndRegisterView.as_view()), name='login'),
 
-    path('home/', home, name ='home'),
+    path('csrf/', csrf, name='csrf'),
+
+    path('home/', ahome if settings.ASYNC_VIEWS else home, name ='home'),
     
     path('profile/', profile, name='profile'),
 
+    path('profile/delete/', delete_account, name='delete_account'),
+
    path('logout/', logout_view, name='logout'),
 
     path('password-reset/', ResetPasswordView.as_view(), name='password_reset'),
@@ -20,8 +30,9 @@ urlpatterns = [
          auth_views.PasswordResetConfirmView.as_view(template_name='users/password_reset_confirm.html'),
          name='password_reset_confirm'),
 
+    # Página anônima sem formulário: pode ficar no micro-cache do nginx
     path('password-reset-complete/',
-         auth_views.PasswordResetCompleteView.as_view(template_name='users/password_reset_complete.html'),
+         micro_cache(auth_views.PasswordResetCompleteView.as_view(template_name='users/password_reset_complete.html')),
          name='password_reset_complete'),
 
     path('password-change/', ChangePasswordView.as_view(), name='password_change'),
@@ -1,3 +1,6 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import render, redirect
 from django.urls import reverse_lazy
 from django.contrib.auth.views import PasswordResetView, PasswordChangeView
@@ -6,54 +9,34 @@ from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
 from django.views import View
 from django.contrib.auth.decorators import login_required
-from .forms import RegisterForm, LoginForm, UpdateUserForm, UpdateProfileForm, CustomPasswordChangeForm
-from transactions.models import Transaction 
-from django.db.models import Sum
-from decimal import Decimal
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_POST
+from .forms import (
+    RegisterForm, LoginForm, UpdateUserForm, UpdateProfileForm, CustomPasswordChangeForm, DeleteAccountForm,
+)
+from MyProject.proxy import accel_redirect
+from quotes import store as quotes
+from . import avatars, dashboard, purge
 
 @login_required
 def home(request):
 
-    transactions = Transaction.objects.filter(user=request.user)
-   
-    positive_total_dict = transactions.filter(value__gt=0).aggregate(total=Sum('value'))
-    positiveTotal = positive_total_dict['total'] or Decimal('0.00')
-
-    negative_total_dict = transactions.filter(value__lt=0).aggregate(total=Sum('value'))
-    negativeTotal = negative_total_dict['total'] or Decimal('0.00')
+    # Totais, percentuais e recentes vêm do cache versionado pelo ledger do usuário
+    context = dict(dashboard.get_summary(request.user))
 
-    balance = positiveTotal + negativeTotal
-
-    total_flow = positiveTotal + abs(negativeTotal) 
-    
-    if total_flow > 0:
-        incomePercentage = int((positiveTotal / total_flow) * 100)
-        expensePercentage = int((abs(negativeTotal) / total_flow) * 100)
-    else:
-        incomePercentage = 0
-        expensePercentage = 0
+    # Cotações do cache (quotes.store); fora do resumo, que só muda com o ledger
+    context['stocks'] = quotes.get_quotes()
 
-   
-    recent_transactions = transactions.order_by('-created_at')[:10]
- 
-    stocks = [
-        {'symbol': 'PETR4', 'price': 38.50, 'changesPercentage': 1.5},       #SIMULAÇÃO, NECESSARIO API
-        {'symbol': 'MGLU3', 'price': 12.70, 'changesPercentage': -0.8},
-        {'symbol': 'VALE3', 'price': 65.20, 'changesPercentage': 2.1},
-    ]
+    return render(request, 'users/home.html', context)
 
-    
-    context = {
-        'balance': balance,
-        'positiveTotal': positiveTotal,
-        'negativeTotal': abs(negativeTotal), 
-        'incomePercentage': incomePercentage,
-        'expensePercentage': expensePercentage,
-        'data_transactions': recent_transactions, 
-        'stocks': stocks,
-     
-    }
 
+@login_required
+async def ahome(request):
+    """Versão assíncrona do dashboard, usada no modo ASGI (settings.ASYNC_VIEWS)."""
+    # O template usa request.user; já carregado aqui, a renderização não consulta o banco
+    request.user = await request.auser()
+    context = dict(await dashboard.aget_summary(request.user))
+    context['stocks'] = await sync_to_async(quotes.get_quotes)()
     return render(request, 'users/home.html', context)
 
 class LoginAndRegisterView(View):
@@ -74,6 +57,9 @@ class LoginAndRegisterView(View):
         context = {
             'login_form': login_form,
             'register_form': register_form,
+            # Sem {% csrf_token %} a página não tem Set-Cookie nem dado do visitante
+            # e entra no micro-cache do nginx; o token vem depois, pela view csrf
+            'deferred_csrf': True,
         }
         return render(request, self.template_name, context)
 
@@ -112,6 +98,12 @@ class LoginAndRegisterView(View):
         return render(request, self.template_name, context)
 
 
+@never_cache
+def csrf(request):
+    """Token do CSRF (e o cookie) para os formulários da página de login em cache."""
+    return JsonResponse({'token': get_token(request)})
+
+
 class ResetPasswordView(SuccessMessageMixin, PasswordResetView):
     template_name = 'users/password_reset.html'
     email_template_name = 'users/password_reset_email.html'
@@ -151,4 +143,34 @@ def profile(request):
         user_form = UpdateUserForm(instance=request.user)
         profile_form = UpdateProfileForm(instance=request.user.profile)
 
-    return render(request, 'users/profile.html', {'user_form': user_form, 'profile_form': profile_form})
+    return render(request, 'users/profile.html', {
+        'user_form': user_form, 'profile_form': profile_form, 'delete_form': DeleteAccountForm(request.user),
+    })
+
+
+@login_required
+@require_POST
+def delete_account(request):
+    """Desativa a conta na hora; os dados são apagados em segundo plano (users.purge)."""
+    form = DeleteAccountForm(request.user, request.POST)
+    if not form.is_valid():
+        messages.error(request, 'Confirme a exclusão com a sua senha para excluir a conta.')
+        return redirect('users:profile')
+    purge.request(request.user)
+    logout(request)
+    messages.info(request, 'Sua conta foi desativada e os seus dados serão apagados em instantes.')
+    return redirect('users:login')
+
+
+def media(request, path):
+    """Arquivos de mídia: o avatar padrão para todos; fora ele, só o avatar do próprio usuário e suas versões."""
+    if path == avatars.DEFAULT_AVATAR:
+        return accel_redirect(path, cache_control='public, max-age=86400')
+    if not request.user.is_authenticated:
+        raise Http404
+    profile = request.user.profile
+    allowed = {profile.avatar.name}
+    allowed.update(name for key, name in (profile.avatar_variants or {}).items() if key != 'source')
+    if path not in allowed:
+        raise Http404
+    return accel_redirect(path)